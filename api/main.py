@@ -2,6 +2,7 @@
 Customer Churn Prediction - FastAPI Backend
 ============================================
 Step 9: POST /predict, GET /health, load model at startup, CORS for Next.js.
+Startup reads only models/churn_model.joblib and models/training_manifest.json.
 
 Run from project root: uvicorn api.main:app --reload --host 0.0.0.0 --port 8000
 """
@@ -9,6 +10,7 @@ Run from project root: uvicorn api.main:app --reload --host 0.0.0.0 --port 8000
 import os
 import sys
 import json
+import time
 import joblib
 import numpy as np
 import pandas as pd
@@ -23,8 +25,17 @@ if PROJECT_ROOT not in sys.path:
     sys.path.insert(0, PROJECT_ROOT)
 MODELS_DIR = os.path.join(PROJECT_ROOT, "models")
 
+MANIFEST_PATH = os.path.join(MODELS_DIR, "training_manifest.json")
+
 # Global state (loaded at startup)
-app_state = {"model": None, "scaler": None, "feature_columns": None, "q33": None, "q66": None}
+app_state = {
+    "model": None,
+    "scaler_mean": None,
+    "scaler_scale": None,
+    "feature_columns": None,
+    "q33": None,
+    "q66": None,
+}
 
 
 # ---------------------------------------------------------------------------
@@ -156,21 +167,24 @@ def build_feature_row(req: PredictRequest, q33: float, q66: float) -> dict:
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    """Load model, scaler, feature columns (and quantiles) once at startup."""
+    """
+    Load the model and the training manifest once at startup.
+    The manifest (written by train.py with the model) holds the scaler stats, feature order
+    and monthly charge quantiles, so no dataset or pipeline code is loaded here.
+    """
+    start = time.perf_counter()
     model_path = os.path.join(MODELS_DIR, "churn_model.joblib")
-    scaler_path = os.path.join(MODELS_DIR, "scaler.joblib")
-    fc_path = os.path.join(MODELS_DIR, "feature_columns.json")
-    if not all(os.path.exists(p) for p in [model_path, scaler_path, fc_path]):
+    if not all(os.path.exists(p) for p in [model_path, MANIFEST_PATH]):
         raise RuntimeError("Missing model artifacts. Run src/train.py first.")
     app_state["model"] = joblib.load(model_path)
-    app_state["scaler"] = joblib.load(scaler_path)
-    with open(fc_path) as f:
-        app_state["feature_columns"] = json.load(f)
-    # Load data to get monthly charge quantiles for bucket boundaries
-    from src.preprocessing import load_and_clean_data
-    df = load_and_clean_data()
-    app_state["q33"] = float(df["MonthlyCharges"].quantile(0.33))
-    app_state["q66"] = float(df["MonthlyCharges"].quantile(0.66))
+    with open(MANIFEST_PATH) as f:
+        manifest = json.load(f)
+    app_state["scaler_mean"] = np.asarray(manifest["scaler_mean"], dtype=float)
+    app_state["scaler_scale"] = np.asarray(manifest["scaler_scale"], dtype=float)
+    app_state["feature_columns"] = manifest["feature_columns"]
+    app_state["q33"] = manifest["q33"]
+    app_state["q66"] = manifest["q66"]
+    print(f"Model and training manifest loaded in {(time.perf_counter() - start) * 1000:.1f} ms")
     yield
     # shutdown: nothing to do
 
@@ -194,17 +208,17 @@ def health():
 def predict(request: PredictRequest):
     """Run churn prediction with same feature engineering as training."""
     model = app_state["model"]
-    scaler = app_state["scaler"]
     feature_columns = app_state["feature_columns"]
     q33 = app_state["q33"]
     q66 = app_state["q66"]
-    if model is None or scaler is None or feature_columns is None:
+    if model is None or app_state["scaler_mean"] is None or feature_columns is None:
         raise HTTPException(status_code=503, detail="Model not loaded")
     row = build_feature_row(request, q33, q66)
     # Build vector in exact training column order
     numerical_cols = ["tenure", "MonthlyCharges", "TotalCharges", "total_spend"]
-    num_vals = np.array([[row["tenure"], row["MonthlyCharges"], row["TotalCharges"], row["total_spend"]]], dtype=float)
-    scaled_num = scaler.transform(num_vals)[0]
+    num_vals = np.array([row["tenure"], row["MonthlyCharges"], row["TotalCharges"], row["total_spend"]], dtype=float)
+    # Same arithmetic as StandardScaler.transform
+    scaled_num = (num_vals - app_state["scaler_mean"]) / app_state["scaler_scale"]
     # Full feature vector: use scaled values for numerical, row values for rest
     X_list = []
     for c in feature_columns:
@@ -0,0 +1,273 @@
+"""
+Customer Churn Prediction - Preprocessing Benchmarks
+====================================================
+Time every preprocessing stage at several data sizes and track regressions.
+
+Stages (each fed the previous stage's output, as in the reference order):
+load (load_and_clean_data), encode_binary_columns, add_engineered_features,
+one_hot_encode_categorical, scale_numerical_features, plus the fitted
+ChurnFeaturePipeline that preprocess() actually runs (pipeline_fit,
+pipeline_transform).
+
+Inputs are synthetic CSVs in the churn.csv schema (src/synthetic.py, fixed
+seed), generated once per size and kept in data/synthetic/. Each stage runs
+`repeats` times under a StageProfiler; the JSON records the median wall and
+CPU time, rows/sec, the peak-RSS increase and the peak traced allocation (one
+extra run under tracemalloc) per (size, stage), together with the machine and
+library versions. Memory regressions are judged on the traced peak, which
+unlike RSS does not depend on pages the allocator kept from earlier stages.
+
+Compare a run against a saved baseline to flag stages whose throughput
+dropped or whose peak memory grew by more than the tolerance (the process
+exits with status 1 if any did). Baselines are machine-specific: record one
+on the machine that runs the comparison.
+
+Run from project root:
+    python src/benchmark.py --sizes 10000 100000 1000000 --output benchmarks/latest.json
+    python src/benchmark.py --save-baseline                # also write benchmarks/baseline.json
+    python src/benchmark.py --compare benchmarks/baseline.json
+"""
+
+import os
+import gc
+import sys
+import json
+import time
+import argparse
+import platform
+import statistics
+import tracemalloc
+import numpy as np
+import pandas as pd
+import sklearn
+
+# Ensure project root is on path so "from src.preprocessing" works when running python src/benchmark.py
+_PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, _PROJECT_ROOT)
+from src.preprocessing import (
+    load_and_clean_data,
+    encode_target,
+    encode_binary_columns,
+    add_engineered_features,
+    one_hot_encode_categorical,
+    scale_numerical_features,
+    ChurnFeaturePipeline,
+    PROJECT_ROOT,
+)
+from src.instrumentation import stage, StageProfiler
+from src.synthetic import SyntheticChurnGenerator, DEFAULT_SEED
+
+# ---------------------------------------------------------------------------
+# Config
+# ---------------------------------------------------------------------------
+BENCHMARK_DIR = os.path.join(PROJECT_ROOT, "benchmarks")
+RESULTS_PATH = os.path.join(BENCHMARK_DIR, "latest.json")
+BASELINE_PATH = os.path.join(BENCHMARK_DIR, "baseline.json")
+SYNTHETIC_DIR = os.path.join(PROJECT_ROOT, "data", "synthetic")
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000]
+DEFAULT_REPEATS = 3
+THROUGHPUT_TOLERANCE = 0.20  # flag a stage more than 20% slower than the baseline
+MEMORY_TOLERANCE = 0.25  # ... or with a peak allocation more than 25% larger
+MEMORY_FLOOR_MB = 5.0  # ignore memory changes below this (allocator noise)
+BENCHMARK_VERSION = 1
+
+
+def benchmark_input(n_rows: int, seed: int = DEFAULT_SEED) -> str:
+    """Path of the n_rows synthetic CSV, generated on first use."""
+    path = os.path.join(SYNTHETIC_DIR, f"bench_{n_rows}_seed{seed}.csv")
+    if not os.path.exists(path):
+        print(f"  Generating {n_rows} synthetic rows -> {path}")
+        SyntheticChurnGenerator(seed=seed).fit().write(n_rows, path)
+    return path
+
+
+def _stages(data_path: str):
+    """(name, fn(previous output) -> output) in reference order."""
+    return [
+        ("load", lambda _: load_and_clean_data(data_path)),
+        # encode_target is not one of the benchmarked stages; it only prepares encode_binary_columns' input
+        ("encode_binary_columns", encode_binary_columns),
+        ("add_engineered_features", add_engineered_features),
+        ("one_hot_encode_categorical", one_hot_encode_categorical),
+        ("scale_numerical_features", lambda df: scale_numerical_features(df)[0]),
+    ]
+
+
+def _report(record: dict) -> None:
+    print(f"  {record['stage']:28s} {record['wall_seconds']:9.4f}s  {record['rows_per_second'] or 0:>14,.0f} rows/s"
+          f"  peak alloc {record['peak_alloc_mb']:8.1f} MB")
+
+
+def _measure(name: str, fn, arg, n_rows: int, repeats: int):
+    """Run fn(arg) repeats times; returns (summary record, last output)."""
+    records = []
+    out = None
+    # Peak allocation from one traced run (numpy and pandas buffers are traced). Unlike RSS it
+    # does not depend on what the allocator kept from earlier stages, so it is stable across runs.
+    gc.collect()
+    tracemalloc.start()
+    out = fn(arg)
+    peak_alloc = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    for _ in range(repeats):
+        out = None
+        gc.collect()
+        with StageProfiler() as profiler:
+            with stage(name, rows=n_rows):
+                out = fn(arg)
+        records.append(next(r for r in profiler.stages if r["stage"] == name))
+    wall = statistics.median(r["wall_seconds"] for r in records)
+    return {
+        "stage": name,
+        "rows": n_rows,
+        "repeats": repeats,
+        "wall_seconds": round(wall, 6),
+        "cpu_seconds": round(statistics.median(r["cpu_seconds"] for r in records), 6),
+        "rows_per_second": round(n_rows / wall, 1) if wall > 0 else None,
+        "peak_alloc_mb": round(peak_alloc / 1e6, 3),
+        "peak_rss_delta_mb": max(r["peak_rss_delta_mb"] for r in records),
+        "peak_rss_method": profiler.report()["peak_rss_method"],
+    }, out
+
+
+def run_benchmarks(sizes=None, repeats: int = DEFAULT_REPEATS, seed: int = DEFAULT_SEED) -> dict:
+    """Benchmark every stage at every size; returns the JSON-serializable results."""
+    sizes = sorted(sizes or DEFAULT_SIZES)
+    results = []
+    for n_rows in sizes:
+        data_path = benchmark_input(n_rows, seed)
+        print(f"Benchmarking {n_rows} rows ({repeats} repeats per stage)...")
+        out = None
+        for name, fn in _stages(data_path):
+            record, out = _measure(name, fn, out, n_rows, repeats)
+            results.append({"size": n_rows, **record})
+            _report(record)
+            if name == "load":
+                out = encode_target(out)
+        # The production path: one fit pass, one transform pass
+        df = load_and_clean_data(data_path)
+        record, pipeline = _measure("pipeline_fit", ChurnFeaturePipeline().fit, df, n_rows, repeats)
+        results.append({"size": n_rows, **record})
+        _report(record)
+        record, out = _measure("pipeline_transform", pipeline.transform, df, n_rows, repeats)
+        results.append({"size": n_rows, **record})
+        _report(record)
+        del out, df, pipeline
+    return {
+        "benchmark_version": BENCHMARK_VERSION,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "machine": {
+            "platform": platform.platform(),
+            "processor": platform.processor() or platform.machine(),
+            "cpu_count": os.cpu_count(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "scikit-learn": sklearn.__version__,
+        },
+        "seed": seed,
+        "sizes": sizes,
+        "results": results,
+    }
+
+
+def save_results(results: dict, path: str) -> str:
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(results, f, indent=2)
+    return path
+
+
+# ---------------------------------------------------------------------------
+# Regression check
+# ---------------------------------------------------------------------------
+def compare_results(
+    current: dict,
+    baseline: dict,
+    throughput_tolerance: float = THROUGHPUT_TOLERANCE,
+    memory_tolerance: float = MEMORY_TOLERANCE,
+) -> list:
+    """
+    One row per (size, stage) present in both runs, with the throughput and
+    peak-memory ratios (current / baseline) and a list of regressions
+    ("throughput" and/or "memory"; empty if within tolerance).
+    """
+    base = {(r["size"], r["stage"]): r for r in baseline["results"]}
+    rows = []
+    for r in current["results"]:
+        b = base.get((r["size"], r["stage"]))
+        if b is None:
+            continue
+        throughput_ratio = (r["rows_per_second"] or 0) / b["rows_per_second"] if b["rows_per_second"] else None
+        regressions = []
+        if throughput_ratio is not None and throughput_ratio < 1 - throughput_tolerance:
+            regressions.append("throughput")
+        mem, base_mem = r["peak_alloc_mb"], b["peak_alloc_mb"]
+        if mem - base_mem > MEMORY_FLOOR_MB and mem > base_mem * (1 + memory_tolerance):
+            regressions.append("memory")
+        rows.append({
+            "size": r["size"],
+            "stage": r["stage"],
+            "rows_per_second": r["rows_per_second"],
+            "baseline_rows_per_second": b["rows_per_second"],
+            "throughput_ratio": round(throughput_ratio, 3) if throughput_ratio is not None else None,
+            "peak_alloc_mb": mem,
+            "baseline_peak_alloc_mb": base_mem,
+            "regressions": regressions,
+        })
+    return rows
+
+
+def print_comparison(rows: list, current: dict, baseline: dict) -> int:
+    """Print the comparison table; returns the number of regressed (size, stage) pairs."""
+    if current["machine"] != baseline["machine"]:
+        print("Warning: baseline was recorded on a different machine or library versions:")
+        for key, value in baseline["machine"].items():
+            if current["machine"].get(key) != value:
+                print(f"  {key}: baseline {value!r}, now {current['machine'].get(key)!r}")
+    print(f"{'size':>10}  {'stage':28s} {'rows/s':>14} {'baseline':>14} {'ratio':>6}  {'peak MB':>8} {'base MB':>8}")
+    n_regressed = 0
+    for r in rows:
+        flag = ""
+        if r["regressions"]:
+            n_regressed += 1
+            flag = "  REGRESSION: " + ", ".join(r["regressions"])
+        ratio = f"{r['throughput_ratio']:.2f}" if r["throughput_ratio"] is not None else "-"
+        print(f"{r['size']:>10}  {r['stage']:28s} {r['rows_per_second'] or 0:>14,.0f} "
+              f"{r['baseline_rows_per_second'] or 0:>14,.0f} {ratio:>6}  "
+              f"{r['peak_alloc_mb']:>8.1f} {r['baseline_peak_alloc_mb']:>8.1f}{flag}")
+    print(f"{n_regressed} regression(s) in {len(rows)} compared stage(s)")
+    return n_regressed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark preprocessing stages and check for regressions.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="Row counts to benchmark")
+    parser.add_argument("--repeats", type=int, default=DEFAULT_REPEATS, help="Runs per stage (median reported)")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED, help="Seed of the synthetic inputs")
+    parser.add_argument("--output", default=RESULTS_PATH, help="Where to write the results JSON")
+    parser.add_argument("--save-baseline", action="store_true", help=f"Also write the results to {BASELINE_PATH}")
+    parser.add_argument("--compare", default=None, metavar="BASELINE_JSON",
+                        help="Compare against a saved baseline; exit 1 on regressions")
+    parser.add_argument("--results", default=None, metavar="RESULTS_JSON",
+                        help="With --compare: compare this saved run instead of running the benchmarks")
+    parser.add_argument("--throughput-tolerance", type=float, default=THROUGHPUT_TOLERANCE)
+    parser.add_argument("--memory-tolerance", type=float, default=MEMORY_TOLERANCE)
+    args = parser.parse_args()
+
+    if args.results:
+        with open(args.results) as f:
+            current = json.load(f)
+    else:
+        current = run_benchmarks(args.sizes, args.repeats, args.seed)
+        print(f"Results written to {save_results(current, args.output)}")
+        if args.save_baseline:
+            print(f"Baseline written to {save_results(current, BASELINE_PATH)}")
+    if args.compare:
+        if not os.path.exists(args.compare):
+            raise FileNotFoundError(f"Baseline not found: {args.compare}")
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        rows = compare_results(current, baseline, args.throughput_tolerance, args.memory_tolerance)
+        sys.exit(1 if print_comparison(rows, current, baseline) else 0)
@@ -0,0 +1,202 @@
+"""
+Customer Churn Prediction - Feature Cache
+=========================================
+Content-addressed on-disk cache of the preprocessed feature matrix.
+
+cached_preprocess() has the same contract as preprocess() but stores the
+encoded X (float64 .npy), y (.npy), the feature columns and the fitted
+pipeline under a key derived from:
+- the SHA-256 of the CSV bytes
+- the preprocessing parameters (cache version, column layout, and the
+  fitted pipeline's fingerprint when transforming with a given pipeline)
+
+Any change to the CSV or to those parameters produces a new key, so stale
+entries are never read. train.py and evaluate.py both go through this cache.
+
+Run from project root: python src/cache.py --clear
+"""
+
+import os
+import sys
+import json
+import shutil
+import hashlib
+import argparse
+import tempfile
+import joblib
+import numpy as np
+import pandas as pd
+from typing import Tuple
+
+# Ensure project root is on path so "from src.preprocessing" works when running python src/cache.py
+_PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, _PROJECT_ROOT)
+from src.preprocessing import (
+    preprocess,
+    ChurnFeaturePipeline,
+    DATA_PATH,
+    PROJECT_ROOT,
+    BINARY_COLUMNS,
+    CATEGORICAL_COLUMNS,
+    NUMERICAL_COLUMNS,
+    TENURE_LABELS,
+    MONTHLY_BUCKET_LABELS,
+    TARGET_COLUMN,
+)
+from src.instrumentation import stage
+
+# ---------------------------------------------------------------------------
+# Config
+# ---------------------------------------------------------------------------
+# Bump when the encoding logic changes in a way the parameters below don't capture
+CACHE_VERSION = 1
+CACHE_DIR = os.path.join(PROJECT_ROOT, "data", "cache")
+_HASH_BLOCK = 1 << 20
+
+
+def file_sha256(path: str) -> str:
+    """SHA-256 of the file contents, read in 1 MB blocks."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(_HASH_BLOCK), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def preprocessing_params(pipeline: ChurnFeaturePipeline = None, typed: bool = False) -> dict:
+    """Everything besides the CSV bytes that determines the encoded matrix."""
+    return {
+        "cache_version": CACHE_VERSION,
+        "typed": typed,
+        "binary_columns": BINARY_COLUMNS,
+        "categorical_columns": CATEGORICAL_COLUMNS,
+        "numerical_columns": NUMERICAL_COLUMNS,
+        "tenure_labels": TENURE_LABELS,
+        "monthly_bucket_labels": MONTHLY_BUCKET_LABELS,
+        # "fit": the pipeline is fitted on this CSV; otherwise the given pipeline's state
+        "pipeline": "fit" if pipeline is None else pipeline.fingerprint(),
+    }
+
+
+def cache_key(csv_sha: str, params: dict) -> str:
+    payload = csv_sha + json.dumps(params, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+# ---------------------------------------------------------------------------
+# Entries
+# ---------------------------------------------------------------------------
+def load_entry(key: str, cache_dir: str = None):
+    """Return (df with target column, pipeline, meta) for a cache key, or None on miss."""
+    entry_dir = os.path.join(cache_dir or CACHE_DIR, key)
+    meta_path = os.path.join(entry_dir, "meta.json")
+    if not os.path.exists(meta_path):
+        return None
+    with open(meta_path) as f:
+        meta = json.load(f)
+    X = np.load(os.path.join(entry_dir, "X.npy"), mmap_mode="r")
+    y = np.load(os.path.join(entry_dir, "y.npy"))
+    df = pd.DataFrame(X, columns=meta["feature_columns"], copy=False)
+    df[TARGET_COLUMN] = y
+    pipeline = joblib.load(os.path.join(entry_dir, "pipeline.joblib"))
+    return df, pipeline, meta
+
+
+def store_entry(
+    key: str,
+    df: pd.DataFrame,
+    pipeline: ChurnFeaturePipeline,
+    csv_sha: str,
+    cache_dir: str = None,
+) -> str:
+    """Write an entry atomically (build in a temp dir, then rename into place)."""
+    cache_dir = cache_dir or CACHE_DIR
+    os.makedirs(cache_dir, exist_ok=True)
+    entry_dir = os.path.join(cache_dir, key)
+    if os.path.exists(entry_dir):
+        return entry_dir
+    tmp_dir = tempfile.mkdtemp(dir=cache_dir, prefix=".tmp-")
+    try:
+        X = df.drop(columns=[TARGET_COLUMN])
+        np.save(os.path.join(tmp_dir, "X.npy"), X.to_numpy(dtype=np.float64))
+        np.save(os.path.join(tmp_dir, "y.npy"), df[TARGET_COLUMN].to_numpy())
+        joblib.dump(pipeline, os.path.join(tmp_dir, "pipeline.joblib"))
+        meta = {
+            "csv_sha256": csv_sha,
+            "pipeline_fingerprint": pipeline.fingerprint(),
+            "feature_columns": list(X.columns),
+            "n_rows": len(X),
+        }
+        with open(os.path.join(tmp_dir, "meta.json"), "w") as f:
+            json.dump(meta, f, indent=2)
+        os.replace(tmp_dir, entry_dir)
+    except OSError:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        # Another process may have stored the same entry first
+        if not os.path.exists(entry_dir):
+            raise
+    return entry_dir
+
+
+def clear_cache(cache_dir: str = None) -> None:
+    shutil.rmtree(cache_dir or CACHE_DIR, ignore_errors=True)
+
+
+# ---------------------------------------------------------------------------
+# Cached preprocess()
+# ---------------------------------------------------------------------------
+def cached_preprocess(
+    data_path: str = None,
+    pipeline: ChurnFeaturePipeline = None,
+    save_pipeline: bool = True,
+    cache_dir: str = None,
+    typed: bool = False,
+) -> Tuple[pd.DataFrame, ChurnFeaturePipeline]:
+    """
+    preprocess() with the content-addressed cache in front of it.
+    Returns (cleaned DataFrame ready for training, fitted ChurnFeaturePipeline).
+    Transforming with the pipeline that was fitted on the same CSV reuses the
+    entry written when it was fitted.
+    """
+    path = data_path or DATA_PATH
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Dataset not found: {path}")
+    with stage("cache_key"):
+        csv_sha = file_sha256(path)
+        key = cache_key(csv_sha, preprocessing_params(pipeline, typed))
+
+    with stage("cache_load"):
+        hit = load_entry(key, cache_dir)
+        if hit is None and pipeline is not None:
+            # The fit-mode entry is valid too if it was fitted to exactly this pipeline
+            fit_hit = load_entry(cache_key(csv_sha, preprocessing_params(None, typed)), cache_dir)
+            if fit_hit is not None and fit_hit[2]["pipeline_fingerprint"] == pipeline.fingerprint():
+                hit = fit_hit
+
+    if hit is not None:
+        df, cached_pipeline, _ = hit
+        print(f"Loaded preprocessed features from cache ({key[:12]})")
+        if pipeline is None:
+            pipeline = cached_pipeline
+            if save_pipeline:
+                print(f"Feature pipeline saved to {pipeline.save()}")
+        return df, pipeline
+
+    df, pipeline = preprocess(data_path, pipeline=pipeline, save_pipeline=save_pipeline, typed=typed)
+    with stage("cache_store", rows=len(df)):
+        store_entry(key, df, pipeline, csv_sha, cache_dir)
+    print(f"Cached preprocessed features ({key[:12]})")
+    return df, pipeline
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Feature cache maintenance.")
+    parser.add_argument("--clear", action="store_true", help="Delete all cached feature matrices")
+    args = parser.parse_args()
+    if args.clear:
+        clear_cache()
+        print(f"Cleared {CACHE_DIR}")
+    else:
+        df, _ = cached_preprocess(save_pipeline=False)
+        print(f"Shape: {df.shape}")
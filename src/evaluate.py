@@ -21,7 +21,8 @@ import shap
 _PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 if _PROJECT_ROOT not in sys.path:
     sys.path.insert(0, _PROJECT_ROOT)
-from src.preprocessing import preprocess, get_feature_matrix_and_target, MODELS_DIR
+from src.preprocessing import get_feature_matrix_and_target, ChurnFeaturePipeline, MODELS_DIR
+from src.cache import cached_preprocess
 
 
 def load_model_and_data():
@@ -30,7 +31,9 @@ def load_model_and_data():
     if not os.path.exists(model_path):
         raise FileNotFoundError(f"Model not found: {model_path}. Run src/train.py first.")
     model = joblib.load(model_path)
-    df_clean, _ = preprocess(save_scaler=False)
+    # Reuse the fitted feature pipeline from training (transform only, no refit)
+    pipeline = ChurnFeaturePipeline.load()
+    df_clean, _ = cached_preprocess(pipeline=pipeline)
     X, _ = get_feature_matrix_and_target(df_clean)
     return model, X
 
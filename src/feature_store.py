@@ -0,0 +1,160 @@
+"""
+Customer Churn Prediction - Memory-Mapped Feature Store
+=======================================================
+Write an encoded matrix (e.g. the SMOTE-resampled training set) to disk
+once and reopen it as read-only np.memmap-backed DataFrames.
+
+- joblib (RandomizedSearchCV n_jobs=-1, loky workers) passes memmap-backed
+  arrays to workers by file name instead of pickling or re-dumping them,
+  so every worker maps the same pages and memory stays flat as n_jobs grows.
+- A float32 copy is stored next to a float64 matrix. RandomForest and
+  XGBoost convert their input to float32 anyway, so opening that copy gives
+  the same models without each fit materializing its own converted copy.
+
+Layout: <store_dir>/<name>/X.npy, X_float32.npy, y.npy, meta.json
+X is stored column-major (one feature after another, saved as an
+(n_features, n_rows) array). That is how pandas keeps a 2-D block, so the
+DataFrame's block is the memmap itself; joblib rebuilds it in workers with
+the memmap's own order, which scrambles a transposed view of a row-major file.
+"""
+
+import os
+import sys
+import json
+import shutil
+import hashlib
+import tempfile
+import numpy as np
+import pandas as pd
+from typing import Tuple
+
+# Ensure project root is on path so "from src.preprocessing" works when running python src/feature_store.py
+_PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, _PROJECT_ROOT)
+from src.preprocessing import PROJECT_ROOT, TARGET_COLUMN
+
+# ---------------------------------------------------------------------------
+# Config
+# ---------------------------------------------------------------------------
+FEATURE_STORE_DIR = os.path.join(PROJECT_ROOT, "data", "feature_store")
+# On-disk layout of X (see module docstring), recorded in meta.json
+LAYOUT = "columns"
+
+
+def _matrix_file(dtype) -> str:
+    return "X.npy" if np.dtype(dtype) != np.float32 else "X_float32.npy"
+
+
+def write_matrix(name: str, X: pd.DataFrame, y: pd.Series, store_dir: str = None, key: str = None) -> str:
+    """
+    Store X (column-major, its own dtype), a float32 copy when X is float64, and y
+    under store_dir/name, replacing any previous matrix of that name. Returns the entry directory.
+    key (e.g. from resample_key) is recorded in meta.json for stored_key().
+    """
+    store_dir = store_dir or FEATURE_STORE_DIR
+    os.makedirs(store_dir, exist_ok=True)
+    entry_dir = os.path.join(store_dir, name)
+    # Column-major: the (n_features, n_rows) C array is the block open_matrix hands to pandas
+    values = np.ascontiguousarray(X.to_numpy().T)
+    tmp_dir = tempfile.mkdtemp(dir=store_dir, prefix=".tmp-")
+    try:
+        np.save(os.path.join(tmp_dir, _matrix_file(values.dtype)), values)
+        dtypes = [values.dtype.name]
+        if values.dtype == np.float64:
+            np.save(os.path.join(tmp_dir, _matrix_file(np.float32)), values.astype(np.float32))
+            dtypes.append("float32")
+        np.save(os.path.join(tmp_dir, "y.npy"), np.asarray(y))
+        meta = {
+            "feature_columns": list(X.columns),
+            "n_rows": len(X),
+            "dtypes": dtypes,
+            "layout": LAYOUT,
+            "key": key,
+        }
+        with open(os.path.join(tmp_dir, "meta.json"), "w") as f:
+            json.dump(meta, f, indent=2)
+        shutil.rmtree(entry_dir, ignore_errors=True)
+        os.replace(tmp_dir, entry_dir)
+    except OSError:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+    return entry_dir
+
+
+def _read_meta(name: str, store_dir: str = None) -> dict:
+    meta_path = os.path.join(store_dir or FEATURE_STORE_DIR, name, "meta.json")
+    if not os.path.exists(meta_path):
+        return None
+    with open(meta_path) as f:
+        return json.load(f)
+
+
+def stored_key(name: str, store_dir: str = None) -> str:
+    """Key the matrix called name was written with (None if absent or written without one)."""
+    meta = _read_meta(name, store_dir)
+    return meta.get("key") if meta else None
+
+
+def open_matrix(name: str, store_dir: str = None, dtype=None) -> Tuple[pd.DataFrame, pd.Series]:
+    """
+    Open a stored matrix as (X, y) without reading it into memory.
+    X wraps a read-only memmap (no copy; safe to pass to joblib/loky workers);
+    dtype=np.float32 opens the float32 copy.
+    """
+    entry_dir = os.path.join(store_dir or FEATURE_STORE_DIR, name)
+    meta = _read_meta(name, store_dir)
+    if meta is None:
+        raise FileNotFoundError(f"Feature store entry not found: {entry_dir}")
+    if dtype is not None and np.dtype(dtype).name not in meta["dtypes"]:
+        raise ValueError(f"No {np.dtype(dtype).name} matrix stored for '{name}' (have {meta['dtypes']})")
+    X = np.load(os.path.join(entry_dir, _matrix_file(dtype or meta["dtypes"][0])), mmap_mode="r")
+    if meta.get("layout") == LAYOUT:
+        X = X.T
+    y = np.load(os.path.join(entry_dir, "y.npy"), mmap_mode="r")
+    return (
+        pd.DataFrame(X, columns=meta["feature_columns"], copy=False),
+        pd.Series(y, name=TARGET_COLUMN, copy=False),
+    )
+
+
+# ---------------------------------------------------------------------------
+# Resampled training sets
+# ---------------------------------------------------------------------------
+def resample_key(X: pd.DataFrame, y: pd.Series, sampler) -> str:
+    """
+    SHA-256 of everything that determines sampler.fit_resample(X, y): the bytes,
+    dtype, shape and columns of X, the labels, the sampler class and parameters,
+    and the imbalanced-learn / scikit-learn versions (the k-NN search).
+    """
+    import sklearn
+    import imblearn
+
+    values = np.ascontiguousarray(X.to_numpy())
+    labels = np.ascontiguousarray(np.asarray(y))
+    header = {
+        "columns": list(X.columns),
+        "X": [values.dtype.str, list(values.shape)],
+        "y": [labels.dtype.str, list(labels.shape)],
+        "sampler": type(sampler).__name__,
+        "params": sampler.get_params(),
+        "versions": [imblearn.__version__, sklearn.__version__],
+    }
+    h = hashlib.sha256(json.dumps(header, sort_keys=True, default=repr).encode("utf-8"))
+    h.update(memoryview(values).cast("B"))
+    h.update(memoryview(labels).cast("B"))
+    return h.hexdigest()
+
+
+def fit_resample_cached(sampler, X: pd.DataFrame, y: pd.Series, name: str, store_dir: str = None) -> Tuple[pd.DataFrame, pd.Series]:
+    """
+    sampler.fit_resample(X, y), stored under name and returned memory-mapped (as open_matrix).
+    If the stored matrix was written for the same resample_key, resampling is skipped.
+    """
+    key = resample_key(X, y, sampler)
+    if stored_key(name, store_dir) == key:
+        print(f"  Reusing resampled training set from the feature store ({key[:12]})")
+    else:
+        X_resampled, y_resampled = sampler.fit_resample(X, y)
+        write_matrix(name, X_resampled, y_resampled, store_dir, key=key)
+    return open_matrix(name, store_dir)
@@ -0,0 +1,305 @@
+"""
+Customer Churn Prediction - Incremental Preprocessing
+=====================================================
+Fold daily delta files into a persisted feature store instead of
+re-running preprocess() over the whole history.
+
+The store (default data/processed/incremental/) holds:
+- stats-NNNNN.joblib: the running StreamingStats (scaler moments merged the
+  way StandardScaler.partial_fit does, mergeable value counts or KLL
+  sketches for the TotalCharges median and the MonthlyCharges cut points,
+  and the category vocabularies)
+- part-NNNNN/: one segment per delta. X.npy holds the features that do not
+  depend on the statistics (binary, passthrough and one-hot columns except
+  monthly_charges_bucket_*), raw.npy the unscaled tenure, MonthlyCharges
+  and TotalCharges (missing values kept as NaN), y.npy the target.
+- store.json: the segments in order, the SHA-256 and row count of every
+  applied delta (applying the same file twice is a no-op) and the current
+  statistics file.
+- feature_pipeline.joblib: the pipeline of the current statistics, for
+  encoding new rows like the store. models/feature_pipeline.joblib is never
+  touched: the saved models were trained with it, and only train.py replaces it.
+
+update_store() reads only the delta: it updates the statistics, encodes the
+new rows and appends them as a new segment. The numeric columns and the
+monthly charge buckets are computed by load_incremental_matrix() from the
+stored raw values with the current statistics, so every segment is encoded
+exactly like preprocessing the full history at once; no segment is ever
+re-encoded.
+
+The first delta fixes the category vocabularies, and with them the one-hot
+columns. A category first seen in a later delta is ignored the way
+ChurnFeaturePipeline.transform ignores unknown levels: its rows get all-zero
+one-hots for that column, the levels are listed in the segment's
+unseen_levels, and a warning is printed. Only then does the store differ from
+preprocessing the full history, which would add a column per new level;
+rebuild the store from the full history to get them.
+
+Each delta is committed by one atomic rewrite of store.json: the segment and
+the new statistics file are written first under new names, so an interrupted
+run leaves only unreferenced files, which the next run overwrites.
+
+Run from project root: python src/incremental.py data/deltas/2024-06-01.csv [more deltas ...]
+"""
+
+import os
+import sys
+import json
+import shutil
+import argparse
+import joblib
+import numpy as np
+import pandas as pd
+from typing import Tuple
+
+# Ensure project root is on path so "from src.preprocessing" works when running python src/incremental.py
+_PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, _PROJECT_ROOT)
+from src.preprocessing import ChurnFeaturePipeline, NUMERICAL_COLUMNS, TARGET_COLUMN
+from src.streaming import StreamingStats, iter_clean_chunks, CHUNK_SIZE, PROCESSED_DIR
+from src.cache import file_sha256
+
+# ---------------------------------------------------------------------------
+# Config
+# ---------------------------------------------------------------------------
+INCREMENTAL_DIR = os.path.join(PROCESSED_DIR, "incremental")
+STORE_FILE = "store.json"
+PIPELINE_FILE = "feature_pipeline.joblib"
+# Unscaled inputs of the statistics-dependent features, stored per segment
+RAW_COLUMNS = ["tenure", "MonthlyCharges", "TotalCharges"]
+
+
+def _read_json(path: str, default):
+    if not os.path.exists(path):
+        return default
+    with open(path) as f:
+        return json.load(f)
+
+
+def _write_json(path: str, obj) -> None:
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(obj, f, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def _read_store(store_dir: str) -> dict:
+    return _read_json(
+        os.path.join(store_dir, STORE_FILE),
+        {"feature_columns": None, "stored_columns": None, "n_rows": 0, "stats": None, "segments": []},
+    )
+
+
+def statistics_columns(pipeline: ChurnFeaturePipeline) -> list:
+    """Output columns whose values depend on the fitted statistics (scaled numerics, charge buckets)."""
+    return [
+        c for c in pipeline.feature_columns_
+        if c in NUMERICAL_COLUMNS or c.startswith("monthly_charges_bucket_")
+    ]
+
+
+def load_stats(store_dir: str = None) -> StreamingStats:
+    """Running statistics of the store, or None if the store is empty."""
+    store_dir = store_dir or INCREMENTAL_DIR
+    store = _read_store(store_dir)
+    return joblib.load(os.path.join(store_dir, store["stats"])) if store["stats"] else None
+
+
+# ---------------------------------------------------------------------------
+# Apply one delta
+# ---------------------------------------------------------------------------
+def _write_segment(pipeline: ChurnFeaturePipeline, stored_columns: list, n_rows: int, delta_path: str,
+                   segment_dir: str, chunksize: int) -> bool:
+    """Encode the delta's statistics-independent columns and keep its raw inputs. Returns whether y was written."""
+    shutil.rmtree(segment_dir, ignore_errors=True)
+    os.makedirs(segment_dir)
+    stored = pipeline.select_features(stored_columns)
+    X_out = np.lib.format.open_memmap(
+        os.path.join(segment_dir, "X.npy"), mode="w+", dtype=np.float64, shape=(n_rows, len(stored_columns))
+    )
+    raw_out = np.lib.format.open_memmap(
+        os.path.join(segment_dir, "raw.npy"), mode="w+", dtype=np.float64, shape=(n_rows, len(RAW_COLUMNS))
+    )
+    y_out = None
+    start = 0
+    for chunk in iter_clean_chunks(delta_path, chunksize):
+        stop = start + len(chunk)
+        X_out[start:stop] = stored.transform(chunk).to_numpy()
+        raw_out[start:stop] = chunk[RAW_COLUMNS].to_numpy(dtype=np.float64)
+        if TARGET_COLUMN in chunk.columns:
+            if y_out is None:
+                y_out = np.lib.format.open_memmap(
+                    os.path.join(segment_dir, "y.npy"), mode="w+", dtype=np.int64, shape=(n_rows,)
+                )
+            y_out[start:stop] = (chunk[TARGET_COLUMN] == "Yes").to_numpy()
+        start = stop
+    if start != n_rows:
+        raise RuntimeError(f"Row count changed between passes ({n_rows} -> {start})")
+    for out in (X_out, raw_out, y_out):
+        if out is not None:
+            out.flush()
+    return y_out is not None
+
+
+def apply_delta(
+    delta_path: str,
+    store_dir: str = None,
+    chunksize: int = CHUNK_SIZE,
+    quantiles: str = "exact",
+) -> Tuple[dict, ChurnFeaturePipeline]:
+    """
+    Fold one delta CSV into the store. Returns (the store.json manifest, updated pipeline).
+    The first delta initializes the store (quantiles is only used then) and its categories
+    fix the one-hot layout; later categories are ignored (see module docstring).
+    """
+    store_dir = store_dir or INCREMENTAL_DIR
+    os.makedirs(store_dir, exist_ok=True)
+    store = _read_store(store_dir)
+    stats = load_stats(store_dir) or StreamingStats(quantiles)
+
+    if not os.path.exists(delta_path):
+        raise FileNotFoundError(f"Dataset not found: {delta_path}")
+    sha = file_sha256(delta_path)
+    if any(s["sha256"] == sha for s in store["segments"]):
+        print(f"  {delta_path}: already applied, skipping")
+        return store, stats.to_pipeline()
+
+    # The first delta fixes the category vocabularies, and with them the one-hot layout
+    vocabularies = {col: set(v) for col, v in stats.vocabularies.items()} if store["segments"] else None
+    n_before = stats.n_rows
+    for chunk in iter_clean_chunks(delta_path, chunksize):
+        stats.update(chunk)
+    n_delta = stats.n_rows - n_before
+    if n_delta == 0:
+        raise ValueError(f"Delta has no rows: {delta_path}")
+    unseen_levels = {}
+    if vocabularies is not None:
+        for col, vocab in vocabularies.items():
+            if stats.vocabularies.get(col, set()) - vocab:
+                unseen_levels[col] = sorted(stats.vocabularies[col] - vocab)
+        stats.vocabularies = vocabularies
+    if unseen_levels:
+        print(f"  {delta_path}: categories not in the store's layout, encoded as all-zero one-hots "
+              f"(rebuild the store from the full history to add them): {unseen_levels}")
+    pipeline = stats.to_pipeline()
+
+    # Segment and statistics go to new names; rewriting store.json commits both at once
+    index = len(store["segments"])
+    part_name = f"part-{index:05d}"
+    stats_name = f"stats-{index:05d}.joblib"
+    dynamic = set(statistics_columns(pipeline))
+    stored_columns = [c for c in pipeline.feature_columns_ if c not in dynamic]
+    has_target = _write_segment(
+        pipeline, stored_columns, n_delta, delta_path, os.path.join(store_dir, part_name), chunksize
+    )
+    joblib.dump(stats, os.path.join(store_dir, stats_name))
+
+    previous_stats = store["stats"]
+    store["feature_columns"] = pipeline.feature_columns_
+    store["stored_columns"] = stored_columns
+    store["n_rows"] += n_delta
+    store["stats"] = stats_name
+    store["pipeline_fingerprint"] = pipeline.fingerprint()
+    store["segments"].append({
+        "source": delta_path,
+        "sha256": sha,
+        "dir": part_name,
+        "n_rows": n_delta,
+        "has_target": has_target,
+        "unseen_levels": unseen_levels,
+    })
+    _write_json(os.path.join(store_dir, STORE_FILE), store)
+    if previous_stats:
+        os.remove(os.path.join(store_dir, previous_stats))
+    print(f"  {delta_path}: {n_delta} rows -> {part_name} ({store['n_rows']} rows in store)")
+    return store, pipeline
+
+
+def update_store(
+    delta_paths,
+    store_dir: str = None,
+    chunksize: int = CHUNK_SIZE,
+    quantiles: str = "exact",
+) -> Tuple[dict, ChurnFeaturePipeline]:
+    """
+    Apply delta CSVs in order. Returns (the store.json manifest, updated pipeline).
+    The pipeline is saved to store_dir/feature_pipeline.joblib, not to models/.
+    """
+    if isinstance(delta_paths, str):
+        delta_paths = [delta_paths]
+    store_dir = store_dir or INCREMENTAL_DIR
+    print(f"Applying {len(delta_paths)} delta(s) to {store_dir}...")
+    manifest, pipeline = None, None
+    for path in delta_paths:
+        manifest, pipeline = apply_delta(path, store_dir, chunksize, quantiles)
+    if pipeline is not None:
+        print(f"Feature pipeline saved to {save_store_pipeline(pipeline, store_dir)}")
+    return manifest, pipeline
+
+
+def save_store_pipeline(pipeline: ChurnFeaturePipeline, store_dir: str = None) -> str:
+    """Replace store_dir/feature_pipeline.joblib atomically. Returns its path."""
+    path = os.path.join(store_dir or INCREMENTAL_DIR, PIPELINE_FILE)
+    tmp_path = path + ".tmp"
+    pipeline.save(tmp_path)
+    os.replace(tmp_path, path)
+    return path
+
+
+def load_store_pipeline(store_dir: str = None) -> ChurnFeaturePipeline:
+    """The pipeline of the store's current statistics (see save_store_pipeline)."""
+    return ChurnFeaturePipeline.load(os.path.join(store_dir or INCREMENTAL_DIR, PIPELINE_FILE))
+
+
+# ---------------------------------------------------------------------------
+# Read the store
+# ---------------------------------------------------------------------------
+def load_incremental_matrix(store_dir: str = None) -> Tuple[pd.DataFrame, pd.Series]:
+    """
+    The store as (X, y), in segment order, encoded with the current statistics:
+    the stored columns are copied and the numeric and bucket columns computed from raw.npy.
+    y is None unless every segment has the target.
+    """
+    store_dir = store_dir or INCREMENTAL_DIR
+    store = _read_store(store_dir)
+    if not store["segments"]:
+        raise FileNotFoundError(f"Incremental store is empty: {store_dir}. Run src/incremental.py first.")
+    pipeline = load_stats(store_dir).to_pipeline()
+    col_index = {c: j for j, c in enumerate(store["feature_columns"])}
+    stored_idx = [col_index[c] for c in store["stored_columns"]]
+    dynamic_columns = statistics_columns(pipeline)
+    dynamic_idx = [col_index[c] for c in dynamic_columns]
+    dynamic = pipeline.select_features(dynamic_columns)
+
+    X = np.empty((store["n_rows"], len(col_index)), dtype=np.float64)
+    ys = []
+    start = 0
+    for segment in store["segments"]:
+        segment_dir = os.path.join(store_dir, segment["dir"])
+        stop = start + segment["n_rows"]
+        X[start:stop, stored_idx] = np.load(os.path.join(segment_dir, "X.npy"), mmap_mode="r")
+        raw = pd.DataFrame(np.load(os.path.join(segment_dir, "raw.npy")), columns=RAW_COLUMNS)
+        X[start:stop, dynamic_idx] = dynamic.transform(raw).to_numpy()
+        if segment["has_target"]:
+            ys.append(np.load(os.path.join(segment_dir, "y.npy")))
+        start = stop
+    y = pd.Series(np.concatenate(ys), name=TARGET_COLUMN) if len(ys) == len(store["segments"]) else None
+    return pd.DataFrame(X, columns=store["feature_columns"], copy=False), y
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Fold delta CSVs into the incremental feature store.",
+        epilog="The first delta fixes the category columns; categories first seen later are "
+               "encoded as all-zero one-hots (listed in store.json as unseen_levels).",
+    )
+    parser.add_argument("delta_paths", nargs="+", help="Delta CSVs, applied in the given order")
+    parser.add_argument("--store-dir", default=None, help="Feature store directory (default: data/processed/incremental)")
+    parser.add_argument("--chunksize", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--quantiles", choices=["exact", "sketch"], default="exact",
+                        help="Estimator for a new store (ignored once it exists)")
+    args = parser.parse_args()
+    update_store(args.delta_paths, args.store_dir, args.chunksize, quantiles=args.quantiles)
@@ -0,0 +1,197 @@
+"""
+Customer Churn Prediction - Stage Instrumentation
+=================================================
+Per-stage wall time, CPU time, peak RSS and rows/sec for preprocess().
+
+Stages are marked in the code with `with stage("name", rows=n) as s:` (set
+s.rows inside the block when the row count is only known afterwards). They
+are no-ops (one ContextVar lookup) unless a StageProfiler is active:
+
+    profiler = StageProfiler()
+    with profiler:
+        df, pipeline = preprocess()
+    print(profiler.to_json())
+    profiler.log_to_mlflow()  # optional
+
+Nested stages are recorded as "parent/child". Peak RSS is measured per stage
+on Linux by resetting the kernel's high-water mark (/proc/self/clear_refs);
+elsewhere it falls back to getrusage(), which only sees new process-wide peaks.
+"""
+
+import os
+import sys
+import json
+import time
+import resource
+import contextvars
+
+_active_profiler = contextvars.ContextVar("active_profiler", default=None)
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+# ---------------------------------------------------------------------------
+# Memory probes
+# ---------------------------------------------------------------------------
+def current_rss() -> int:
+    """Resident set size in bytes (0 if unavailable)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except OSError:
+        return 0
+
+
+def _read_hwm() -> int:
+    """Peak RSS (bytes) since the last reset."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * (1 if sys.platform == "darwin" else 1024)
+
+
+def _reset_hwm() -> bool:
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+# ---------------------------------------------------------------------------
+# Profiler
+# ---------------------------------------------------------------------------
+class _NullStage:
+    """Stage used when no profiler is active; `rows` may still be assigned."""
+
+    rows = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+class _Stage:
+    def __init__(self, profiler: "StageProfiler", name: str, rows: int = None):
+        self.profiler = profiler
+        self.name = name
+        self.rows = rows
+        self.peak = 0
+
+    def __enter__(self):
+        profiler = self.profiler
+        # The reset below discards the running peak, so credit it to the enclosing stage first
+        profiler._note_peak(_read_hwm())
+        self.path = "/".join([s.name for s in profiler._stack] + [self.name])
+        profiler._stack.append(self)
+        self.rss_start = current_rss()
+        profiler.per_stage_peak = _reset_hwm()
+        self.cpu_start = time.process_time()
+        self.wall_start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        wall = time.perf_counter() - self.wall_start
+        cpu = time.process_time() - self.cpu_start
+        profiler = self.profiler
+        self.peak = max(self.peak, _read_hwm())
+        profiler._stack.pop()
+        profiler._note_peak(self.peak)
+        profiler.stages.append({
+            "stage": self.path,
+            "wall_seconds": round(wall, 6),
+            "cpu_seconds": round(cpu, 6),
+            "peak_rss_delta_mb": round(max(self.peak - self.rss_start, 0) / 1e6, 3),
+            "rss_end_mb": round(current_rss() / 1e6, 3),
+            "rows": self.rows,
+            "rows_per_second": round(self.rows / wall, 1) if self.rows and wall > 0 else None,
+        })
+        return False
+
+
+class StageProfiler:
+    """Collects one record per stage while active (use as a context manager)."""
+
+    def __init__(self):
+        self.stages = []
+        self.per_stage_peak = False
+        self._stack = []
+        self._token = None
+
+    def __enter__(self):
+        self._token = _active_profiler.set(self)
+        return self
+
+    def __exit__(self, *exc):
+        _active_profiler.reset(self._token)
+        self._token = None
+        return False
+
+    def _note_peak(self, peak: int) -> None:
+        if self._stack:
+            self._stack[-1].peak = max(self._stack[-1].peak, peak)
+
+    def report(self) -> dict:
+        """Stages in completion order (children before their parent), plus totals of the top-level stages."""
+        top = [s for s in self.stages if "/" not in s["stage"]]
+        return {
+            "stages": self.stages,
+            "total_wall_seconds": round(sum(s["wall_seconds"] for s in top), 6),
+            "total_cpu_seconds": round(sum(s["cpu_seconds"] for s in top), 6),
+            "peak_rss_method": "per-stage (VmHWM reset)" if self.per_stage_peak else "process-wide (getrusage)",
+        }
+
+    def to_json(self, path: str = None) -> str:
+        """Report as JSON; also written to path when given."""
+        text = json.dumps(self.report(), indent=2)
+        if path:
+            with open(path, "w") as f:
+                f.write(text)
+        return text
+
+    def mlflow_metrics(self) -> dict:
+        """Every stage's numbers as flat MLflow metric names (stage names with "/" become ".")."""
+        metrics = {}
+        for s in self.stages:
+            key = s["stage"].replace("/", ".")
+            metrics[f"{key}.wall_seconds"] = s["wall_seconds"]
+            metrics[f"{key}.cpu_seconds"] = s["cpu_seconds"]
+            metrics[f"{key}.peak_rss_delta_mb"] = s["peak_rss_delta_mb"]
+            if s["rows_per_second"] is not None:
+                metrics[f"{key}.rows_per_second"] = s["rows_per_second"]
+        return metrics
+
+    def log_to_mlflow(self, run_name: str = "preprocessing_profile") -> None:
+        """
+        Log mlflow_metrics() in one batch, plus the JSON report as an artifact.
+        Uses the active run or starts one.
+        """
+        import mlflow
+
+        def log():
+            mlflow.log_metrics(self.mlflow_metrics())
+            mlflow.log_dict(self.report(), "preprocessing_profile.json")
+
+        if mlflow.active_run() is not None:
+            log()
+        else:
+            with mlflow.start_run(run_name=run_name):
+                log()
+
+
+def stage(name: str, rows: int = None):
+    """Context manager timing one stage under the active StageProfiler (no-op when none is active)."""
+    profiler = _active_profiler.get()
+    if profiler is None:
+        return _NULL_STAGE
+    return _Stage(profiler, name, rows)
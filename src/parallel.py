@@ -0,0 +1,177 @@
+"""
+Customer Churn Prediction - Parallel Partition Preprocessing
+============================================================
+Multi-process version of preprocess() for extracts that arrive as many
+partition files (e.g. data/extract/part-*.csv).
+
+Pass 1: each worker collects StreamingStats for one partition; only the
+        small mergeable statistics come back to the parent, which merges
+        them (in partition order) into one globally fitted pipeline.
+Pass 2: each worker transforms one partition with that pipeline and writes
+        output_dir/part-NNNNN/X.npy (+ y.npy) itself. Only the paths and row
+        counts are returned, so no DataFrame is pickled between processes.
+
+output_dir/partitions.json lists the parts in order; load_partitioned_matrix()
+reads them back. Each partition is read in chunks, so memory per worker is
+bounded by the chunk size.
+
+Run from project root: python src/parallel.py "data/extract/part-*.csv" --output-dir data/processed --workers 8
+"""
+
+import os
+import sys
+import glob
+import json
+import argparse
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Tuple
+
+# Ensure project root is on path so "from src.preprocessing" works when running python src/parallel.py
+_PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, _PROJECT_ROOT)
+from src.preprocessing import ChurnFeaturePipeline, TARGET_COLUMN
+from src.streaming import (
+    StreamingStats,
+    collect_stats,
+    transform_to_disk,
+    load_feature_matrix,
+    CHUNK_SIZE,
+    PROCESSED_DIR,
+)
+
+# ---------------------------------------------------------------------------
+# Config
+# ---------------------------------------------------------------------------
+PARTITIONS_FILE = "partitions.json"
+
+# Fitted pipeline in each worker process, installed once by the pool initializer
+_worker_pipeline = None
+
+
+def resolve_partitions(inputs) -> List[str]:
+    """Expand a directory, glob pattern or list of paths into a sorted list of CSV partitions."""
+    if isinstance(inputs, str):
+        inputs = [inputs]
+    paths = []
+    for item in inputs:
+        if os.path.isdir(item):
+            paths.extend(sorted(glob.glob(os.path.join(item, "*.csv"))))
+        elif glob.has_magic(item):
+            paths.extend(sorted(glob.glob(item)))
+        else:
+            paths.append(item)
+    if not paths:
+        raise FileNotFoundError(f"No CSV partitions found for {inputs}")
+    for path in paths:
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"Dataset not found: {path}")
+    return paths
+
+
+# ---------------------------------------------------------------------------
+# Worker tasks (module level so they pickle by reference)
+# ---------------------------------------------------------------------------
+def _collect_partition_stats(args) -> StreamingStats:
+    path, chunksize, quantiles = args
+    return collect_stats(path, chunksize, quantiles)
+
+
+def _init_transform_worker(pipeline: ChurnFeaturePipeline) -> None:
+    global _worker_pipeline
+    _worker_pipeline = pipeline
+
+
+def _transform_partition(args) -> dict:
+    path, n_rows, part_dir, chunksize = args
+    paths = transform_to_disk(_worker_pipeline, n_rows, path, part_dir, chunksize)
+    return {"source": path, "dir": part_dir, "n_rows": n_rows, "has_target": "y" in paths}
+
+
+# ---------------------------------------------------------------------------
+# Parallel preprocess
+# ---------------------------------------------------------------------------
+def preprocess_parallel(
+    inputs,
+    output_dir: str = None,
+    workers: int = None,
+    chunksize: int = CHUNK_SIZE,
+    save_pipeline: bool = False,
+    quantiles: str = "exact",
+) -> Tuple[dict, ChurnFeaturePipeline]:
+    """
+    Preprocess CSV partitions on a process pool, one partition per task.
+    inputs: directory, glob pattern or list of CSV paths.
+    Returns (the partitions.json manifest as a dict, fitted pipeline).
+    save_pipeline=True also overwrites models/feature_pipeline.joblib, which the saved
+    models were trained with; leave it off unless the models are retrained on this output.
+    """
+    partitions = resolve_partitions(inputs)
+    output_dir = output_dir or PROCESSED_DIR
+    os.makedirs(output_dir, exist_ok=True)
+    workers = min(workers or os.cpu_count() or 1, len(partitions))
+
+    print(f"Pass 1/2: collecting statistics over {len(partitions)} partitions ({workers} workers)...")
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        part_stats = list(pool.map(_collect_partition_stats, [(p, chunksize, quantiles) for p in partitions]))
+    stats = StreamingStats(quantiles)
+    for s in part_stats:
+        stats.merge(s)
+    pipeline = stats.to_pipeline()
+    print(f"  {stats.n_rows} rows, {len(pipeline.feature_columns_)} features")
+    if save_pipeline:
+        path = pipeline.save()
+        print(f"Feature pipeline saved to {path}")
+
+    print("Pass 2/2: transforming partitions to disk...")
+    tasks = [
+        (path, s.n_rows, os.path.join(output_dir, f"part-{i:05d}"), chunksize)
+        for i, (path, s) in enumerate(zip(partitions, part_stats))
+    ]
+    # The pipeline is sent once per worker, not once per task
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_transform_worker, initargs=(pipeline,)) as pool:
+        parts = list(pool.map(_transform_partition, tasks))
+
+    manifest = {
+        "feature_columns": pipeline.feature_columns_,
+        "n_rows": stats.n_rows,
+        "partitions": [dict(p, dir=os.path.relpath(p["dir"], output_dir)) for p in parts],
+    }
+    with open(os.path.join(output_dir, PARTITIONS_FILE), "w") as f:
+        json.dump(manifest, f, indent=2)
+    print(f"  {len(parts)} partitions written to {output_dir}")
+    return manifest, pipeline
+
+
+def load_partitioned_matrix(output_dir: str = None) -> Tuple[pd.DataFrame, pd.Series]:
+    """Concatenate the partitions written by preprocess_parallel into (X, y), in partition order."""
+    output_dir = output_dir or PROCESSED_DIR
+    manifest_path = os.path.join(output_dir, PARTITIONS_FILE)
+    if not os.path.exists(manifest_path):
+        raise FileNotFoundError(f"Partition manifest not found: {manifest_path}. Run src/parallel.py first.")
+    with open(manifest_path) as f:
+        manifest = json.load(f)
+    parts = [load_feature_matrix(os.path.join(output_dir, p["dir"])) for p in manifest["partitions"]]
+    X = pd.DataFrame(np.concatenate([x.to_numpy() for x, _ in parts]), columns=manifest["feature_columns"], copy=False)
+    y = None
+    if all(p["has_target"] for p in manifest["partitions"]):
+        y = pd.Series(np.concatenate([y.to_numpy() for _, y in parts]), name=TARGET_COLUMN)
+    return X, y
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Parallel preprocessing of partitioned CSV extracts.")
+    parser.add_argument("inputs", nargs="+", help="Partition CSVs, a directory or a glob pattern")
+    parser.add_argument("--output-dir", default=None, help="Output directory (default: data/processed)")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--chunksize", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--quantiles", choices=["exact", "sketch"], default="exact")
+    parser.add_argument("--save-pipeline", action="store_true",
+                        help="Overwrite models/feature_pipeline.joblib (only before retraining the models)")
+    args = parser.parse_args()
+    preprocess_parallel(
+        args.inputs, args.output_dir, args.workers, args.chunksize,
+        save_pipeline=args.save_pipeline, quantiles=args.quantiles,
+    )
@@ -0,0 +1,293 @@
+"""
+Customer Churn Prediction - Polars Backend
+==========================================
+Optional Polars execution of preprocess(): the same clean -> engineer ->
+encode -> scale steps expressed as lazy, multi-threaded query plans.
+
+- The CSV is scanned once; the row-local cleaning is one lazy plan.
+- fit_pipeline() computes the medians, quantile order statistics and
+  vocabularies in one aggregation plan. The scaler is fitted by
+  StandardScaler on the four numeric columns, so mean_/scale_ are the same
+  floats as on the pandas path.
+- transform() builds one select() with an expression per output column
+  (binary flags, one-hots, tenure/monthly buckets, centred numerics) in
+  feature_columns_ order. The final division by the scaler's scale_ runs
+  in numpy on the collected columns: Polars turns division by a scalar
+  into multiplication by its reciprocal, which is off by one ULP for some
+  values.
+
+The result is bit-identical to the pandas backend (see parity_check()).
+Select it with preprocess(..., backend="polars"). Requires polars
+(pip install polars).
+
+Run from project root:
+  python src/polars_backend.py --parity [csv_path]
+  python src/polars_backend.py --benchmark big.csv [more.csv ...]
+"""
+
+import os
+import sys
+import json
+import time
+import importlib.util
+import numpy as np
+import pandas as pd
+from sklearn.preprocessing import StandardScaler
+from typing import Tuple
+
+# Ensure project root is on path so "from src.preprocessing" works when running python src/polars_backend.py
+_PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, _PROJECT_ROOT)
+from src.sketch import KLLSketch
+from src.preprocessing import (
+    ChurnFeaturePipeline,
+    DATA_PATH,
+    ID_COLUMN,
+    TARGET_COLUMN,
+    BINARY_COLUMNS,
+    CATEGORICAL_COLUMNS,
+    NUMERICAL_COLUMNS,
+    TENURE_BINS,
+    csv_columns_for,
+)
+
+if importlib.util.find_spec("polars") is not None:
+    import polars as pl
+else:
+    pl = None
+
+
+def _require_polars() -> None:
+    if pl is None:
+        raise ImportError("backend='polars' requires polars (pip install polars)")
+
+
+# ---------------------------------------------------------------------------
+# Clean (lazy)
+# ---------------------------------------------------------------------------
+def scan_clean(data_path: str = None, usecols: list = None) -> "pl.LazyFrame":
+    """
+    Lazy equivalent of load_and_clean_data up to the median fill:
+    drop customerID, TotalCharges to Float64 (invalid -> null).
+    usecols projects the scan, so the other columns are never parsed.
+    """
+    _require_polars()
+    path = data_path or DATA_PATH
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Dataset not found: {path}")
+    lf = pl.scan_csv(path, schema_overrides={"TotalCharges": pl.Utf8, "MonthlyCharges": pl.Float64})
+    columns = lf.collect_schema().names()
+    lf = lf.drop([c for c in columns if c == ID_COLUMN]) if usecols is None else lf.select(usecols)
+    # Like pd.to_numeric(errors="coerce"): surrounding spaces are ignored, anything else invalid is null
+    cleaning = []
+    if usecols is None or "TotalCharges" in usecols:
+        cleaning.append(pl.col("TotalCharges").str.strip_chars().cast(pl.Float64, strict=False))
+    if usecols is None or "MonthlyCharges" in usecols:
+        cleaning.append(pl.col("MonthlyCharges").fill_nan(None))
+    return lf.with_columns(cleaning)
+
+
+# ---------------------------------------------------------------------------
+# Fit
+# ---------------------------------------------------------------------------
+def _lerp_quantile(lower: float, higher: float, q: float, n: int) -> float:
+    """numpy's "linear" quantile from the two neighbouring order statistics (pandas' default)."""
+    t = (n - 1) * q - np.floor((n - 1) * q)
+    diff = higher - lower
+    return float(higher - diff * (1 - t) if t >= 0.5 else lower + diff * t)
+
+
+def fit_pipeline(frame: "pl.DataFrame") -> ChurnFeaturePipeline:
+    """Learn the same statistics as ChurnFeaturePipeline.fit from a cleaned Polars frame."""
+    _require_polars()
+    for col in ("tenure", "MonthlyCharges", "TotalCharges"):
+        if col not in frame.columns:
+            raise ValueError(f"Required column '{col}' not found")
+    raw_categorical = [c for c in CATEGORICAL_COLUMNS if c in frame.columns]
+    monthly = pl.col("MonthlyCharges")
+    stats = frame.lazy().select(
+        pl.col("TotalCharges").median().alias("median"),
+        monthly.count().alias("n_monthly"),
+        *[
+            monthly.quantile(q, interpolation=how).alias(f"q{int(q * 100)}_{how}")
+            for q in (0.33, 0.66) for how in ("lower", "higher")
+        ],
+        *[pl.col(c).drop_nulls().unique().sort().implode().alias(c) for c in raw_categorical],
+    ).collect().row(0, named=True)
+
+    pipeline = ChurnFeaturePipeline()
+    pipeline.total_charges_median_ = float(stats["median"])
+    n = stats["n_monthly"]
+    pipeline.q33_ = _lerp_quantile(stats["q33_lower"], stats["q33_higher"], 0.33, n)
+    pipeline.q66_ = _lerp_quantile(stats["q66_lower"], stats["q66_higher"], 0.66, n)
+    pipeline.monthly_charges_sketch_ = KLLSketch.from_values(frame["MonthlyCharges"].to_numpy())
+    pipeline.set_layout(frame.columns, {c: stats[c] for c in raw_categorical})
+
+    # Same column-major input as the pandas path, so mean_/scale_ match bit for bit
+    X_num = frame.lazy().select(
+        pl.col("tenure").cast(pl.Float64),
+        monthly,
+        pl.col("TotalCharges").fill_null(pipeline.total_charges_median_),
+        (pl.col("tenure").cast(pl.Float64) * monthly).alias("total_spend"),
+    ).collect().to_numpy(order="fortran")
+    pipeline.scaler_ = StandardScaler().fit(X_num)
+    return pipeline
+
+
+# ---------------------------------------------------------------------------
+# Transform
+# ---------------------------------------------------------------------------
+def feature_expressions(pipeline: ChurnFeaturePipeline, compact: bool = False) -> list:
+    """
+    One Polars expression per feature column, in feature_columns_ order.
+    Numeric columns come out centred (x - mean_) but not yet divided by scale_.
+    """
+    pipeline._check_fitted()
+    indicator_dtype = pl.UInt8 if compact else pl.Float64
+
+    def indicator(condition, name):
+        return condition.fill_null(False).cast(indicator_dtype).alias(name)
+
+    tenure = pl.col("tenure").cast(pl.Float64)
+    monthly = pl.col("MonthlyCharges")
+    raw = {
+        "tenure": tenure,
+        "MonthlyCharges": monthly,
+        "TotalCharges": pl.col("TotalCharges").fill_null(pipeline.total_charges_median_),
+        "total_spend": tenure * monthly,
+    }
+    exprs = {}
+    for k, col in enumerate(NUMERICAL_COLUMNS):
+        exprs[col] = (raw[col] - pipeline.scaler_.mean_[k]).alias(col)
+    for col in pipeline.passthrough_columns_:
+        if col in exprs:
+            continue
+        if col in BINARY_COLUMNS:
+            exprs[col] = indicator(pl.col(col) == "Yes", col)
+        else:
+            exprs[col] = pl.col(col).cast(indicator_dtype if compact else pl.Float64).alias(col)
+
+    for col, vocab in pipeline.vocabularies_.items():
+        for k, value in enumerate(vocab):
+            name = f"{col}_{value}"
+            if col == "tenure_group":
+                # Same bins as tenure_group_codes (left-closed; the last group is open-ended)
+                condition = tenure >= TENURE_BINS[k]
+                if k < len(vocab) - 1:
+                    condition = condition & (tenure < TENURE_BINS[k + 1])
+                condition = condition & tenure.is_not_nan()
+            elif col == "monthly_charges_bucket":
+                # Right-closed bins, like monthly_bucket_codes / pd.cut
+                edges = [-np.inf, pipeline.q33_, pipeline.q66_, np.inf]
+                condition = (monthly > edges[k]) & (monthly <= edges[k + 1])
+            else:
+                condition = pl.col(col) == value
+            exprs[name] = indicator(condition, name)
+    return [exprs[c] for c in pipeline.feature_columns_]
+
+
+def transform(pipeline: ChurnFeaturePipeline, frame: "pl.DataFrame", compact: bool = False) -> pd.DataFrame:
+    """Polars equivalent of ChurnFeaturePipeline.transform on a cleaned frame."""
+    _require_polars()
+    for col in pipeline.source_columns():
+        if col not in frame.columns:
+            raise ValueError(f"Column '{col}' not found")
+    encoded = frame.lazy().select(feature_expressions(pipeline, compact)).collect()
+    output_numeric = [(k, col) for k, col in enumerate(NUMERICAL_COLUMNS) if col in pipeline.feature_columns_]
+    if compact:
+        X = encoded.to_pandas()
+        for k, col in output_numeric:
+            X[col] = (X[col].to_numpy() / pipeline.scaler_.scale_[k]).astype(np.float32)
+        return X
+    out = encoded.to_numpy(order="fortran", writable=True)
+    for k, col in output_numeric:
+        out[:, pipeline.feature_columns_.index(col)] /= pipeline.scaler_.scale_[k]
+    return pd.DataFrame(out, columns=pipeline.feature_columns_, copy=False)
+
+
+def preprocess_polars(
+    data_path: str = None,
+    pipeline: ChurnFeaturePipeline = None,
+    save_pipeline: bool = None,
+    compact: bool = False,
+    columns: list = None,
+) -> Tuple[pd.DataFrame, ChurnFeaturePipeline]:
+    """
+    preprocess() on the Polars backend; same contract and the same (bit-identical) output.
+    Call it through preprocess(..., backend="polars").
+    """
+    if save_pipeline is None:
+        save_pipeline = columns is None
+    elif save_pipeline and columns is not None:
+        raise ValueError("save_pipeline=True cannot be combined with columns (the pipeline is pruned)")
+    usecols = None
+    if columns is not None:
+        if pipeline is not None:
+            pipeline = pipeline.select_features(columns)
+        usecols = csv_columns_for(columns, fitting=pipeline is None)
+    frame = scan_clean(data_path, usecols).collect()
+    if TARGET_COLUMN not in frame.columns:
+        raise ValueError("Target column 'Churn' not found")
+    if pipeline is None:
+        pipeline = fit_pipeline(frame)
+        if columns is not None:
+            pipeline = pipeline.select_features(columns)
+        if save_pipeline:
+            path = pipeline.save()
+            print(f"Feature pipeline saved to {path}")
+    out = transform(pipeline, frame, compact=compact)
+    target = (frame[TARGET_COLUMN] == "Yes").fill_null(False).to_numpy()
+    out[TARGET_COLUMN] = target.astype(np.int8 if compact else int)
+    return out, pipeline
+
+
+# ---------------------------------------------------------------------------
+# Parity check and benchmark
+# ---------------------------------------------------------------------------
+def parity_check(data_path: str = None) -> dict:
+    """Run both backends on data_path; raise AssertionError unless the outputs are bit-identical."""
+    from src.preprocessing import preprocess
+
+    df_pandas, pipe_pandas = preprocess(data_path, save_pipeline=False)
+    df_polars, pipe_polars = preprocess(data_path, save_pipeline=False, backend="polars")
+    assert pipe_polars.get_state() == pipe_pandas.get_state(), "fitted statistics differ"
+    assert list(df_polars.columns) == list(df_pandas.columns), "column order differs"
+    for col in df_pandas.columns:
+        a, b = df_pandas[col].to_numpy(), df_polars[col].to_numpy()
+        assert a.dtype == b.dtype and np.array_equal(a.view(np.uint8), b.view(np.uint8)), f"column {col} differs"
+
+    # Transform-only with a given pipeline must match too
+    df_given, _ = preprocess(data_path, pipeline=pipe_pandas, save_pipeline=False, backend="polars")
+    assert df_given.equals(df_pandas), "transform with a given pipeline differs"
+    return {"rows": len(df_pandas), "columns": df_pandas.shape[1], "identical": True}
+
+
+def benchmark(data_paths, repeats: int = 3) -> list:
+    """Best-of-repeats wall time of preprocess() on each backend, per CSV."""
+    from src.preprocessing import preprocess
+
+    results = []
+    for path in data_paths:
+        row = {"csv": path, "threads": pl.thread_pool_size()}
+        for backend in ("pandas", "polars"):
+            times = []
+            for _ in range(repeats):
+                start = time.perf_counter()
+                df, _ = preprocess(path, save_pipeline=False, backend=backend)
+                times.append(time.perf_counter() - start)
+            row["rows"] = len(df)
+            row[f"{backend}_seconds"] = round(min(times), 3)
+            del df
+        row["speedup"] = round(row["pandas_seconds"] / row["polars_seconds"], 2)
+        results.append(row)
+    return results
+
+
+if __name__ == "__main__":
+    _require_polars()
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    if "--benchmark" in sys.argv:
+        print(json.dumps(benchmark(args or [DATA_PATH]), indent=2))
+    else:
+        print(json.dumps(parity_check(args[0] if args else None), indent=2))
@@ -4,14 +4,33 @@ Customer Churn Prediction - Data Preprocessing
 Step 1: Data cleaning (load, fix types, encode, scale)
 Step 2: Feature engineering (tenure_group, monthly_charges_bucket, total_spend)
 The cleaned data is ready for model training in train.py
+
+preprocess() runs every step through ChurnFeaturePipeline: one fit pass learns
+all statistics, one transform pass writes the encoded matrix. The fitted pipeline
+is saved to models/feature_pipeline.joblib and reused by evaluate.py and the API.
+The step-by-step functions below are kept as the readable reference implementation.
 """
 
 import os
+import sys
+import copy
+import json
+import time
+import hashlib
+import importlib.util
 import pandas as pd
 import numpy as np
+from scipy import sparse
 from sklearn.preprocessing import StandardScaler
 import joblib
-from typing import Tuple
+from typing import NamedTuple, Tuple
+
+# Ensure project root is on path so "from src.sketch" works when running python src/preprocessing.py
+_PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, _PROJECT_ROOT)
+from src.sketch import KLLSketch
+from src.instrumentation import stage, StageProfiler
 
 
 # ---------------------------------------------------------------------------
@@ -20,44 +39,211 @@ from typing import Tuple
 PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 DATA_PATH = os.path.join(PROJECT_ROOT, "data", "churn.csv")
 MODELS_DIR = os.path.join(PROJECT_ROOT, "models")
+PIPELINE_PATH = os.path.join(MODELS_DIR, "feature_pipeline.joblib")
+MANIFEST_NAME = "training_manifest.json"
+MANIFEST_VERSION = 1
 
-
-def load_and_clean_data(data_path: str = None) -> pd.DataFrame:
+# ---------------------------------------------------------------------------
+# Column layout (shared by the step functions and ChurnFeaturePipeline)
+# ---------------------------------------------------------------------------
+ID_COLUMN = "customerID"
+TARGET_COLUMN = "Churn"
+BINARY_COLUMNS = [
+    "gender", "Partner", "Dependents", "PhoneService",
+    "PaperlessBilling",
+    "OnlineSecurity", "OnlineBackup", "DeviceProtection",
+    "TechSupport", "StreamingTV", "StreamingMovies",
+]
+CATEGORICAL_COLUMNS = [
+    "Contract",
+    "InternetService",
+    "PaymentMethod",
+    "MultipleLines",
+    "tenure_group",
+    "monthly_charges_bucket",
+]
+NUMERICAL_COLUMNS = ["tenure", "MonthlyCharges", "TotalCharges", "total_spend"]
+# Declared dtypes for the Telco CSV, used by load_and_clean_data(typed=True).
+# customerID is never parsed; TotalCharges is read as text (blank = missing)
+# and converted to float32 during cleaning.
+STRING_COLUMNS = BINARY_COLUMNS + ["MultipleLines", "InternetService", "Contract", "PaymentMethod", TARGET_COLUMN]
+TELCO_SCHEMA = {
+    **{col: "category" for col in STRING_COLUMNS},
+    "SeniorCitizen": "int8",
+    "tenure": "int16",
+    "MonthlyCharges": "float32",
+    "TotalCharges": "object",
+}
+TENURE_BINS = [0, 13, 25, 49, 61, np.inf]
+TENURE_LABELS = ["0-12", "13-24", "25-48", "49-60", "60+"]
+MONTHLY_BUCKET_LABELS = ["low", "medium", "high"]
+
+
+def load_and_clean_data(
+    data_path: str = None,
+    typed: bool = False,
+    engine: str = None,
+    usecols: list = None,
+) -> pd.DataFrame:
     """
     Step 1a: Load the CSV and do basic cleaning.
     - Drop customerID (identifier, not a feature)
     - Convert TotalCharges to numeric (handles spaces/invalid values)
     - Fill missing TotalCharges with median
+    typed=True parses with TELCO_SCHEMA (category strings, int8/int16 ints,
+    float32 charges) and skips customerID entirely. Note that float32 charges
+    change the scaled values slightly, so don't mix typed and untyped artifacts.
+    engine="pyarrow" uses the (optional) Arrow CSV parser.
+    usecols limits parsing to those columns (the others are never read).
     """
     path = data_path or DATA_PATH
     if not os.path.exists(path):
         raise FileNotFoundError(f"Dataset not found: {path}")
+    if engine == "pyarrow" and importlib.util.find_spec("pyarrow") is None:
+        raise ImportError("engine='pyarrow' requires pyarrow (pip install pyarrow)")
+
+    read_kwargs = {"engine": engine} if engine else {}
+    if usecols is not None:
+        read_kwargs["usecols"] = list(usecols)
+    if typed:
+        read_kwargs["dtype"] = {c: t for c, t in TELCO_SCHEMA.items() if usecols is None or c in usecols}
+        if usecols is None:
+            read_kwargs["usecols"] = lambda c: c != ID_COLUMN
+            if engine == "pyarrow":
+                # The Arrow parser only accepts a column list for usecols
+                header = pd.read_csv(path, nrows=0).columns
+                read_kwargs["usecols"] = [c for c in header if c != ID_COLUMN]
+    with stage("read_csv") as s:
+        df = pd.read_csv(path, **read_kwargs)
+        s.rows = len(df)
+    with stage("clean", rows=len(df)):
+        df = clean_raw_frame(df)
+
+        if "TotalCharges" in df.columns:
+            if typed:
+                df["TotalCharges"] = df["TotalCharges"].astype(np.float32)
+            median_total = df["TotalCharges"].median()
+            df["TotalCharges"] = df["TotalCharges"].fillna(median_total)
+
+    return df
+
 
-    df = pd.read_csv(path)
+def ingestion_report(data_path: str = None, engine: str = None) -> dict:
+    """
+    Compare the default (inferred dtypes) load with the typed load:
+    wall time and deep memory usage of the cleaned frame.
+    """
+    report = {}
+    for name, kwargs in [("default", {}), ("typed", {"typed": True, "engine": engine})]:
+        start = time.perf_counter()
+        df = load_and_clean_data(data_path, **kwargs)
+        report[name] = {
+            "seconds": round(time.perf_counter() - start, 4),
+            "memory_mb": round(df.memory_usage(deep=True).sum() / 1e6, 3),
+            "rows": len(df),
+        }
+    report["speedup"] = round(report["default"]["seconds"] / max(report["typed"]["seconds"], 1e-9), 2)
+    report["memory_ratio"] = round(report["default"]["memory_mb"] / max(report["typed"]["memory_mb"], 1e-9), 2)
+    return report
+
+
+def equals_value(series: pd.Series, value: str) -> np.ndarray:
+    """
+    Boolean array series == value. Category columns are compared through
+    their integer codes instead of materializing the strings.
+    """
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        categories = series.cat.categories
+        if value not in categories:
+            return np.zeros(len(series), dtype=bool)
+        return series.cat.codes.to_numpy() == categories.get_loc(value)
+    return series.to_numpy() == value
+
+
+class CodeLookup:
+    """
+    Value -> code table compiled once from a training vocabulary (unknown or missing -> -1).
+    Category columns map only their few categories through the table and then take
+    by integer code; object columns are hashed against the prebuilt index (a
+    one-entry table, e.g. binary "Yes", is a plain vectorized comparison).
+    """
 
+    def __init__(self, vocabulary):
+        self.vocabulary = list(vocabulary)
+        self._index = pd.Index(self.vocabulary, dtype=object)
+        self._index.get_indexer(self.vocabulary[:1])  # build the hash table now, not per call
+        self._code_dtype = np.int8 if len(self.vocabulary) < 127 else np.intp
+
+    def __getstate__(self):
+        return {"vocabulary": self.vocabulary}
+
+    def __setstate__(self, state):
+        self.__init__(state["vocabulary"])
+
+    def codes(self, series: pd.Series) -> np.ndarray:
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            # Trailing -1 so missing values (category code -1) map to -1
+            table = np.append(self._index.get_indexer(series.cat.categories), -1).astype(self._code_dtype)
+            return table[series.cat.codes.to_numpy()]
+        values = series.to_numpy(dtype=object)
+        if len(self.vocabulary) == 1:
+            return np.where(values == self.vocabulary[0], 0, -1)
+        return self._index.get_indexer(values)
+
+
+def clean_raw_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Row-local part of the cleaning (safe to apply per chunk or partition).
+    - Drop customerID
+    - Convert TotalCharges to numeric (missing values stay NaN; filling
+      needs the global median, see load_and_clean_data / ChurnFeaturePipeline)
+    """
     # Drop customer ID - it's unique per customer and not useful for prediction
-    if "customerID" in df.columns:
-        df = df.drop(columns=["customerID"])
+    if ID_COLUMN in df.columns:
+        df = df.drop(columns=[ID_COLUMN])
 
     # TotalCharges is often stored as string with spaces for missing values.
     # Convert to numeric; invalid values become NaN.
     if "TotalCharges" in df.columns:
         df["TotalCharges"] = pd.to_numeric(df["TotalCharges"], errors="coerce")
-        median_total = df["TotalCharges"].median()
-        df["TotalCharges"] = df["TotalCharges"].fillna(median_total)
 
     return df
 
 
+def source_columns_for(feature_columns) -> list:
+    """
+    Raw CSV columns needed to compute the given output feature columns:
+    one-hot columns read their source column, total_spend reads tenure and
+    MonthlyCharges, tenure_group_* reads tenure, monthly_charges_bucket_*
+    reads MonthlyCharges, and every other feature is a column of its own.
+    """
+    sources = []
+    for feature in feature_columns:
+        if feature == "total_spend":
+            needed = ["tenure", "MonthlyCharges"]
+        else:
+            source = next((c for c in CATEGORICAL_COLUMNS if feature.startswith(f"{c}_")), feature)
+            needed = [{"tenure_group": "tenure", "monthly_charges_bucket": "MonthlyCharges"}.get(source, source)]
+        sources.extend(c for c in needed if c not in sources)
+    return sources
+
+
+def csv_columns_for(feature_columns, fitting: bool) -> list:
+    """CSV columns preprocess() parses for the given outputs: their sources, the target, and the fit inputs when fitting."""
+    usecols = source_columns_for(feature_columns)
+    required = [TARGET_COLUMN] + (["tenure", "MonthlyCharges", "TotalCharges"] if fitting else [])
+    return usecols + [c for c in required if c not in usecols]
+
+
 def encode_target(df: pd.DataFrame) -> pd.DataFrame:
     """
     Step 1b: Encode target column Churn.
     Yes -> 1, No -> 0 (so "churn" is the positive class for metrics)
     """
     df = df.copy()
-    if "Churn" not in df.columns:
+    if TARGET_COLUMN not in df.columns:
         raise ValueError("Target column 'Churn' not found")
-    df["Churn"] = (df["Churn"] == "Yes").astype(int)
+    df[TARGET_COLUMN] = (df[TARGET_COLUMN] == "Yes").astype(int)
     return df
 
 
@@ -71,9 +257,7 @@ def add_engineered_features(df: pd.DataFrame) -> pd.DataFrame:
     df = df.copy()
 
     # Tenure groups (months): 0-12, 13-24, 25-48, 49-60, 60+
-    bins_tenure = [0, 13, 25, 49, 61, np.inf]
-    labels_tenure = ["0-12", "13-24", "25-48", "49-60", "60+"]
-    df["tenure_group"] = pd.cut(df["tenure"], bins=bins_tenure, labels=labels_tenure, right=False)
+    df["tenure_group"] = pd.cut(df["tenure"], bins=TENURE_BINS, labels=TENURE_LABELS, right=False)
 
     # Monthly charges buckets (rough thirds: low < ~45, medium 45-75, high > 75)
     # Using quantiles so they adapt to the data
@@ -82,7 +266,7 @@ def add_engineered_features(df: pd.DataFrame) -> pd.DataFrame:
     df["monthly_charges_bucket"] = pd.cut(
         df["MonthlyCharges"],
         bins=[-np.inf, q33, q66, np.inf],
-        labels=["low", "medium", "high"],
+        labels=MONTHLY_BUCKET_LABELS,
     )
 
     # Total spend proxy
@@ -96,14 +280,8 @@ def encode_binary_columns(df: pd.DataFrame) -> pd.DataFrame:
     Step 1c: Encode binary Yes/No columns to 0/1.
     """
     df = df.copy()
-    binary_cols = [
-        "gender", "Partner", "Dependents", "PhoneService",
-        "PaperlessBilling",
-        "OnlineSecurity", "OnlineBackup", "DeviceProtection",
-        "TechSupport", "StreamingTV", "StreamingMovies",
-    ]
     # Keep only those that exist (e.g. SeniorCitizen is already 0/1)
-    for col in binary_cols:
+    for col in BINARY_COLUMNS:
         if col not in df.columns:
             continue
         # Map Yes->1, No->0; other values (e.g. "No internet service") we treat as No -> 0
@@ -124,16 +302,8 @@ def one_hot_encode_categorical(df: pd.DataFrame) -> pd.DataFrame:
     tenure_group, monthly_charges_bucket (from feature engineering).
     """
     df = df.copy()
-    categorical_cols = [
-        "Contract",
-        "InternetService",
-        "PaymentMethod",
-        "MultipleLines",
-        "tenure_group",
-        "monthly_charges_bucket",
-    ]
     # Only columns that exist and are still categorical (object/category)
-    to_encode = [c for c in categorical_cols if c in df.columns and df[c].dtype in ("object", "category")]
+    to_encode = [c for c in CATEGORICAL_COLUMNS if c in df.columns and df[c].dtype in ("object", "category")]
     if not to_encode:
         return df
 
@@ -147,8 +317,7 @@ def scale_numerical_features(df: pd.DataFrame, scaler: StandardScaler = None, fi
     Numerical features: tenure, MonthlyCharges, TotalCharges, total_spend.
     If fit=True, fit the scaler and return it; if fit=False, only transform using provided scaler.
     """
-    numerical_cols = ["tenure", "MonthlyCharges", "TotalCharges", "total_spend"]
-    existing_num = [c for c in numerical_cols if c in df.columns]
+    existing_num = [c for c in NUMERICAL_COLUMNS if c in df.columns]
     if not existing_num:
         return df, scaler
 
@@ -165,59 +334,570 @@ def scale_numerical_features(df: pd.DataFrame, scaler: StandardScaler = None, fi
     return df, scaler
 
 
-def preprocess(data_path: str = None, save_scaler: bool = True) -> Tuple[pd.DataFrame, StandardScaler]:
+# ---------------------------------------------------------------------------
+# Fitted pipeline (single fit pass, single preallocated transform)
+# ---------------------------------------------------------------------------
+class ChurnFeaturePipeline:
+    """
+    All preprocessing steps as one fitted, serializable object.
+
+    fit() learns, in one pass over the cleaned frame:
+    - total_charges_median_: fill value for missing TotalCharges
+    - q33_, q66_: MonthlyCharges cut points for monthly_charges_bucket
+    - monthly_charges_sketch_: mergeable KLL sketch of MonthlyCharges, so cut points
+      can be updated from new chunks / partitions without a global sort
+    - vocabularies_: category order for each one-hot column (same order as get_dummies)
+    - scaler_: StandardScaler over tenure, MonthlyCharges, TotalCharges, total_spend
+    - feature_columns_: output column order (same as the step-by-step functions)
+
+    transform() writes every feature straight into one preallocated float64 matrix,
+    so no intermediate copies of the frame are made.
+    """
+
+    def __init__(self):
+        self.total_charges_median_ = None
+        self.q33_ = None
+        self.q66_ = None
+        self.monthly_charges_sketch_ = None
+        self.vocabularies_ = None
+        self.scaler_ = None
+        self.passthrough_columns_ = None
+        self.feature_columns_ = None
+
+    # -- fitting -------------------------------------------------------------
+    def fit(self, df: pd.DataFrame) -> "ChurnFeaturePipeline":
+        """Learn medians, quantile cut points, vocabularies and scaler stats from df."""
+        for col in ("tenure", "MonthlyCharges", "TotalCharges"):
+            if col not in df.columns:
+                raise ValueError(f"Required column '{col}' not found")
+
+        n_rows = len(df)
+        with stage("quantiles", rows=n_rows):
+            total = pd.to_numeric(df["TotalCharges"], errors="coerce")
+            self.total_charges_median_ = float(total.median())
+            monthly = df["MonthlyCharges"]
+            self.q33_ = float(monthly.quantile(0.33))
+            self.q66_ = float(monthly.quantile(0.66))
+            self.monthly_charges_sketch_ = KLLSketch.from_values(monthly)
+
+        with stage("vocabularies", rows=n_rows):
+            # pd.Categorical sorts the categories exactly like get_dummies does
+            self.set_layout(
+                list(df.columns),
+                {
+                    col: pd.Categorical(df[col].dropna()).categories.tolist()
+                    for col in CATEGORICAL_COLUMNS if col in df.columns
+                },
+            )
+
+        with stage("scaler", rows=n_rows):
+            # Column-major like a DataFrame slice, so the scaler's sums (and thus
+            # mean_/scale_) match the step-by-step path bit for bit
+            tenure = df["tenure"].to_numpy(dtype=np.float64)
+            monthly = monthly.to_numpy(dtype=np.float64)
+            X_num = np.asfortranarray(np.column_stack([
+                tenure,
+                monthly,
+                total.fillna(self.total_charges_median_).to_numpy(dtype=np.float64),
+                tenure * monthly,
+            ]))
+            self.scaler_ = StandardScaler().fit(X_num)
+        return self
+
+    def set_bucket_edges_from_sketch(self, sketch: KLLSketch) -> None:
+        """Take q33_/q66_ from a (merged) MonthlyCharges sketch and keep the sketch."""
+        self.monthly_charges_sketch_ = sketch
+        self.q33_ = sketch.quantile(0.33)
+        self.q66_ = sketch.quantile(0.66)
+
+    def set_layout(self, columns: list, vocabularies: dict) -> None:
+        """
+        Fix the output layout from the input column names and the learned
+        vocabularies of the raw categorical columns (sorted category lists).
+        """
+        self.vocabularies_ = {}
+        for col in CATEGORICAL_COLUMNS:
+            if col == "tenure_group":
+                self.vocabularies_[col] = list(TENURE_LABELS)
+            elif col == "monthly_charges_bucket":
+                self.vocabularies_[col] = list(MONTHLY_BUCKET_LABELS)
+            elif col in vocabularies:
+                self.vocabularies_[col] = list(vocabularies[col])
+
+        self._lookups = None
+        self.passthrough_columns_ = [
+            c for c in columns
+            if c not in (ID_COLUMN, TARGET_COLUMN) and c not in CATEGORICAL_COLUMNS
+        ]
+        self.feature_columns_ = list(self.passthrough_columns_) + ["total_spend"]
+        for col, vocab in self.vocabularies_.items():
+            self.feature_columns_.extend(f"{col}_{v}" for v in vocab)
+
+    def select_features(self, columns) -> "ChurnFeaturePipeline":
+        """
+        Copy of this fitted pipeline that outputs only `columns` (in that order, e.g.
+        models/feature_columns.json after feature selection). Its transforms read
+        only source_columns() and skip every unused encoding step.
+        """
+        self._check_fitted()
+        unknown = [c for c in columns if c not in self.feature_columns_]
+        if unknown:
+            raise ValueError(f"Unknown feature columns: {unknown}")
+        pruned = copy.copy(self)
+        pruned.feature_columns_ = list(columns)
+        # Its layout no longer matches the trained model's, so it must not replace the saved pipeline
+        pruned.pruned_ = True
+        return pruned
+
+    def lookups(self) -> dict:
+        """CodeLookup per raw string column, compiled once from the vocabularies (binaries: "Yes" -> 0)."""
+        if getattr(self, "_lookups", None) is None:
+            self._check_fitted()
+            lookups = {col: CodeLookup(["Yes"]) for col in self.passthrough_columns_ if col in BINARY_COLUMNS}
+            for col, vocab in self.vocabularies_.items():
+                if col not in ("tenure_group", "monthly_charges_bucket"):
+                    lookups[col] = CodeLookup(vocab)
+            self._lookups = lookups
+        return self._lookups
+
+    def __getstate__(self):
+        # Lookups are recompiled on first use after loading
+        state = self.__dict__.copy()
+        state.pop("_lookups", None)
+        return state
+
+    def _check_fitted(self):
+        if self.feature_columns_ is None:
+            raise RuntimeError("ChurnFeaturePipeline is not fitted. Call fit() first.")
+
+    # -- encoding helpers ----------------------------------------------------
+    def tenure_group_codes(self, tenure: np.ndarray) -> np.ndarray:
+        """Index into TENURE_LABELS for each tenure (-1 when out of range / missing)."""
+        codes = np.searchsorted(TENURE_BINS[1:-1], tenure, side="right")
+        return np.where((tenure >= 0) & ~np.isnan(tenure), codes, -1)
+
+    def monthly_bucket_codes(self, monthly: np.ndarray) -> np.ndarray:
+        """Index into MONTHLY_BUCKET_LABELS (right-closed bins, like pd.cut)."""
+        codes = np.searchsorted([self.q33_, self.q66_], monthly, side="left")
+        return np.where(np.isnan(monthly), -1, codes)
+
+    # -- transforming --------------------------------------------------------
+    def source_columns(self) -> list:
+        """Cleaned input columns the current feature layout reads (see source_columns_for)."""
+        self._check_fitted()
+        return source_columns_for(self.feature_columns_)
+
+    def _numeric_slots(self, n_rows: int, views: dict) -> dict:
+        """
+        Arrays for the raw numeric columns the layout needs: the output column views in
+        `views`, plus scratch arrays for inputs that only feed other features (e.g. tenure
+        for total_spend or tenure_group when tenure itself is not an output column).
+        """
+        sources = self.source_columns()
+        needed = [c for c in NUMERICAL_COLUMNS if c in views or c in sources or c in self.feature_columns_]
+        return {c: views[c] if c in views else np.empty(n_rows, dtype=np.float64) for c in needed}
+
+    def _fill_numeric(self, df: pd.DataFrame, numeric: dict) -> None:
+        """Write raw tenure, MonthlyCharges, TotalCharges (median-filled) and total_spend into the given arrays (those present)."""
+        for col in ("tenure", "MonthlyCharges", "TotalCharges"):
+            if col in numeric and col not in df.columns:
+                raise ValueError(f"Column '{col}' not found")
+        if "tenure" in numeric:
+            numeric["tenure"][:] = df["tenure"].to_numpy(dtype=np.float64)
+        if "MonthlyCharges" in numeric:
+            numeric["MonthlyCharges"][:] = df["MonthlyCharges"].to_numpy(dtype=np.float64)
+        if "TotalCharges" in numeric:
+            total = df["TotalCharges"]
+            if not pd.api.types.is_numeric_dtype(total):
+                total = pd.to_numeric(total, errors="coerce")
+            numeric["TotalCharges"][:] = total.to_numpy(dtype=np.float64)
+            np.nan_to_num(numeric["TotalCharges"], copy=False, nan=self.total_charges_median_)
+        if "total_spend" in numeric:
+            np.multiply(numeric["tenure"], numeric["MonthlyCharges"], out=numeric["total_spend"])
+
+    def _scale_numeric(self, numeric: dict) -> None:
+        """Scale the output numeric columns in place (same arithmetic as StandardScaler.transform)."""
+        for k, col in enumerate(NUMERICAL_COLUMNS):
+            if col not in numeric or col not in self.feature_columns_:
+                continue
+            view = numeric[col]
+            view -= self.scaler_.mean_[k]
+            view /= self.scaler_.scale_[k]
+
+    def _category_codes(self, df: pd.DataFrame, col: str, numeric: dict) -> np.ndarray:
+        """Vocabulary index per row for a one-hot column (-1 = no category); numeric must be unscaled."""
+        if col == "tenure_group":
+            return self.tenure_group_codes(numeric["tenure"])
+        if col == "monthly_charges_bucket":
+            return self.monthly_bucket_codes(numeric["MonthlyCharges"])
+        return self.lookups()[col].codes(df[col])
+
+    def _check_sources(self, df: pd.DataFrame) -> None:
+        for col in self.source_columns():
+            if col not in df.columns:
+                raise ValueError(f"Column '{col}' not found")
+
+    def transform(self, df: pd.DataFrame, compact: bool = False) -> pd.DataFrame:
+        """
+        Encode a cleaned frame into the feature matrix (target and ID are ignored).
+        Missing TotalCharges are filled with the fitted median.
+        compact=True writes the 0/1 columns as uint8 and the scaled numerics as
+        float32 (about 6x less memory than the default all-float64 matrix).
+        Only the columns in feature_columns_ are computed (see select_features).
+        """
+        self._check_fitted()
+        self._check_sources(df)
+        n_rows = len(df)
+        # Column-major, so every slot below is written as one contiguous column.
+        # np.empty is enough: each slot is written exactly once.
+        if compact:
+            indicator_columns = [c for c in self.feature_columns_ if c not in NUMERICAL_COLUMNS]
+            output_numeric = [c for c in NUMERICAL_COLUMNS if c in self.feature_columns_]
+            col_index = {c: i for i, c in enumerate(indicator_columns)}
+            out = np.empty((n_rows, len(indicator_columns)), dtype=np.uint8, order="F")
+            num = np.empty((n_rows, len(output_numeric)), dtype=np.float64, order="F")
+            views = {col: num[:, k] for k, col in enumerate(output_numeric)}
+        else:
+            col_index = {c: i for i, c in enumerate(self.feature_columns_)}
+            out = np.empty((n_rows, len(self.feature_columns_)), dtype=np.float64, order="F")
+            views = {col: out[:, col_index[col]] for col in NUMERICAL_COLUMNS if col in col_index}
+        numeric = self._numeric_slots(n_rows, views)
+
+        # Numeric columns (raw for now; the bucket codes below need unscaled values)
+        with stage("numeric", rows=n_rows):
+            self._fill_numeric(df, numeric)
+
+        # Binary Yes/No and other passthrough columns (e.g. SeniorCitizen)
+        with stage("binary", rows=n_rows):
+            for col in self.passthrough_columns_:
+                if col in numeric or col not in col_index:
+                    continue
+                if col in BINARY_COLUMNS:
+                    out[:, col_index[col]] = self.lookups()[col].codes(df[col]) == 0
+                else:
+                    out[:, col_index[col]] = df[col].to_numpy()
+
+        # One-hot columns: one code per row; each category slot is a contiguous column.
+        # Source columns without a requested category are never encoded.
+        with stage("one_hot", rows=n_rows):
+            for col, vocab in self.vocabularies_.items():
+                slots = [(k, col_index[f"{col}_{v}"]) for k, v in enumerate(vocab) if f"{col}_{v}" in col_index]
+                if not slots:
+                    continue
+                codes = self._category_codes(df, col, numeric)
+                for k, j in slots:
+                    np.equal(codes, k, out=out[:, j], casting="unsafe")
+
+        with stage("scale", rows=n_rows):
+            self._scale_numeric(numeric)
+
+        if not compact:
+            return pd.DataFrame(out, columns=self.feature_columns_, index=df.index, copy=False)
+        X = pd.DataFrame(out, columns=indicator_columns, index=df.index, copy=False)
+        for col in sorted(views, key=self.feature_columns_.index):
+            X.insert(self.feature_columns_.index(col), col, numeric[col].astype(np.float32))
+        return X
+
+    def transform_sparse(self, df: pd.DataFrame, dtype=np.float64) -> sparse.csr_matrix:
+        """
+        Same encoding as transform(), returned as a scipy.sparse CSR matrix with
+        columns in feature_columns_ order. Only nonzeros are materialized: one
+        entry per one-hot column, the "Yes" binaries and the scaled numerics.
+        """
+        self._check_fitted()
+        self._check_sources(df)
+        n_rows = len(df)
+        col_index = {c: i for i, c in enumerate(self.feature_columns_)}
+        numeric = self._numeric_slots(n_rows, {})
+        with stage("numeric", rows=n_rows):
+            self._fill_numeric(df, numeric)
+
+        row_parts, col_parts, data_parts = [], [], []
+
+        def add_entries(rows, j, values):
+            row_parts.append(rows)
+            col_parts.append(np.full(len(rows), j, dtype=np.int32) if np.isscalar(j) else j)
+            data_parts.append(np.broadcast_to(np.asarray(values, dtype=dtype), rows.shape))
+
+        with stage("binary", rows=n_rows):
+            for col in self.passthrough_columns_:
+                if col in numeric or col not in col_index:
+                    continue
+                if col in BINARY_COLUMNS:
+                    values = self.lookups()[col].codes(df[col]) == 0
+                else:
+                    values = df[col].to_numpy()
+                nz = np.flatnonzero(values)
+                add_entries(nz, col_index[col], values[nz])
+
+        with stage("one_hot", rows=n_rows):
+            for col, vocab in self.vocabularies_.items():
+                # Output column per category code (-1 when that category is not requested)
+                code_columns = np.array([col_index.get(f"{col}_{v}", -1) for v in vocab], dtype=np.int32)
+                if (code_columns < 0).all():
+                    continue
+                codes = self._category_codes(df, col, numeric)
+                hit = np.flatnonzero(codes >= 0)
+                columns = code_columns[codes[hit]]
+                keep = columns >= 0
+                add_entries(hit[keep], columns[keep], 1)
+
+        with stage("scale", rows=n_rows):
+            self._scale_numeric(numeric)
+            for col in NUMERICAL_COLUMNS:
+                if col not in col_index:
+                    continue
+                nz = np.flatnonzero(numeric[col])
+                add_entries(nz, col_index[col], numeric[col][nz])
+
+        with stage("csr", rows=n_rows):
+            X = sparse.coo_matrix(
+                (np.concatenate(data_parts), (np.concatenate(row_parts), np.concatenate(col_parts))),
+                shape=(n_rows, len(self.feature_columns_)),
+            ).tocsr()
+            X.sort_indices()
+        return X
+
+    def fit_transform(self, df: pd.DataFrame) -> pd.DataFrame:
+        return self.fit(df).transform(df)
+
+    # -- persistence ---------------------------------------------------------
+    def get_state(self) -> dict:
+        """Learned statistics as plain JSON-serializable values."""
+        self._check_fitted()
+        return {
+            "total_charges_median": self.total_charges_median_,
+            "q33": self.q33_,
+            "q66": self.q66_,
+            "vocabularies": self.vocabularies_,
+            "passthrough_columns": self.passthrough_columns_,
+            "feature_columns": self.feature_columns_,
+            "scaler_mean": self.scaler_.mean_.tolist(),
+            "scaler_scale": self.scaler_.scale_.tolist(),
+        }
+
+    def fingerprint(self) -> str:
+        """Stable hash of the learned statistics (changes whenever the encoding would)."""
+        payload = json.dumps(self.get_state(), sort_keys=True).encode("utf-8")
+        return hashlib.sha256(payload).hexdigest()
+
+    def save(self, path: str = None) -> str:
+        """
+        Persist the fitted pipeline (default: models/feature_pipeline.joblib).
+        training_manifest.json is not touched: it is the API's serving copy and is
+        written by train.py (save_manifest) together with the model it belongs to.
+        Raises ValueError for a pipeline pruned with select_features().
+        """
+        self._check_fitted()
+        if getattr(self, "pruned_", False):
+            raise ValueError("Refusing to save a pipeline pruned with select_features(); save the full pipeline")
+        path = path or PIPELINE_PATH
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        joblib.dump(self, path)
+        return path
+
+    def save_manifest(self, path: str = None) -> str:
+        """
+        Write the training statistics as a small JSON manifest (quantile edges,
+        TotalCharges median, scaler mean/scale, vocabularies, feature order).
+        The API loads only this file at startup.
+        """
+        self._check_fitted()
+        if getattr(self, "pruned_", False):
+            raise ValueError("Refusing to write the manifest of a pipeline pruned with select_features()")
+        path = path or os.path.join(MODELS_DIR, MANIFEST_NAME)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        manifest = {"manifest_version": MANIFEST_VERSION, "fingerprint": self.fingerprint(), **self.get_state()}
+        with open(path, "w") as f:
+            json.dump(manifest, f, indent=2)
+        return path
+
+    @classmethod
+    def from_manifest(cls, path: str = None) -> "ChurnFeaturePipeline":
+        """Rebuild a pipeline from training_manifest.json (no sketch; enough to transform)."""
+        path = path or os.path.join(MODELS_DIR, MANIFEST_NAME)
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"Training manifest not found: {path}. Run src/train.py first.")
+        with open(path) as f:
+            state = json.load(f)
+        pipeline = cls()
+        pipeline.total_charges_median_ = state["total_charges_median"]
+        pipeline.q33_ = state["q33"]
+        pipeline.q66_ = state["q66"]
+        pipeline.vocabularies_ = state["vocabularies"]
+        pipeline.passthrough_columns_ = state["passthrough_columns"]
+        pipeline.feature_columns_ = state["feature_columns"]
+        scaler = StandardScaler()
+        scaler.mean_ = np.asarray(state["scaler_mean"], dtype=np.float64)
+        scaler.scale_ = np.asarray(state["scaler_scale"], dtype=np.float64)
+        scaler.var_ = scaler.scale_ ** 2
+        scaler.n_features_in_ = len(scaler.mean_)
+        pipeline.scaler_ = scaler
+        return pipeline
+
+    @classmethod
+    def load(cls, path: str = None) -> "ChurnFeaturePipeline":
+        path = path or PIPELINE_PATH
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"Feature pipeline not found: {path}. Run src/train.py first.")
+        return joblib.load(path)
+
+
+class SparseFeatureMatrix(NamedTuple):
+    """preprocess(sparse_output=True) result: CSR features, target and the column index."""
+    X: sparse.csr_matrix
+    y: pd.Series
+    feature_columns: list
+
+
+def preprocess(
+    data_path: str = None,
+    pipeline: ChurnFeaturePipeline = None,
+    save_pipeline: bool = None,
+    typed: bool = False,
+    compact: bool = False,
+    sparse_output: bool = False,
+    backend: str = "pandas",
+    columns: list = None,
+) -> Tuple[pd.DataFrame, ChurnFeaturePipeline]:
     """
     Full preprocessing pipeline: clean, engineer features, encode, scale.
-    Returns (cleaned DataFrame ready for training, fitted StandardScaler).
-    Optionally saves the scaler to models/scaler.joblib.
+    Returns (cleaned DataFrame ready for training, fitted ChurnFeaturePipeline).
+    If no pipeline is given one is fitted on the data and (optionally) saved to
+    models/feature_pipeline.joblib; otherwise the given pipeline only transforms.
+    save_pipeline defaults to saving unless columns is given.
+    typed=True loads the CSV with the declared TELCO_SCHEMA (see load_and_clean_data).
+    compact=True returns uint8 indicator / float32 numeric columns and an int8 target.
+    sparse_output=True returns a SparseFeatureMatrix (CSR X, y, feature columns)
+    instead of the DataFrame (float32 values when compact=True).
+    backend="polars" runs the same steps as lazy Polars query plans (see
+    polars_backend.py); the output is bit-identical. It supports the dense
+    default and compact outputs with the inferred-dtype load.
+    Inside an active StageProfiler (see instrumentation.py) every stage records
+    wall/CPU time, peak RSS and rows/sec; without one the stage markers are no-ops.
+    columns (e.g. the list in models/feature_columns.json) returns only those
+    feature columns: only their source columns are parsed from the CSV and only
+    their transforms run. When fitting, tenure/MonthlyCharges/TotalCharges are
+    read as well (fit needs them) and the returned pipeline is pruned to columns.
+    A pruned pipeline is never saved (its layout would no longer match the model):
+    save_pipeline=True with columns raises ValueError.
     """
+    if save_pipeline is None:
+        save_pipeline = columns is None
+    elif save_pipeline and columns is not None:
+        raise ValueError("save_pipeline=True cannot be combined with columns (the pipeline is pruned)")
+    if backend == "polars":
+        if typed or sparse_output:
+            raise ValueError("backend='polars' does not support typed=True or sparse_output=True")
+        from src.polars_backend import preprocess_polars
+        return preprocess_polars(
+            data_path, pipeline=pipeline, save_pipeline=save_pipeline, compact=compact, columns=columns,
+        )
+    if backend != "pandas":
+        raise ValueError(f"backend must be 'pandas' or 'polars', got {backend!r}")
+
+    # 0. Lazy mode: the requested output columns decide what is parsed
+    usecols = None
+    if columns is not None:
+        if pipeline is not None:
+            pipeline = pipeline.select_features(columns)
+        usecols = csv_columns_for(columns, fitting=pipeline is None)
+
     # 1. Load and basic clean
-    df = load_and_clean_data(data_path)
+    with stage("load") as s:
+        df = load_and_clean_data(data_path, typed=typed, usecols=usecols)
+        s.rows = n_rows = len(df)
 
     # 2. Encode target first so we don't drop it
-    df = encode_target(df)
-
-    # 3. Feature engineering (before scaling)
-    df = add_engineered_features(df)
-
-    # 4. Encode binary columns
-    df = encode_binary_columns(df)
-
-    # 5. One-hot encode categorical (including engineered tenure_group, monthly_charges_bucket)
-    df = one_hot_encode_categorical(df)
-
-    # 6. Scale numerical features and fit scaler
-    df, scaler = scale_numerical_features(df, fit=True)
-
-    if save_scaler:
-        os.makedirs(MODELS_DIR, exist_ok=True)
-        scaler_path = os.path.join(MODELS_DIR, "scaler.joblib")
-        joblib.dump(scaler, scaler_path)
-        print(f"Scaler saved to {scaler_path}")
-
-    return df, scaler
-
-
-def get_feature_matrix_and_target(df: pd.DataFrame) -> Tuple[pd.DataFrame, pd.Series]:
+    if TARGET_COLUMN not in df.columns:
+        raise ValueError("Target column 'Churn' not found")
+    with stage("encode_target", rows=n_rows):
+        y = pd.Series(equals_value(df[TARGET_COLUMN], "Yes").astype(np.int8 if compact else int), index=df.index)
+
+    # 3. Fit all statistics in one pass (medians, quantiles, vocabularies, scaler)
+    if pipeline is None:
+        with stage("fit", rows=n_rows):
+            pipeline = ChurnFeaturePipeline().fit(df)
+            if columns is not None:
+                pipeline = pipeline.select_features(columns)
+        if save_pipeline:
+            with stage("save_pipeline"):
+                path = pipeline.save()
+            print(f"Feature pipeline saved to {path}")
+
+    # 4. Engineer, encode and scale straight into the feature matrix
+    if sparse_output:
+        with stage("transform", rows=n_rows):
+            X = pipeline.transform_sparse(df, dtype=np.float32 if compact else np.float64)
+        return SparseFeatureMatrix(X, y, list(pipeline.feature_columns_)), pipeline
+    with stage("transform", rows=n_rows):
+        out = pipeline.transform(df, compact=compact)
+        out[TARGET_COLUMN] = y
+    return out, pipeline
+
+
+def get_feature_matrix_and_target(df: pd.DataFrame, compact: bool = False) -> Tuple[pd.DataFrame, pd.Series]:
     """
     Split preprocessed dataframe into X (all features) and y (target).
     Drops target and any non-feature columns.
+    compact=True returns uint8 0/1 columns, float32 numerical columns and an int8 target
+    (a no-op when the frame already came from preprocess(compact=True)).
+    A SparseFeatureMatrix is split into (CSR X, y).
     """
-    if "Churn" not in df.columns:
+    if isinstance(df, SparseFeatureMatrix):
+        if compact:
+            return df.X.astype(np.float32, copy=False), df.y.astype(np.int8, copy=False)
+        return df.X, df.y
+    if TARGET_COLUMN not in df.columns:
         raise ValueError("Churn column not found")
-    y = df["Churn"]
-    X = df.drop(columns=["Churn"])
+    y = df[TARGET_COLUMN]
+    X = df.drop(columns=[TARGET_COLUMN])
+    if compact:
+        X = X.astype({c: np.float32 if c in NUMERICAL_COLUMNS else np.uint8 for c in X.columns}, copy=False)
+        y = y.astype(np.int8, copy=False)
     return X, y
 
 
-# ---------------------------------------------------------------------------
-# Run preprocessing when this file is executed (for testing)
-# ---------------------------------------------------------------------------
-if __name__ == "__main__":
+def as_model_matrix(X: pd.DataFrame) -> pd.DataFrame:
+    """
+    Single float32 frame for the estimators. A compact (uint8/float32) X is cast
+    once here; SMOTE, LogisticRegression, RandomForest and XGBoost all accept
+    float32 as-is, so no further upcast copies are made downstream.
+    """
+    return pd.DataFrame(X.to_numpy(dtype=np.float32), columns=X.columns, index=X.index, copy=False)
+
+
+def main():
+    if "--ingestion-report" in sys.argv:
+        engine = "pyarrow" if "--pyarrow" in sys.argv else None
+        print(json.dumps(ingestion_report(engine=engine), indent=2))
+        return
+    # --columns models/feature_columns.json: lazy mode, only those outputs (pipeline not saved)
+    columns = None
+    if "--columns" in sys.argv:
+        with open(sys.argv[sys.argv.index("--columns") + 1]) as f:
+            columns = json.load(f)
     print("Running preprocessing pipeline...")
-    df_clean, scaler = preprocess(save_scaler=True)
+    if "--profile" in sys.argv:
+        with StageProfiler() as profiler:
+            df_clean, pipeline = preprocess(columns=columns)
+        print(profiler.to_json())
+        if "--mlflow" in sys.argv:
+            profiler.log_to_mlflow()
+    else:
+        df_clean, pipeline = preprocess(columns=columns)
     X, y = get_feature_matrix_and_target(df_clean)
     print(f"Shape: X {X.shape}, y {y.shape}")
     print(f"Churn distribution:\n{y.value_counts()}")
     print(f"Feature columns ({len(X.columns)}): {list(X.columns)}")
     print("Done. Run 'python src/train.py' next for training.")
+
+
+# ---------------------------------------------------------------------------
+# Run preprocessing when this file is executed (for testing)
+# ---------------------------------------------------------------------------
+if __name__ == "__main__":
+    # Import through the package so the saved pipeline pickles as
+    # src.preprocessing.ChurnFeaturePipeline rather than __main__.
+    from src.preprocessing import main as _main
+    _main()
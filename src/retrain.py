@@ -0,0 +1,361 @@
+"""
+Customer Churn Prediction - Warm-Start Retraining
+=================================================
+Update the XGBoost model of the last full training (src/train.py) with a
+new labelled slice of customers instead of retraining on the full history.
+
+- method="boost" loads the booster, drops the trees grown after its best
+  early-stopping round and appends up to n_trees new trees fitted on the
+  slice (SMOTE-resampled like the full training, stopping early on real
+  slice rows held out before SMOTE).
+- method="refresh" keeps every tree and only re-fits the leaf values on
+  the slice (xgboost's refresh updater); no new trees, the fastest update.
+
+The slice is encoded with the saved feature pipeline, so the feature layout
+matches the model, and a stratified TEST_SIZE share of it is held out. Each
+update is kept only if its holdout ROC-AUC is within max_auc_drop of the
+previous model and fewer than max_updates updates have been applied since
+the last full training (models/retrain_state.json). compare_full=True
+(--compare-full) also fits the same XGBoost from scratch on the history plus
+the slice and holds the update to it as well; that costs a full re-encode and
+fit per update, so it is a diagnostic, off by default.
+
+Every slice is then appended to the history, data/history.csv (a copy of
+data/churn.csv on the first slice, which itself is never modified), and a
+rejected update falls back to train.main() on the history, a full retrain
+including the slice. The slice is recorded in data/history_slices.json (so
+it is never applied twice) only once the update is saved or the fallback
+retrain has finished; a run that fails before that leaves the slice to be
+retried, and its rows are removed from the history at the next run.
+
+The updated XGBoost replaces models/xgb_model.joblib; it is also served
+(models/churn_model.joblib) if it beats the served model on the holdout.
+retrain_state.json then records the updated model's holdout ROC-AUC.
+
+Run from project root: python src/retrain.py data/slices/2024-07.csv [--method refresh] [--compare-full]
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import warnings
+import joblib
+import pandas as pd
+import xgboost
+from sklearn.model_selection import train_test_split
+from xgboost import XGBClassifier
+from imblearn.over_sampling import SMOTE
+
+# Ensure project root is on path so "from src.preprocessing" works when running python src/retrain.py
+_PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, _PROJECT_ROOT)
+from src.preprocessing import (
+    ChurnFeaturePipeline, clean_raw_frame, encode_target, as_model_matrix,
+    DATA_PATH, MODELS_DIR, PROJECT_ROOT, TARGET_COLUMN,
+)
+from src.cache import file_sha256
+from src.search import take_rows
+from src.tracking import RunLogger
+from src import train
+
+# ---------------------------------------------------------------------------
+# Config
+# ---------------------------------------------------------------------------
+WARM_METHOD = "boost"
+# New trees per update (a cap: early stopping on the slice's validation rows picks the count)
+WARM_START_TREES = 50
+# Largest holdout ROC-AUC drop accepted, vs the previous model (and the full retrain with compare_full)
+MAX_AUC_DROP = 0.01
+# Updates since the last full training after which the next retrain is a full one
+MAX_WARM_UPDATES = 6
+# Fit from scratch on history + slice for every update and hold the update to it
+# (a diagnostic: it costs a full fit, which the warm start is meant to avoid)
+COMPARE_FULL = False
+# History for full retrains: DATA_PATH plus every applied slice (DATA_PATH stays as in the repo)
+HISTORY_PATH = os.path.join(PROJECT_ROOT, "data", "history.csv")
+HISTORY_LOG_PATH = os.path.join(PROJECT_ROOT, "data", "history_slices.json")
+
+
+def load_state(path: str = None) -> dict:
+    path = path or train.RETRAIN_STATE_PATH
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Retrain state not found: {path}. Run src/train.py first.")
+    with open(path) as f:
+        return json.load(f)
+
+
+def history_slices(path: str = None) -> list:
+    """Slices in the history so far (path, sha256, rows, history size in bytes after the slice)."""
+    path = path or HISTORY_LOG_PATH
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return json.load(f)
+
+
+def history_path(log_path: str = None) -> str:
+    """The CSV full retrains train on: the history once a slice was applied, DATA_PATH before."""
+    return HISTORY_PATH if history_slices(log_path) else DATA_PATH
+
+
+def restore_history(log_path: str = None) -> None:
+    """Drop rows of a slice that was staged but never committed (its retrain did not finish)."""
+    log = history_slices(log_path)
+    if not log:
+        if os.path.exists(HISTORY_PATH):
+            os.remove(HISTORY_PATH)
+    elif os.path.getsize(HISTORY_PATH) != log[-1]["history_bytes"]:
+        with open(HISTORY_PATH, "rb+") as f:
+            f.truncate(log[-1]["history_bytes"])
+
+
+def stage_slice(data_path: str, sha: str, log_path: str = None) -> dict:
+    """
+    Append the slice's rows to the history CSV (in the history's column order); the first
+    slice seeds the history from DATA_PATH. The slice only counts once commit_slice() logs
+    the returned entry; until then restore_history() removes it again.
+    """
+    base_path = history_path(log_path)
+    columns = list(pd.read_csv(base_path, nrows=0).columns)
+    rows = pd.read_csv(data_path, dtype=str, keep_default_na=False)
+    missing = [c for c in columns if c not in rows.columns]
+    if missing:
+        raise ValueError(f"{data_path} lacks history columns: {missing}")
+    if base_path != HISTORY_PATH:
+        shutil.copyfile(base_path, HISTORY_PATH)
+    with open(HISTORY_PATH, "rb+") as f:
+        # Start the appended rows on a new line even if the history has no trailing newline
+        f.seek(0, os.SEEK_END)
+        if f.tell():
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b"\n":
+                f.write(b"\n")
+    rows[columns].to_csv(HISTORY_PATH, mode="a", header=False, index=False)
+    return {"path": data_path, "sha256": sha, "rows": len(rows), "history_bytes": os.path.getsize(HISTORY_PATH)}
+
+
+def commit_slice(entry: dict, log_path: str = None) -> None:
+    """Record a staged slice: one atomic rewrite of the slice log, after the history is on disk."""
+    log_path = log_path or HISTORY_LOG_PATH
+    with open(HISTORY_PATH, "rb+") as f:
+        os.fsync(f.fileno())
+    tmp_path = log_path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(history_slices(log_path) + [entry], f, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, log_path)
+
+
+def encode_slice(data_path: str, pipeline: ChurnFeaturePipeline):
+    """(X, y) of a labelled CSV in the churn.csv schema, encoded with the saved pipeline as float32."""
+    if not os.path.exists(data_path):
+        raise FileNotFoundError(f"Dataset not found: {data_path}")
+    df = encode_target(clean_raw_frame(pd.read_csv(data_path)))
+    return as_model_matrix(pipeline.transform(df)), df[TARGET_COLUMN]
+
+
+def resample_for_xgb(X, y):
+    """As in train.main(): a real-row validation set for early stopping, then SMOTE on the remaining fit rows."""
+    fit_rows, val_rows = train.validation_split(y)
+    eval_set = [(take_rows(X, val_rows), take_rows(y, val_rows))]
+    smote = SMOTE(random_state=train.RANDOM_STATE, k_neighbors=5)
+    X_fit, y_fit = smote.fit_resample(take_rows(X, fit_rows), take_rows(y, fit_rows))
+    return X_fit, y_fit, eval_set
+
+
+def trimmed_booster(model: XGBClassifier) -> xgboost.Booster:
+    """The model's booster without the trees grown after its best early-stopping round."""
+    n_trees = train.stopped_trees(model)
+    booster = model.get_booster()
+    return booster[:n_trees] if n_trees is not None else booster
+
+
+def continue_boosting(model: XGBClassifier, X, y, eval_set, n_trees: int = WARM_START_TREES) -> XGBClassifier:
+    """A copy of model with up to n_trees more trees fitted on (X, y), stopping early on eval_set."""
+    params = {**model.get_params(), "n_estimators": n_trees}
+    return XGBClassifier(**params).fit(X, y, eval_set=eval_set, verbose=False, xgb_model=trimmed_booster(model))
+
+
+def refresh_leaves(model: XGBClassifier, X, y) -> XGBClassifier:
+    """A copy of model with the same trees and leaf values re-fitted on (X, y)."""
+    booster = trimmed_booster(model)
+    # The refresh updater needs a plain DMatrix (the sklearn wrapper builds a QuantileDMatrix for hist)
+    with warnings.catch_warnings():
+        # Setting `updater` by hand is the documented way to refresh; xgboost warns about it regardless
+        warnings.filterwarnings("ignore", message=".*updater.*")
+        refreshed = xgboost.train(
+            {"process_type": "update", "updater": "refresh", "refresh_leaf": True},
+            xgboost.DMatrix(X, label=y),
+            num_boost_round=booster.num_boosted_rounds(),
+            xgb_model=booster,
+        )
+    out = XGBClassifier(**{**model.get_params(), "early_stopping_rounds": None})
+    out.load_model(bytearray(refreshed.save_raw("ubj")))
+    return out
+
+
+def full_retrain_on_holdout(model: XGBClassifier, pipeline, X_slice, y_slice, X_hold, y_hold) -> dict:
+    """
+    Reference for compare_full: the same XGBoost fitted from scratch on the training
+    split of the history plus the slice's training rows, scored on the slice holdout.
+    """
+    X_hist, y_hist = encode_slice(history_path(), pipeline)
+    X_hist, _, y_hist, _ = train_test_split(
+        X_hist, y_hist, test_size=train.TEST_SIZE, random_state=train.RANDOM_STATE, stratify=y_hist
+    )
+    X_all = pd.concat([X_hist, X_slice], ignore_index=True)
+    y_all = pd.concat([y_hist, y_slice], ignore_index=True)
+    X_fit, y_fit, eval_set = resample_for_xgb(X_all, y_all)
+    start = time.perf_counter()
+    full = XGBClassifier(**model.get_params()).fit(X_fit, y_fit, eval_set=eval_set, verbose=False)
+    fit_seconds = time.perf_counter() - start
+    metrics = train.get_metrics(y_hold, full.predict(X_hold), full.predict_proba(X_hold)[:, 1])
+    return {"roc_auc": metrics["roc_auc"], "fit_seconds": fit_seconds, "n_trees": train.stopped_trees(full)}
+
+
+def warm_start_retrain(
+    data_path: str,
+    method: str = WARM_METHOD,
+    n_trees: int = WARM_START_TREES,
+    max_auc_drop: float = MAX_AUC_DROP,
+    max_updates: int = MAX_WARM_UPDATES,
+    full_fallback: bool = True,
+    compare_full: bool = COMPARE_FULL,
+) -> dict:
+    """
+    Update the saved XGBoost with the labelled slice at data_path (see module docstring).
+    Returns a report: holdout ROC-AUC before/after, decision, timings. The slice is appended
+    to the history; when the update is rejected and full_fallback is set, train.main()
+    retrains from scratch on it. A slice already in the history is skipped.
+    """
+    if method not in ("boost", "refresh"):
+        raise ValueError(f"method must be 'boost' or 'refresh', got {method!r}")
+    start = time.perf_counter()
+    sha = file_sha256(data_path)
+    if any(s["sha256"] == sha for s in history_slices()):
+        print(f"{data_path}: already in the history, skipping")
+        return {"slice": data_path, "sha256": sha, "skipped": True}
+    restore_history()
+    state = load_state()
+    if not os.path.exists(train.XGB_MODEL_PATH):
+        raise FileNotFoundError(f"XGBoost model not found: {train.XGB_MODEL_PATH}. Run src/train.py first.")
+    model = joblib.load(train.XGB_MODEL_PATH)
+    pipeline = ChurnFeaturePipeline.load()
+
+    X, y = encode_slice(data_path, pipeline)
+    X_train, X_hold, y_train, y_hold = train_test_split(
+        X, y, test_size=train.TEST_SIZE, random_state=train.RANDOM_STATE, stratify=y
+    )
+    print(f"Warm-start retraining ({method}) on {len(X_train)} rows of {data_path} ({len(X_hold)} held out)...")
+    fit_start = time.perf_counter()
+    if method == "boost":
+        X_fit, y_fit, eval_set = resample_for_xgb(X_train, y_train)
+        updated = continue_boosting(model, X_fit, y_fit, eval_set, n_trees)
+    else:
+        X_fit, y_fit = SMOTE(random_state=train.RANDOM_STATE, k_neighbors=5).fit_resample(X_train, y_train)
+        updated = refresh_leaves(model, X_fit, y_fit)
+    fit_seconds = time.perf_counter() - fit_start
+
+    previous = train.get_metrics(y_hold, model.predict(X_hold), model.predict_proba(X_hold)[:, 1])
+    metrics = train.get_metrics(y_hold, updated.predict(X_hold), updated.predict_proba(X_hold)[:, 1])
+    n_before = trimmed_booster(model).num_boosted_rounds()
+    n_after = train.stopped_trees(updated) or updated.get_booster().num_boosted_rounds()
+    report = {
+        "slice": data_path,
+        "sha256": sha,
+        "method": method,
+        "rows": int(len(X_train)),
+        "holdout_rows": int(len(X_hold)),
+        "trees_before": int(n_before),
+        "trees_after": int(n_after),
+        "previous_roc_auc": previous["roc_auc"],
+        "roc_auc": metrics["roc_auc"],
+        "fit_seconds": round(fit_seconds, 3),
+    }
+    print(f"  {n_before} -> {n_after} trees in {fit_seconds:.1f}s; holdout ROC-AUC "
+          f"{previous['roc_auc']:.4f} -> {metrics['roc_auc']:.4f}")
+    if compare_full:
+        report["full_retrain"] = full_retrain_on_holdout(model, pipeline, X_train, y_train, X_hold, y_hold)
+        print(f"  Full retrain for comparison: holdout ROC-AUC {report['full_retrain']['roc_auc']:.4f} "
+              f"in {report['full_retrain']['fit_seconds']:.1f}s")
+
+    # Every comparison is on the same holdout (test ROC-AUCs of earlier trainings are on other rows)
+    reasons = []
+    if metrics["roc_auc"] < previous["roc_auc"] - max_auc_drop:
+        reasons.append(f"holdout ROC-AUC fell {previous['roc_auc'] - metrics['roc_auc']:.4f} below the previous model")
+    if compare_full and metrics["roc_auc"] < report["full_retrain"]["roc_auc"] - max_auc_drop:
+        gap = report["full_retrain"]["roc_auc"] - metrics["roc_auc"]
+        reasons.append(f"holdout ROC-AUC is {gap:.4f} below a full retrain")
+    if len(state["warm_updates"]) >= max_updates:
+        reasons.append(f"{len(state['warm_updates'])} warm updates since the last full training")
+    report["accepted"] = not reasons
+    report["reasons"] = reasons
+
+    # After the comparisons (the full retrain above reads the history without the slice)
+    entry = stage_slice(data_path, sha)
+    print(f"  Appended {entry['rows']} rows to the history ({HISTORY_PATH})")
+
+    if reasons:
+        print("  Update rejected: " + "; ".join(reasons))
+        report["seconds"] = round(time.perf_counter() - start, 3)
+        if full_fallback:
+            print("  Falling back to a full retrain on the history...\n")
+            train.main(data_path=HISTORY_PATH)
+        # Only now: if the retrain fails, the next run drops the rows and retries the slice
+        commit_slice(entry)
+        return report
+
+    # Serve the updated XGBoost if it beats the served model on the same holdout
+    served_path = os.path.join(MODELS_DIR, "churn_model.joblib")
+    served = joblib.load(served_path)
+    served_roc = train.get_metrics(y_hold, served.predict(X_hold), served.predict_proba(X_hold)[:, 1])["roc_auc"]
+    report["served_roc_auc"] = served_roc
+    report["promoted"] = metrics["roc_auc"] > served_roc
+    joblib.dump(updated, train.XGB_MODEL_PATH)
+    # From here on the recorded scores are the updated model's, on this slice's holdout
+    state["xgb_roc_auc"] = metrics["roc_auc"]
+    if report["promoted"]:
+        joblib.dump(updated, served_path)
+        state["served_model"] = "XGBoost_warm_start"
+        state["served_roc_auc"] = metrics["roc_auc"]
+        print(f"  Serving the updated XGBoost (served model: {served_roc:.4f} on the holdout)")
+    else:
+        print(f"  Keeping {state['served_model']} as served model ({served_roc:.4f} on the holdout)")
+    report["seconds"] = round(time.perf_counter() - start, 3)
+    state["warm_updates"].append({"at": time.strftime("%Y-%m-%dT%H:%M:%S%z"), **report})
+    with open(train.RETRAIN_STATE_PATH, "w") as f:
+        json.dump(state, f, indent=2)
+    commit_slice(entry)
+
+    with RunLogger(train.MLFLOW_EXPERIMENT) as tracker:
+        tracker.log_run(
+            "XGBoost_warm_start",
+            params={"model_name": "XGBoost_warm_start", "method": method, "slice": data_path},
+            metrics={"fit_seconds": fit_seconds, "n_trees": n_after, "previous_roc_auc": previous["roc_auc"], **metrics},
+            model=updated,
+        )
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Warm-start the saved XGBoost model on a new labelled slice.")
+    parser.add_argument("data_path", help="Labelled CSV of new customers (churn.csv schema)")
+    parser.add_argument("--method", choices=["boost", "refresh"], default=WARM_METHOD)
+    parser.add_argument("--trees", type=int, default=WARM_START_TREES, help="Cap on new trees (boost)")
+    parser.add_argument("--no-fallback", action="store_true", help="Report a rejected update instead of retraining")
+    parser.add_argument("--compare-full", action="store_true",
+                        help="Also hold the update to a from-scratch fit on history + slice (a full fit)")
+    args = parser.parse_args()
+    result = warm_start_retrain(
+        args.data_path,
+        method=args.method,
+        n_trees=args.trees,
+        full_fallback=not args.no_fallback,
+        compare_full=args.compare_full,
+    )
+    print(json.dumps(result, indent=2))
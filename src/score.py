@@ -0,0 +1,84 @@
+"""
+Customer Churn Prediction - Batch Scoring
+=========================================
+Score a customer CSV (same schema as data/churn.csv, Churn column optional)
+with the saved model and feature pipeline, writing one row per customer:
+customerID, churn_probability, prediction.
+
+The CSV is read in chunks, so the input can be larger than memory.
+sparse=True encodes each chunk as a scipy.sparse CSR matrix instead of a
+dense matrix.
+
+Run from project root: python src/score.py input.csv predictions.csv [--sparse]
+"""
+
+import os
+import sys
+import argparse
+import joblib
+import numpy as np
+import pandas as pd
+
+# Ensure project root is on path so "from src.preprocessing" works when running python src/score.py
+_PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, _PROJECT_ROOT)
+from src.preprocessing import ChurnFeaturePipeline, clean_raw_frame, MODELS_DIR, ID_COLUMN
+
+# ---------------------------------------------------------------------------
+# Config
+# ---------------------------------------------------------------------------
+CHUNK_SIZE = 100_000
+THRESHOLD = 0.5  # same cut-off as the API
+
+
+def load_model(model_path: str = None):
+    path = model_path or os.path.join(MODELS_DIR, "churn_model.joblib")
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Model not found: {path}. Run src/train.py first.")
+    return joblib.load(path)
+
+
+def score_frame(model, pipeline: ChurnFeaturePipeline, df: pd.DataFrame, sparse: bool = False) -> pd.DataFrame:
+    """Score one raw frame (customerID kept when present). Returns the predictions frame."""
+    ids = df[ID_COLUMN].to_numpy() if ID_COLUMN in df.columns else np.arange(len(df))
+    clean = clean_raw_frame(df)
+    X = pipeline.transform_sparse(clean) if sparse else pipeline.transform(clean)
+    proba = model.predict_proba(X)[:, 1]
+    return pd.DataFrame({
+        ID_COLUMN: ids,
+        "churn_probability": proba,
+        "prediction": np.where(proba >= THRESHOLD, "Likely to Churn", "Not Likely"),
+    })
+
+
+def score_csv(
+    data_path: str,
+    output_path: str,
+    sparse: bool = False,
+    chunksize: int = CHUNK_SIZE,
+    model_path: str = None,
+    pipeline_path: str = None,
+) -> int:
+    """Score data_path chunk by chunk into output_path. Returns the number of rows scored."""
+    if not os.path.exists(data_path):
+        raise FileNotFoundError(f"Dataset not found: {data_path}")
+    model = load_model(model_path)
+    pipeline = ChurnFeaturePipeline.load(pipeline_path)
+    n_rows = 0
+    for i, chunk in enumerate(pd.read_csv(data_path, chunksize=chunksize)):
+        scored = score_frame(model, pipeline, chunk, sparse=sparse)
+        scored.to_csv(output_path, mode="w" if i == 0 else "a", header=(i == 0), index=False)
+        n_rows += len(scored)
+    return n_rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Batch churn scoring for a customer CSV.")
+    parser.add_argument("data_path", help="CSV to score")
+    parser.add_argument("output_path", help="Where to write the predictions CSV")
+    parser.add_argument("--sparse", action="store_true", help="Encode chunks as sparse CSR matrices")
+    parser.add_argument("--chunksize", type=int, default=CHUNK_SIZE)
+    args = parser.parse_args()
+    n = score_csv(args.data_path, args.output_path, sparse=args.sparse, chunksize=args.chunksize)
+    print(f"Scored {n} rows -> {args.output_path}")
@@ -0,0 +1,525 @@
+"""
+Customer Churn Prediction - Resumable Hyperparameter Search
+===========================================================
+Random search, successive halving and TPE (Bayesian optimization) whose
+finished trials are checkpointed to disk, so a search killed at candidate 17 of 20 (OOM, preemption) restarts
+at candidate 18 instead of from scratch.
+
+- A study is one search problem: the training matrix and labels, the
+  fit parameters (e.g. the XGBoost eval_set), the estimator's base
+  parameters, the CV folds and the scoring. Its trials are appended to
+  data/search/<study id>.jsonl, one JSON line per finished trial (params,
+  number of rows, per-fold scores, fit and score seconds), fsync'd as soon
+  as the trial's last fold finishes.
+- A trial is identified by its params, number of rows and the search's
+  random_state (which draws the row subsets) within the study.
+  On restart, or in a later search over the same study, stored trials are
+  reused and never refit; only the final refit of the best candidate runs
+  every time.
+- All (candidate, fold) fits of a round run in one loky pool (n_jobs=-1),
+  so checkpointing does not cost parallelism.
+
+mode="random" samples the same candidates and folds as RandomizedSearchCV
+(ParameterSampler, StratifiedKFold) and reaches the same best_params_ and
+best_score_. mode="halving" evaluates n_candidates on nested random subsets
+of the rows, keeping the best 1/factor each round, the last round on all
+rows (like HalvingRandomSearchCV with resource="n_samples"). mode="tpe"
+samples continuous ranges ({name: ("float" | "log" | "int", low, high)})
+with a tree-structured Parzen estimator: after n_startup uniform trials each
+suggestion favours the region of the best trials so far, and n_jobs trials
+run at once, a new one suggested whenever a worker finishes. A resumed TPE
+search continues from the trials on disk.
+
+Run from project root: python src/search.py --list | --clear
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import hashlib
+import argparse
+import warnings
+import threading
+import numpy as np
+from scipy import sparse
+from scipy.special import logsumexp, ndtr
+from joblib import Parallel, delayed, effective_n_jobs
+from sklearn.base import clone
+from sklearn.metrics import get_scorer
+from sklearn.model_selection import ParameterSampler, StratifiedKFold
+
+# Ensure project root is on path so "from src.preprocessing" works when running python src/search.py
+_PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, _PROJECT_ROOT)
+from src.preprocessing import PROJECT_ROOT
+
+# ---------------------------------------------------------------------------
+# Config
+# ---------------------------------------------------------------------------
+SEARCH_DIR = os.path.join(PROJECT_ROOT, "data", "search")
+# Bump when the way trials are evaluated changes (folds, subsets, scoring)
+SEARCH_VERSION = 2
+# TPE: share of finished trials treated as "good", and candidates drawn from the good
+# density per suggestion (the one with the highest good/bad density ratio is evaluated)
+TPE_GAMMA = 0.25
+TPE_EI_CANDIDATES = 24
+# Kernel width of one observation, as a share of each parameter's range
+TPE_BANDWIDTH = 0.2
+SPACE_KINDS = ("float", "log", "int")
+
+
+def _json_default(obj):
+    if isinstance(obj, np.generic):
+        return obj.item()
+    return repr(obj)
+
+
+def _dumps(obj) -> str:
+    return json.dumps(obj, sort_keys=True, default=_json_default)
+
+
+def take_rows(data, rows):
+    """Rows of a DataFrame/Series (by position), a scipy.sparse matrix or an array."""
+    return data.iloc[rows] if hasattr(data, "iloc") else data[rows]
+
+
+def _update_with_array(h, data) -> None:
+    """Feed the shape, dtype and bytes of a frame/array/sparse matrix into hash h."""
+    if sparse.issparse(data):
+        data = data.tocsr()
+        h.update(f"csr{data.shape}".encode("utf-8"))
+        for part in (data.data, data.indices, data.indptr):
+            _update_with_array(h, part)
+        return
+    values = data.to_numpy() if hasattr(data, "to_numpy") else np.asarray(data)
+    if values.flags["F_CONTIGUOUS"] and not values.flags["C_CONTIGUOUS"]:
+        # Column-major (e.g. feature store memmaps): hash the transpose, no copy
+        values = values.T
+        h.update(b"T")
+    values = np.ascontiguousarray(values)
+    h.update(f"{values.dtype.str}{values.shape}".encode("utf-8"))
+    h.update(memoryview(values).cast("B"))
+
+
+def study_id(estimator, X, y, cv: int, scoring: str, fit_params: dict = None) -> str:
+    """SHA-256 identifying a search problem (see module docstring)."""
+    fit_params = dict(fit_params or {})
+    eval_set = fit_params.pop("eval_set", None) or []
+    header = {
+        "version": SEARCH_VERSION,
+        "estimator": type(estimator).__name__,
+        # Thread counts do not change results
+        "params": {k: v for k, v in estimator.get_params().items() if k != "n_jobs"},
+        "columns": list(X.columns) if hasattr(X, "columns") else None,
+        "cv": cv,
+        "scoring": scoring,
+        "fit_params": fit_params,
+    }
+    h = hashlib.sha256(_dumps(header).encode("utf-8"))
+    for data in [X, y] + [part for pair in eval_set for part in pair]:
+        _update_with_array(h, data)
+    return h.hexdigest()
+
+
+def trial_key(params: dict, n_rows: int, seed: int) -> str:
+    """Trial identity within a study; seed is the search random_state that drew the row subset."""
+    return hashlib.sha256(_dumps({"params": params, "n_rows": n_rows, "seed": seed}).encode("utf-8")).hexdigest()
+
+
+# ---------------------------------------------------------------------------
+# Trial store
+# ---------------------------------------------------------------------------
+class TrialStore:
+    """Append-only JSONL file of finished trials, keyed by trial_key."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.trials = {}
+        if os.path.exists(path):
+            with open(path) as f:
+                for line in f:
+                    try:
+                        trial = json.loads(line)
+                    except ValueError:
+                        # A line cut short by a crash mid-write: that trial simply reruns
+                        continue
+                    self.trials[trial["key"]] = trial
+
+    def get(self, key: str) -> dict:
+        return self.trials.get(key)
+
+    def add(self, trial: dict) -> None:
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with open(self.path, "a") as f:
+            f.write(_dumps(trial) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self.trials[trial["key"]] = trial
+
+
+# ---------------------------------------------------------------------------
+# Search
+# ---------------------------------------------------------------------------
+class SearchResult:
+    """Outcome of run_search (attribute names follow sklearn's *SearchCV)."""
+
+    def __init__(self, best_params, best_score, best_estimator, trials, n_fits, n_reused, store_path):
+        self.best_params_ = best_params
+        self.best_score_ = best_score
+        self.best_estimator_ = best_estimator
+        # Every trial of this search in evaluation order (rounds in order for halving)
+        self.trials_ = trials
+        # CV fits run by this call / trials taken from the store instead of refitting
+        self.n_fits_ = n_fits
+        self.n_reused_ = n_reused
+        self.store_path = store_path
+
+
+def _fit_and_score_fold(estimator, params, X, y, rows, train, test, fit_params, scoring):
+    """
+    One CV fold of one candidate on X[rows]; returns (score, fit_seconds, score_seconds).
+    X and y are passed whole (memory-mapped in workers) and indexed here.
+    """
+    model = clone(estimator).set_params(**params)
+    start = time.perf_counter()
+    try:
+        model.fit(take_rows(X, rows[train]), take_rows(y, rows[train]), **(fit_params or {}))
+    except Exception as exc:  # same policy as sklearn's error_score=np.nan
+        warnings.warn(f"Fit failed for {params}: {exc!r}")
+        return float("nan"), time.perf_counter() - start, 0.0
+    fit_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    score = get_scorer(scoring)(model, take_rows(X, rows[test]), take_rows(y, rows[test]))
+    return float(score), fit_seconds, time.perf_counter() - start
+
+
+def _fold_task(key, i, *args):
+    return key, i, _fit_and_score_fold(*args)
+
+
+def _evaluate(candidates, rows, seed, X, y, cv, scoring, estimator, fit_params, store, n_jobs) -> int:
+    """
+    Make sure store holds a trial for every candidate on X[rows]; returns the number of
+    CV fits run. Trials are written as soon as their last fold is scored.
+    """
+    labels = np.asarray(take_rows(y, rows))
+    folds = list(StratifiedKFold(n_splits=cv).split(np.zeros(len(rows)), labels))
+    pending = {}
+    for params in candidates:
+        key = trial_key(params, len(rows), seed)
+        if store.get(key) is None and key not in pending:
+            pending[key] = params
+    if not pending:
+        return 0
+
+    results = {key: [None] * cv for key in pending}
+    tasks = [(key, i) for key in pending for i in range(cv)]
+    outputs = Parallel(n_jobs=n_jobs, return_as="generator_unordered")(
+        delayed(_fold_task)(key, i, estimator, pending[key], X, y, rows, *folds[i], fit_params, scoring)
+        for key, i in tasks
+    )
+    for key, i, result in outputs:
+        results[key][i] = result
+        if all(r is not None for r in results[key]):
+            scores = [r[0] for r in results[key]]
+            store.add({
+                "key": key,
+                "params": pending[key],
+                "n_rows": len(rows),
+                "seed": seed,
+                "fold_scores": scores,
+                "mean_score": float(np.mean(scores)),
+                "fit_seconds": [round(r[1], 4) for r in results[key]],
+                "score_seconds": [round(r[2], 4) for r in results[key]],
+                "finished": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            })
+    return len(tasks)
+
+
+# ---------------------------------------------------------------------------
+# TPE (tree-structured Parzen estimator)
+# ---------------------------------------------------------------------------
+def check_space(space: dict) -> dict:
+    """Validate a TPE search space {name: (kind, low, high)}, kind in SPACE_KINDS."""
+    if not space:
+        raise ValueError("TPE search needs a non-empty space {name: (kind, low, high)}")
+    for name, spec in space.items():
+        kind, low, high = spec
+        if kind not in SPACE_KINDS:
+            raise ValueError(f"Unknown kind {kind!r} for '{name}', expected one of {SPACE_KINDS}")
+        if not low < high or (kind == "log" and low <= 0):
+            raise ValueError(f"Invalid range for '{name}': ({low}, {high})")
+    return space
+
+
+def _bounds(kind: str, low: float, high: float) -> tuple:
+    """Bounds of a parameter in the space the densities are fitted in."""
+    if kind == "log":
+        return np.log(low), np.log(high)
+    if kind == "int":
+        # Every integer owns a unit-wide interval, so the end points are not under-sampled
+        return low - 0.5, high + 0.5
+    return float(low), float(high)
+
+
+def _to_internal(kind: str, value) -> float:
+    return float(np.log(value)) if kind == "log" else float(value)
+
+
+def _from_internal(kind: str, low, high, x: float):
+    if kind == "int":
+        return int(np.clip(np.rint(x), low, high))
+    value = float(np.exp(x)) if kind == "log" else float(x)
+    # 4 significant digits: readable params and stable trial keys
+    return float(np.clip(float(f"{value:.4g}"), low, high))
+
+
+def _parzen(obs: np.ndarray, lo: np.ndarray, hi: np.ndarray) -> tuple:
+    """
+    Truncated Gaussian mixture over the box [lo, hi]: one component per observation
+    (a row of obs) plus a prior component at the centre as wide as the box. Kernel
+    widths shrink with the number of observations (Scott's rule in d dimensions),
+    so the search narrows as trials accumulate. Returns (mus, sigmas, weights),
+    mus and sigmas of shape (components, dimensions).
+    """
+    width = hi - lo
+    obs = obs.reshape(-1, len(lo))
+    mus = np.vstack([obs, (lo + hi) / 2])
+    sigmas = np.tile(TPE_BANDWIDTH * width * max(len(obs), 1) ** (-1.0 / (len(lo) + 4)), (len(mus), 1))
+    sigmas[-1] = width
+    return mus, sigmas, np.full(len(mus), 1.0 / len(mus))
+
+
+def _parzen_sample(mixture: tuple, lo: np.ndarray, hi: np.ndarray, n: int, rng) -> np.ndarray:
+    mus, sigmas, weights = mixture
+    comp = rng.choice(len(mus), size=n, p=weights)
+    x = rng.normal(mus[comp], sigmas[comp])
+    for _ in range(10):
+        outside = (x < lo) | (x > hi)
+        if not outside.any():
+            break
+        x[outside] = rng.normal(mus[comp], sigmas[comp])[outside]
+    return np.clip(x, lo, hi)
+
+
+def _parzen_logpdf(mixture: tuple, lo: np.ndarray, hi: np.ndarray, x: np.ndarray) -> np.ndarray:
+    mus, sigmas, weights = mixture
+    z = (x[:, None, :] - mus) / sigmas
+    mass = ndtr((hi - mus) / sigmas) - ndtr((lo - mus) / sigmas)
+    log_pdf = (-0.5 * z ** 2 - np.log(sigmas * np.sqrt(2 * np.pi) * mass)).sum(axis=2)
+    return logsumexp(log_pdf + np.log(weights), axis=1)
+
+
+def tpe_suggest(space: dict, finished: list, pending: list, rng, n_startup: int,
+                gamma: float = TPE_GAMMA, n_ei_candidates: int = TPE_EI_CANDIDATES) -> dict:
+    """
+    Next params to evaluate. finished is [(params, score)], pending the params of
+    trials still running. The first n_startup suggestions are uniform; after that,
+    the best gamma share of finished trials form the "good" density l(x) and the
+    rest, plus pending trials (assumed bad until they finish, so parallel workers
+    spread out), the "bad" density g(x). Kernels are joint over all parameters, so
+    interactions (depth vs learning rate) are kept, and the candidate drawn from l
+    with the highest l(x) / g(x) is returned.
+    """
+    names = list(space)
+    lo, hi = (np.array(b) for b in zip(*(_bounds(*space[n]) for n in names)))
+
+    def encode(params_list):
+        return np.array([[_to_internal(space[n][0], p[n]) for n in names] for p in params_list])
+
+    scored = [(p, s) for p, s in finished if np.isfinite(s)]
+    if len(scored) < n_startup:
+        x = rng.uniform(lo, hi)
+    else:
+        scored.sort(key=lambda ps: -ps[1])
+        n_good = max(1, int(np.ceil(gamma * len(scored))))
+        l_mix = _parzen(encode([p for p, _ in scored[:n_good]]), lo, hi)
+        g_mix = _parzen(encode([p for p, _ in scored[n_good:]] + list(pending)), lo, hi)
+        draws = _parzen_sample(l_mix, lo, hi, n_ei_candidates, rng)
+        log_ratio = _parzen_logpdf(l_mix, lo, hi, draws) - _parzen_logpdf(g_mix, lo, hi, draws)
+        x = draws[int(np.argmax(log_ratio))]
+    return {n: _from_internal(space[n][0], space[n][1], space[n][2], x[d]) for d, n in enumerate(names)}
+
+
+def _trial_task(key, params, estimator, X, y, rows, folds, fit_params, scoring):
+    """All CV folds of one candidate in one worker (TPE schedules whole trials)."""
+    results = [_fit_and_score_fold(estimator, params, X, y, rows, train, test, fit_params, scoring)
+               for train, test in folds]
+    return key, params, results
+
+
+def _run_tpe(space, estimator, X, y, n_trials, n_startup, cv, scoring, random_state,
+             fit_params, store, n_jobs) -> tuple:
+    """
+    Asynchronous TPE: n_jobs trials are in flight and each worker that finishes gets
+    a new suggestion based on every trial finished so far. Trials of the same space
+    already in the store count towards n_trials. Returns (trials, n_fits, n_reused).
+    """
+    # A TPE run is its space and seed: resuming continues it, another seed starts afresh
+    space_id = hashlib.sha256(_dumps({"space": space, "seed": random_state}).encode("utf-8")).hexdigest()[:12]
+    sampler = f"tpe:{space_id}"
+    n_rows = X.shape[0]
+    rows = np.arange(n_rows)
+    folds = list(StratifiedKFold(n_splits=cv).split(np.zeros(n_rows), np.asarray(y)))
+    trials = [t for t in store.trials.values() if t.get("sampler") == sampler and t["n_rows"] == n_rows]
+    n_reused = min(len(trials), n_trials)
+    trials = trials[:n_trials]
+    pending = {}
+    lock = threading.Lock()
+
+    def suggestions():
+        # Consumed lazily by Parallel, one suggestion per free worker
+        for i in range(len(trials), n_trials):
+            with lock:
+                finished = [(t["params"], t["mean_score"]) for t in trials]
+                rng = np.random.default_rng([random_state, i])
+                params = tpe_suggest(space, finished, list(pending.values()), rng, n_startup)
+                key = trial_key(params, n_rows, random_state)
+                if store.get(key) is not None or key in pending:
+                    # Already evaluated: nudge with a uniform draw instead of refitting
+                    params = tpe_suggest(space, [], [], rng, n_startup)
+                    key = trial_key(params, n_rows, random_state)
+                pending[key] = params
+            yield delayed(_trial_task)(key, params, estimator, X, y, rows, folds, fit_params, scoring)
+
+    n_new = n_trials - len(trials)
+    if n_new > 0:
+        n_workers = min(effective_n_jobs(n_jobs), n_new)
+        outputs = Parallel(n_jobs=n_workers, batch_size=1, pre_dispatch=n_workers,
+                           return_as="generator_unordered")(suggestions())
+        for key, params, results in outputs:
+            scores = [r[0] for r in results]
+            trial = {
+                "key": key,
+                "params": params,
+                "n_rows": n_rows,
+                "seed": random_state,
+                "sampler": sampler,
+                "fold_scores": scores,
+                "mean_score": float(np.mean(scores)),
+                "fit_seconds": [round(r[1], 4) for r in results],
+                "score_seconds": [round(r[2], 4) for r in results],
+                "finished": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            }
+            store.add(trial)
+            with lock:
+                trials.append(trial)
+                pending.pop(key, None)
+            print(f"  TPE trial {len(trials)}/{n_trials}: ROC-AUC {trial['mean_score']:.4f} "
+                  f"(best {max(np.nan_to_num(t['mean_score'], nan=-np.inf) for t in trials):.4f})")
+    return trials, max(n_new, 0) * cv, n_reused
+
+
+def run_search(
+    estimator,
+    param_dist: dict,
+    X,
+    y,
+    mode: str = "halving",
+    n_candidates: int = 27,
+    n_iter: int = 20,
+    cv: int = 5,
+    factor: int = 3,
+    rounds: int = 4,
+    scoring: str = "roc_auc",
+    random_state: int = 42,
+    fit_params: dict = None,
+    n_jobs: int = -1,
+    store_dir: str = None,
+    space: dict = None,
+    n_trials: int = 20,
+    n_startup: int = 6,
+) -> SearchResult:
+    """
+    Checkpointed random search (n_iter candidates, all rows), successive halving
+    (n_candidates candidates over `rounds` rounds, each on factor times more rows)
+    or TPE (n_trials trials over `space`, the first n_startup uniform; param_dist is
+    not used). Trials already in the study's store are reused; the best candidate
+    is refit on all rows with fit_params. Returns a SearchResult.
+    """
+    if mode not in ("random", "halving", "tpe"):
+        raise ValueError(f"search mode must be 'halving', 'random' or 'tpe', got {mode!r}")
+    if mode == "tpe":
+        check_space(space)
+    fit_params = fit_params or {}
+    sid = study_id(estimator, X, y, cv, scoring, fit_params)
+    store = TrialStore(os.path.join(store_dir or SEARCH_DIR, f"{sid[:16]}.jsonl"))
+    n_stored = len(store.trials)
+    n_rows = X.shape[0]
+
+    if len(store.trials):
+        print(f"  Resuming study {sid[:12]}: {n_stored} trial(s) on disk ({store.path})")
+
+    if mode == "tpe":
+        trials, n_fits, n_reused = _run_tpe(
+            space, estimator, X, y, n_trials, n_startup, cv, scoring, random_state, fit_params, store, n_jobs,
+        )
+        final = trials
+    else:
+        if mode == "random":
+            candidates = list(ParameterSampler(param_dist, n_iter, random_state=random_state))
+            schedule = [n_rows]
+        else:
+            candidates = list(ParameterSampler(param_dist, n_candidates, random_state=random_state))
+            schedule = [n_rows // factor ** (rounds - 1 - i) for i in range(rounds)]
+        # Nested subsets: round i uses the first schedule[i] rows of one fixed permutation
+        order = np.random.default_rng(random_state).permutation(n_rows)
+
+        trials, n_fits, n_reused = [], 0, 0
+        for i, n_sub in enumerate(schedule):
+            rows = np.arange(n_rows) if n_sub == n_rows else np.sort(order[:n_sub])
+            n_reused += sum(store.get(trial_key(p, len(rows), random_state)) is not None for p in candidates)
+            n_fits += _evaluate(
+                candidates, rows, random_state, X, y, cv, scoring, estimator, fit_params, store, n_jobs,
+            )
+            round_trials = [store.get(trial_key(p, len(rows), random_state)) for p in candidates]
+            trials.extend(round_trials)
+            if i < len(schedule) - 1:
+                scores = np.array([t["mean_score"] for t in round_trials])
+                # Highest scores first; NaN (failed) last; ties keep sampling order
+                keep = np.argsort(-np.nan_to_num(scores, nan=-np.inf), kind="stable")
+                candidates = [candidates[j] for j in keep[: max(1, -(-len(candidates) // factor))]]
+        final = trials[-len(candidates):]
+
+    best = max(range(len(final)), key=lambda j: (np.nan_to_num(final[j]["mean_score"], nan=-np.inf), -j))
+    best_params = final[best]["params"]
+    best_estimator = clone(estimator).set_params(**best_params).fit(X, y, **fit_params)
+    return SearchResult(
+        best_params, final[best]["mean_score"], best_estimator, trials, n_fits, n_reused, store.path,
+    )
+
+
+def list_studies(store_dir: str = None) -> list:
+    """One summary per stored study: file, trials, best mean score and its params."""
+    store_dir = store_dir or SEARCH_DIR
+    if not os.path.isdir(store_dir):
+        return []
+    summaries = []
+    for name in sorted(os.listdir(store_dir)):
+        if name.endswith(".jsonl"):
+            trials = list(TrialStore(os.path.join(store_dir, name)).trials.values())
+            best = max(trials, key=lambda t: (t["n_rows"], np.nan_to_num(t["mean_score"], nan=-np.inf)), default=None)
+            summaries.append({
+                "study": name[: -len(".jsonl")],
+                "trials": len(trials),
+                "best_full_rows_score": best["mean_score"] if best else None,
+                "best_params": best["params"] if best else None,
+            })
+    return summaries
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Inspect or clear the hyperparameter search trial store.")
+    parser.add_argument("--list", action="store_true", help="Summarize stored studies")
+    parser.add_argument("--clear", action="store_true", help="Delete all stored trials")
+    args = parser.parse_args()
+    if args.clear:
+        shutil.rmtree(SEARCH_DIR, ignore_errors=True)
+        print(f"Cleared {SEARCH_DIR}")
+    elif args.list:
+        print(json.dumps(list_studies(), indent=2))
+    else:
+        parser.print_help()
@@ -0,0 +1,350 @@
+"""
+Customer Churn Prediction - Streaming Preprocessing
+===================================================
+Two-pass, chunked version of preprocess() for CSVs larger than RAM.
+
+Pass 1: read the CSV in chunks and collect the global statistics
+        (TotalCharges median, MonthlyCharges q33/q66, scaler moments,
+        category vocabularies, row count) into a ChurnFeaturePipeline.
+Pass 2: read the CSV again, transform chunk by chunk and write the encoded
+        matrix into a preallocated .npy file on disk (plus y.npy).
+
+Memory is bounded by the chunk size plus the statistics state. By default
+medians and quantiles come from exact value counts, so memory there grows with
+the number of distinct charge values (cents), not with the number of rows, and
+the result matches the in-memory pipeline exactly. quantiles="sketch" uses
+mergeable KLL sketches instead (fixed size, bounded rank error; see sketch.py).
+
+Run from project root: python src/streaming.py [csv_path] [output_dir] [--quantiles sketch]
+"""
+
+import os
+import sys
+import copy
+import json
+import argparse
+import numpy as np
+import pandas as pd
+from sklearn.preprocessing import StandardScaler
+from typing import Tuple
+
+# Ensure project root is on path so "from src.preprocessing" works when running python src/streaming.py
+_PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, _PROJECT_ROOT)
+from src.sketch import KLLSketch
+from src.preprocessing import (
+    ChurnFeaturePipeline,
+    clean_raw_frame,
+    DATA_PATH,
+    PROJECT_ROOT,
+    CATEGORICAL_COLUMNS,
+    NUMERICAL_COLUMNS,
+    TARGET_COLUMN,
+)
+
+# ---------------------------------------------------------------------------
+# Config
+# ---------------------------------------------------------------------------
+CHUNK_SIZE = 200_000
+PROCESSED_DIR = os.path.join(PROJECT_ROOT, "data", "processed")
+
+
+# ---------------------------------------------------------------------------
+# Bounded-memory estimators
+# ---------------------------------------------------------------------------
+class ValueCountQuantiles:
+    """
+    Exact quantiles from merged value counts.
+    Matches pandas' linear-interpolation quantile and median bit for bit.
+    """
+
+    def __init__(self):
+        self.counts = pd.Series(dtype=np.int64)
+
+    def update(self, values: pd.Series) -> None:
+        vc = values.dropna().value_counts()
+        self.counts = self.counts.add(vc, fill_value=0).astype(np.int64)
+
+    def merge(self, other: "ValueCountQuantiles") -> "ValueCountQuantiles":
+        self.counts = self.counts.add(other.counts, fill_value=0).astype(np.int64)
+        return self
+
+    @property
+    def count(self) -> int:
+        return int(self.counts.sum())
+
+    def _value_at_rank(self, values: np.ndarray, cum: np.ndarray, rank: int) -> float:
+        return float(values[np.searchsorted(cum, rank, side="right")])
+
+    def quantile(self, q: float) -> float:
+        n = self.count
+        if n == 0:
+            return float("nan")
+        counts = self.counts.sort_index()
+        values = counts.index.to_numpy(dtype=np.float64)
+        cum = np.cumsum(counts.to_numpy())
+        h = (n - 1) * q
+        lo = int(np.floor(h))
+        a = self._value_at_rank(values, cum, lo)
+        b = self._value_at_rank(values, cum, min(lo + 1, n - 1))
+        t = h - lo
+        # Same lerp as numpy's "linear" method
+        diff = b - a
+        return b - diff * (1 - t) if t >= 0.5 else a + diff * t
+
+    def median(self) -> float:
+        n = self.count
+        if n == 0:
+            return float("nan")
+        counts = self.counts.sort_index()
+        values = counts.index.to_numpy(dtype=np.float64)
+        cum = np.cumsum(counts.to_numpy())
+        a = self._value_at_rank(values, cum, (n - 1) // 2)
+        b = self._value_at_rank(values, cum, n // 2)
+        return float(np.mean([a, b]))
+
+
+class RunningMoments:
+    """Per-column count / mean / M2, merged chunk by chunk (Chan et al.)."""
+
+    def __init__(self, n_features: int):
+        self.n = np.zeros(n_features, dtype=np.int64)
+        self.mean = np.zeros(n_features, dtype=np.float64)
+        self.m2 = np.zeros(n_features, dtype=np.float64)
+
+    def update(self, X: np.ndarray) -> None:
+        """Fold in a chunk; NaNs are skipped per column."""
+        for j in range(X.shape[1]):
+            col = X[:, j]
+            col = col[~np.isnan(col)]
+            if len(col):
+                self.merge_column(j, len(col), col.mean(), ((col - col.mean()) ** 2).sum())
+
+    def merge_column(self, j: int, n_b: int, mean_b: float, m2_b: float) -> None:
+        n_a = self.n[j]
+        n = n_a + n_b
+        delta = mean_b - self.mean[j]
+        self.mean[j] += delta * n_b / n
+        self.m2[j] += m2_b + delta ** 2 * n_a * n_b / n
+        self.n[j] = n
+
+    def to_scaler(self) -> StandardScaler:
+        """StandardScaler with the accumulated statistics (population variance, like fit)."""
+        scaler = StandardScaler()
+        var = self.m2 / self.n
+        scale = np.sqrt(var)
+        scale[scale == 0.0] = 1.0
+        scaler.mean_ = self.mean.copy()
+        scaler.var_ = var
+        scaler.scale_ = scale
+        scaler.n_samples_seen_ = int(self.n[0])
+        scaler.n_features_in_ = len(self.mean)
+        return scaler
+
+
+class StreamingStats:
+    """
+    Everything ChurnFeaturePipeline.fit() learns, accumulated over chunks.
+    Chunks are expected to be cleaned with clean_raw_frame() (TotalCharges
+    numeric with NaN for missing values).
+    quantiles: "exact" (value counts) or "sketch" (KLL) for the median and cut points.
+    A KLL sketch of MonthlyCharges is always kept so it is persisted with the pipeline.
+    """
+
+    def __init__(self, quantiles: str = "exact"):
+        if quantiles not in ("exact", "sketch"):
+            raise ValueError(f"quantiles must be 'exact' or 'sketch', got {quantiles!r}")
+        self.quantiles = quantiles
+        self.columns = None
+        self.n_rows = 0
+        estimator = ValueCountQuantiles if quantiles == "exact" else KLLSketch
+        self.total_charges = estimator()
+        self.monthly_charges = estimator()
+        self.monthly_sketch = self.monthly_charges if quantiles == "sketch" else KLLSketch()
+        self.moments = RunningMoments(len(NUMERICAL_COLUMNS))
+        self.n_missing_total = 0
+        self.vocabularies = {}
+
+    def update(self, chunk: pd.DataFrame) -> None:
+        if self.columns is None:
+            self.columns = list(chunk.columns)
+        self.n_rows += len(chunk)
+        total = chunk["TotalCharges"]
+        self.total_charges.update(total)
+        self.monthly_charges.update(chunk["MonthlyCharges"])
+        if self.monthly_sketch is not self.monthly_charges:
+            self.monthly_sketch.update(chunk["MonthlyCharges"])
+        self.n_missing_total += int(total.isna().sum())
+
+        tenure = chunk["tenure"].to_numpy(dtype=np.float64)
+        monthly = chunk["MonthlyCharges"].to_numpy(dtype=np.float64)
+        self.moments.update(np.column_stack([
+            tenure, monthly, total.to_numpy(dtype=np.float64), tenure * monthly,
+        ]))
+
+        for col in CATEGORICAL_COLUMNS:
+            if col in chunk.columns:
+                self.vocabularies.setdefault(col, set()).update(chunk[col].dropna().unique())
+
+    def merge(self, other: "StreamingStats") -> "StreamingStats":
+        """Combine statistics collected on another chunk or partition."""
+        if other.quantiles != self.quantiles:
+            raise ValueError("Cannot merge exact and sketch statistics")
+        if self.columns is None:
+            self.columns = other.columns
+        self.n_rows += other.n_rows
+        self.total_charges.merge(other.total_charges)
+        self.monthly_charges.merge(other.monthly_charges)
+        if self.monthly_sketch is not self.monthly_charges:
+            self.monthly_sketch.merge(other.monthly_sketch)
+        self.n_missing_total += other.n_missing_total
+        for j in range(len(NUMERICAL_COLUMNS)):
+            if other.moments.n[j]:
+                self.moments.merge_column(j, other.moments.n[j], other.moments.mean[j], other.moments.m2[j])
+        for col, values in other.vocabularies.items():
+            self.vocabularies.setdefault(col, set()).update(values)
+        return self
+
+    def to_pipeline(self) -> ChurnFeaturePipeline:
+        """Build the fitted pipeline from the collected statistics."""
+        if self.columns is None:
+            raise ValueError("No data seen; cannot build the feature pipeline")
+        pipeline = ChurnFeaturePipeline()
+        pipeline.total_charges_median_ = self.total_charges.median()
+        pipeline.set_bucket_edges_from_sketch(self.monthly_sketch)
+        if self.quantiles == "exact":
+            pipeline.q33_ = self.monthly_charges.quantile(0.33)
+            pipeline.q66_ = self.monthly_charges.quantile(0.66)
+        pipeline.set_layout(self.columns, {col: sorted(v) for col, v in self.vocabularies.items()})
+
+        # Missing TotalCharges are filled with the median before scaling,
+        # so add them to the scaler moments now that the median is known.
+        # (On a copy, so the statistics can keep accumulating afterwards.)
+        moments = copy.deepcopy(self.moments)
+        if self.n_missing_total:
+            j = NUMERICAL_COLUMNS.index("TotalCharges")
+            moments.merge_column(j, self.n_missing_total, pipeline.total_charges_median_, 0.0)
+        pipeline.scaler_ = moments.to_scaler()
+        return pipeline
+
+
+# ---------------------------------------------------------------------------
+# Two passes
+# ---------------------------------------------------------------------------
+def iter_clean_chunks(data_path: str = None, chunksize: int = CHUNK_SIZE):
+    """Yield cleaned chunks of the CSV (see clean_raw_frame)."""
+    path = data_path or DATA_PATH
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Dataset not found: {path}")
+    for chunk in pd.read_csv(path, chunksize=chunksize):
+        yield clean_raw_frame(chunk)
+
+
+def collect_stats(data_path: str = None, chunksize: int = CHUNK_SIZE, quantiles: str = "exact") -> StreamingStats:
+    """Pass 1: global statistics over all chunks."""
+    stats = StreamingStats(quantiles)
+    for chunk in iter_clean_chunks(data_path, chunksize):
+        stats.update(chunk)
+    return stats
+
+
+def transform_to_disk(
+    pipeline: ChurnFeaturePipeline,
+    n_rows: int,
+    data_path: str = None,
+    output_dir: str = None,
+    chunksize: int = CHUNK_SIZE,
+) -> dict:
+    """
+    Pass 2: transform chunk by chunk into output_dir/X.npy (float64, n_rows x n_features)
+    and output_dir/y.npy (when the target column is present). Also writes feature_columns.json.
+    Returns the written paths.
+    """
+    output_dir = output_dir or PROCESSED_DIR
+    os.makedirs(output_dir, exist_ok=True)
+    paths = {
+        "X": os.path.join(output_dir, "X.npy"),
+        "y": os.path.join(output_dir, "y.npy"),
+        "feature_columns": os.path.join(output_dir, "feature_columns.json"),
+    }
+    X_out = np.lib.format.open_memmap(
+        paths["X"], mode="w+", dtype=np.float64, shape=(n_rows, len(pipeline.feature_columns_))
+    )
+    y_out = None
+    start = 0
+    for chunk in iter_clean_chunks(data_path, chunksize):
+        stop = start + len(chunk)
+        X_out[start:stop] = pipeline.transform(chunk).to_numpy()
+        if TARGET_COLUMN in chunk.columns:
+            if y_out is None:
+                y_out = np.lib.format.open_memmap(paths["y"], mode="w+", dtype=np.int64, shape=(n_rows,))
+            y_out[start:stop] = (chunk[TARGET_COLUMN] == "Yes").to_numpy()
+        start = stop
+    if start != n_rows:
+        raise RuntimeError(f"Row count changed between passes ({n_rows} -> {start})")
+    X_out.flush()
+    del X_out
+    if y_out is None:
+        del paths["y"]
+    else:
+        y_out.flush()
+        del y_out
+
+    with open(paths["feature_columns"], "w") as f:
+        json.dump(pipeline.feature_columns_, f, indent=2)
+    return paths
+
+
+def preprocess_streaming(
+    data_path: str = None,
+    output_dir: str = None,
+    chunksize: int = CHUNK_SIZE,
+    save_pipeline: bool = False,
+    quantiles: str = "exact",
+) -> Tuple[dict, ChurnFeaturePipeline]:
+    """
+    Two-pass streaming preprocessing. Returns (paths of the written files, fitted pipeline).
+    save_pipeline=True also overwrites models/feature_pipeline.joblib, which the saved
+    models were trained with; leave it off unless the models are retrained on this output.
+    quantiles="sketch" takes the median and cut points from KLL sketches.
+    """
+    print(f"Pass 1/2: collecting statistics (chunks of {chunksize} rows)...")
+    stats = collect_stats(data_path, chunksize, quantiles)
+    pipeline = stats.to_pipeline()
+    print(f"  {stats.n_rows} rows, {len(pipeline.feature_columns_)} features")
+    if save_pipeline:
+        path = pipeline.save()
+        print(f"Feature pipeline saved to {path}")
+
+    print("Pass 2/2: transforming chunks to disk...")
+    paths = transform_to_disk(pipeline, stats.n_rows, data_path, output_dir, chunksize)
+    print(f"  Feature matrix written to {paths['X']}")
+    return paths, pipeline
+
+
+def load_feature_matrix(output_dir: str = None, mmap: bool = True) -> Tuple[pd.DataFrame, pd.Series]:
+    """Load the matrix written by preprocess_streaming as (X, y); memory-mapped by default."""
+    output_dir = output_dir or PROCESSED_DIR
+    with open(os.path.join(output_dir, "feature_columns.json")) as f:
+        feature_columns = json.load(f)
+    mmap_mode = "r" if mmap else None
+    X = pd.DataFrame(np.load(os.path.join(output_dir, "X.npy"), mmap_mode=mmap_mode), columns=feature_columns, copy=False)
+    y_path = os.path.join(output_dir, "y.npy")
+    y = pd.Series(np.load(y_path, mmap_mode=mmap_mode), name=TARGET_COLUMN) if os.path.exists(y_path) else None
+    return X, y
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Chunked two-pass preprocessing for large CSVs.")
+    parser.add_argument("data_path", nargs="?", default=None, help="CSV to preprocess (default: data/churn.csv)")
+    parser.add_argument("output_dir", nargs="?", default=None, help="Output directory (default: data/processed)")
+    parser.add_argument("--chunksize", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--quantiles", choices=["exact", "sketch"], default="exact")
+    parser.add_argument("--save-pipeline", action="store_true",
+                        help="Overwrite models/feature_pipeline.joblib (only before retraining the models)")
+    args = parser.parse_args()
+    preprocess_streaming(
+        args.data_path, args.output_dir, args.chunksize,
+        save_pipeline=args.save_pipeline, quantiles=args.quantiles,
+    )
@@ -0,0 +1,234 @@
+"""
+Customer Churn Prediction - Synthetic Data Generator
+====================================================
+Generate N rows (1M to 100M) in the data/churn.csv schema for scale and
+load testing of preprocess(), train.main() and the API.
+
+What is learned from churn.csv:
+- the joint distribution of all categorical columns and Churn: each synthetic
+  row starts from a source row sampled with replacement, so every correlation
+  between contract, services, payment method and churn is kept, as are the
+  service dependencies ("No internet service" only with InternetService=No)
+- tenure: the source tenure plus integer noise, clipped to the observed range
+  (new customers with tenure 0 stay at 0 and get a blank TotalCharges)
+- MonthlyCharges: the source value with small multiplicative noise, in cents
+- TotalCharges: tenure * MonthlyCharges * the source row's billing ratio
+  (TotalCharges / (tenure * MonthlyCharges)), so its spread around
+  tenure * MonthlyCharges matches the data
+
+Rows are generated in fixed blocks of BLOCK_ROWS, each with its own RNG
+seeded from (seed, block index), and streamed to CSV or Parquet. Memory is
+bounded by one block, the output depends only on the seed, and the first M
+rows of an N-row table are the M-row table.
+
+Run from project root: python src/synthetic.py 1000000 data/synthetic/churn_1m.csv [--seed 42] [--report]
+"""
+
+import os
+import sys
+import json
+import argparse
+import importlib.util
+import numpy as np
+import pandas as pd
+
+# Ensure project root is on path so "from src.preprocessing" works when running python src/synthetic.py
+_PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, _PROJECT_ROOT)
+from src.preprocessing import DATA_PATH, ID_COLUMN, TARGET_COLUMN
+
+# ---------------------------------------------------------------------------
+# Config
+# ---------------------------------------------------------------------------
+BLOCK_ROWS = 100_000
+DEFAULT_SEED = 42
+TENURE_NOISE_SD = 2.0
+MONTHLY_NOISE_SD = 0.02  # relative
+_ID_LETTERS = np.array(list("ABCDEFGHIJKLMNOPQRSTUVWXYZ"))
+# Columns summary_stats reads
+SUMMARY_COLUMNS = ["tenure", "MonthlyCharges", "TotalCharges", TARGET_COLUMN, "Contract", "InternetService"]
+
+
+class SyntheticChurnGenerator:
+    """Resample-and-perturb generator fitted on the real customer CSV."""
+
+    def __init__(self, seed: int = DEFAULT_SEED):
+        self.seed = seed
+        self.columns_ = None
+        self.categorical_ = None
+        self.tenure_ = None
+        self.monthly_ = None
+        self.ratio_ = None
+        self.tenure_range_ = None
+        self.monthly_range_ = None
+
+    def fit(self, data_path: str = None) -> "SyntheticChurnGenerator":
+        path = data_path or DATA_PATH
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"Dataset not found: {path}")
+        df = pd.read_csv(path)
+        for col in ("tenure", "MonthlyCharges", "TotalCharges", TARGET_COLUMN):
+            if col not in df.columns:
+                raise ValueError(f"Required column '{col}' not found")
+        self.columns_ = list(df.columns)
+        numeric = {ID_COLUMN, "tenure", "MonthlyCharges", "TotalCharges"}
+        # Categorical columns as codes + categories, so a block is a few integer takes
+        self.categorical_ = {
+            col: pd.Categorical(df[col]) for col in df.columns if col not in numeric
+        }
+        self.tenure_ = df["tenure"].to_numpy(dtype=np.int64)
+        self.monthly_ = df["MonthlyCharges"].to_numpy(dtype=np.float64)
+        total = pd.to_numeric(df["TotalCharges"], errors="coerce").to_numpy(dtype=np.float64)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            ratio = total / (self.tenure_ * self.monthly_)
+        self.ratio_ = np.where(np.isfinite(ratio), ratio, 1.0)
+        self.tenure_range_ = (int(self.tenure_[self.tenure_ > 0].min()), int(self.tenure_.max()))
+        self.monthly_range_ = (float(self.monthly_.min()), float(self.monthly_.max()))
+        return self
+
+    # -- generation ----------------------------------------------------------
+    def _customer_ids(self, start: int, n: int) -> np.ndarray:
+        """Unique IDs in the source format (NNNN-XXXXX) for rows start .. start+n-1."""
+        idx = np.arange(start, start + n, dtype=np.int64)
+        letters = idx % 26 ** 5
+        digits = (idx // 26 ** 5) % 10_000
+        suffix = np.stack([_ID_LETTERS[(letters // 26 ** p) % 26] for p in range(4, -1, -1)], axis=1)
+        suffix = suffix.view("<U5").ravel()
+        return np.char.add(np.char.add(np.char.zfill(digits.astype(str), 4), "-"), suffix)
+
+    def generate_block(self, block_index: int, n_rows: int) -> pd.DataFrame:
+        """Rows block_index * BLOCK_ROWS ... (+ n_rows) of the synthetic table."""
+        if self.columns_ is None:
+            raise RuntimeError("SyntheticChurnGenerator is not fitted. Call fit() first.")
+        if not 0 < n_rows <= BLOCK_ROWS:
+            raise ValueError(f"n_rows must be in 1..{BLOCK_ROWS}, got {n_rows}")
+        # Always draw a full block and truncate, so a shorter table is a prefix of a longer one
+        rng = np.random.default_rng([self.seed, block_index])
+        src = rng.integers(0, len(self.tenure_), BLOCK_ROWS)[:n_rows]
+        tenure_noise = rng.normal(0, TENURE_NOISE_SD, BLOCK_ROWS)[:n_rows]
+        monthly_noise = rng.normal(0, MONTHLY_NOISE_SD, BLOCK_ROWS)[:n_rows]
+
+        tenure = self.tenure_[src]
+        lo, hi = self.tenure_range_
+        jittered = np.clip(tenure + np.rint(tenure_noise).astype(np.int64), lo, hi)
+        tenure = np.where(tenure == 0, 0, jittered)
+
+        monthly = self.monthly_[src] * (1 + monthly_noise)
+        monthly = np.round(np.clip(monthly, *self.monthly_range_), 2)
+        total = np.round(tenure * monthly * self.ratio_[src], 2)
+        total_str = total.astype(str)
+        total_str[tenure == 0] = " "
+
+        out = {}
+        for col in self.columns_:
+            if col == ID_COLUMN:
+                out[col] = self._customer_ids(block_index * BLOCK_ROWS, n_rows)
+            elif col == "tenure":
+                out[col] = tenure
+            elif col == "MonthlyCharges":
+                out[col] = monthly
+            elif col == "TotalCharges":
+                out[col] = total_str
+            else:
+                cat = self.categorical_[col]
+                # from_codes keeps code -1 (missing in the source) missing, not the last category
+                out[col] = np.asarray(pd.Categorical.from_codes(cat.codes[src], cat.categories))
+        return pd.DataFrame(out, columns=self.columns_)
+
+    def iter_blocks(self, n_rows: int):
+        """Yield the n_rows-row table as DataFrames of at most BLOCK_ROWS rows."""
+        for block_index, start in enumerate(range(0, n_rows, BLOCK_ROWS)):
+            yield self.generate_block(block_index, min(BLOCK_ROWS, n_rows - start))
+
+    def write(self, n_rows: int, output_path: str, fmt: str = None) -> str:
+        """Stream n_rows rows to output_path (.csv, or .parquet with pyarrow). Returns the path."""
+        fmt = fmt or ("parquet" if output_path.endswith(".parquet") else "csv")
+        if fmt not in ("csv", "parquet"):
+            raise ValueError(f"fmt must be 'csv' or 'parquet', got {fmt!r}")
+        if fmt == "parquet" and importlib.util.find_spec("pyarrow") is None:
+            raise ImportError("Parquet output requires pyarrow (pip install pyarrow)")
+        os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+
+        if fmt == "csv":
+            for i, block in enumerate(self.iter_blocks(n_rows)):
+                block.to_csv(output_path, mode="w" if i == 0 else "a", header=(i == 0), index=False)
+            return output_path
+
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        writer = None
+        try:
+            for block in self.iter_blocks(n_rows):
+                table = pa.Table.from_pandas(block, preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(output_path, table.schema)
+                writer.write_table(table)
+        finally:
+            if writer is not None:
+                writer.close()
+        return output_path
+
+
+# ---------------------------------------------------------------------------
+# Fidelity report
+# ---------------------------------------------------------------------------
+def summary_stats(df: pd.DataFrame) -> dict:
+    """Marginals and key correlations used to compare synthetic and real data."""
+    total = pd.to_numeric(df["TotalCharges"], errors="coerce")
+    churn = df[TARGET_COLUMN] == "Yes"
+    return {
+        "rows": len(df),
+        "churn_rate": round(float(churn.mean()), 4),
+        "tenure_mean": round(float(df["tenure"].mean()), 3),
+        "monthly_mean": round(float(df["MonthlyCharges"].mean()), 3),
+        "total_median": round(float(total.median()), 3),
+        "total_missing_rate": round(float(total.isna().mean()), 5),
+        "corr_tenure_total": round(float(df["tenure"].corr(total)), 4),
+        "corr_tenure_churn": round(float(df["tenure"].corr(churn.astype(float))), 4),
+        "corr_monthly_churn": round(float(df["MonthlyCharges"].corr(churn.astype(float))), 4),
+        "churn_rate_by_contract": churn.groupby(df["Contract"]).mean().round(4).to_dict(),
+        "churn_rate_by_internet": churn.groupby(df["InternetService"]).mean().round(4).to_dict(),
+    }
+
+
+def fidelity_report(generated_path: str, data_path: str = None, sample_rows: int = 1_000_000) -> dict:
+    """summary_stats of the source CSV next to those of (the first sample_rows of) a generated file."""
+    if generated_path.endswith(".parquet"):
+        generated = read_parquet_head(generated_path, sample_rows, SUMMARY_COLUMNS)
+    else:
+        generated = pd.read_csv(generated_path, nrows=sample_rows, usecols=SUMMARY_COLUMNS)
+    source = pd.read_csv(data_path or DATA_PATH, usecols=SUMMARY_COLUMNS)
+    return {"source": summary_stats(source), "synthetic": summary_stats(generated)}
+
+
+def read_parquet_head(path: str, n_rows: int, columns: list = None) -> pd.DataFrame:
+    """The first n_rows of a Parquet file, reading record batches only until they are covered."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    parquet = pq.ParquetFile(path)
+    batches, n_read = [], 0
+    for batch in parquet.iter_batches(batch_size=BLOCK_ROWS, columns=columns):
+        batches.append(batch)
+        n_read += batch.num_rows
+        if n_read >= n_rows:
+            break
+    schema = parquet.schema_arrow if columns is None else pa.schema([parquet.schema_arrow.field(c) for c in columns])
+    return pa.Table.from_batches(batches, schema=schema).to_pandas().head(n_rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate synthetic customers in the churn.csv schema.")
+    parser.add_argument("n_rows", type=int, help="Number of rows to generate")
+    parser.add_argument("output_path", help="Output .csv or .parquet file")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--source", default=None, help="CSV to learn from (default: data/churn.csv)")
+    parser.add_argument("--report", action="store_true", help="Print source vs synthetic summary statistics")
+    args = parser.parse_args()
+    generator = SyntheticChurnGenerator(seed=args.seed).fit(args.source)
+    path = generator.write(args.n_rows, args.output_path)
+    print(f"Wrote {args.n_rows} rows -> {path}")
+    if args.report:
+        print(json.dumps(fidelity_report(path, args.source), indent=2))
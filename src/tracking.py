@@ -0,0 +1,301 @@
+"""
+Customer Churn Prediction - Experiment Tracking
+===============================================
+Batched, asynchronous MLflow logging, so training does not wait on the
+tracking store.
+
+RunLogger.log_run(run_name, params, metrics, model) records one finished
+model as an MLflow run. Depending on mode:
+- "async" (default): the run is queued and returns at once. A background
+  thread creates it and writes all params and metrics in log_batch calls
+  (one request per 100 params / 1000 metrics instead of one per value).
+- "sync": the same batched calls, made inline (e.g. for debugging).
+- "offline": nothing is sent. The run is appended to
+  data/tracking/runs.jsonl (its model saved with joblib next to it) and
+  replayed into the tracking store later with sync_offline().
+
+Model artifacts (mlflow.sklearn.log_model, several seconds each even on a
+local store, nearly all of it inferring pip requirements, which is done
+once per model library and version and cached) are logged by the background thread after every
+queued run's params and metrics: log_models="deferred". log_models="none" skips
+them. close() waits for the queue to drain and returns a summary; logging
+failures are reported as warnings and never stop training.
+
+Run from project root: python src/tracking.py --sync   (replay offline runs)
+"""
+
+import os
+import sys
+import json
+import time
+import uuid
+import queue
+import atexit
+import argparse
+import threading
+import warnings
+import joblib
+
+# Ensure project root is on path so "from src.preprocessing" works when running python src/tracking.py
+_PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, _PROJECT_ROOT)
+from src.preprocessing import PROJECT_ROOT
+
+# ---------------------------------------------------------------------------
+# Config
+# ---------------------------------------------------------------------------
+TRACKING_MODE = "async"
+LOG_MODELS = "deferred"
+OFFLINE_DIR = os.path.join(PROJECT_ROOT, "data", "tracking")
+OFFLINE_RUNS_FILE = "runs.jsonl"
+SYNCED_RUNS_FILE = "runs.synced.jsonl"
+# pip requirements inferred by MLflow per model library (see model_requirements)
+REQUIREMENTS_CACHE = os.path.join(OFFLINE_DIR, "requirements.json")
+# MLflow's log_batch limits
+MAX_PARAMS_PER_BATCH = 100
+MAX_METRICS_PER_BATCH = 1000
+_STOP = object()
+
+
+def _requirements_key(library: str) -> str:
+    from importlib.metadata import packages_distributions, version
+
+    dist = (packages_distributions().get(library) or [library])[0]
+    return f"{library}=={version(dist)};python{sys.version_info.major}.{sys.version_info.minor}"
+
+
+def model_requirements(library: str, path: str = None) -> list:
+    """
+    pip requirements MLflow inferred earlier for models of this library (None if not cached).
+    Inference loads the model in a subprocess (~5 s, nearly all of log_model's time) and
+    only depends on the library, its version and the Python version.
+    """
+    path = path or REQUIREMENTS_CACHE
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f).get(_requirements_key(library))
+
+
+def save_model_requirements(library: str, requirements: list, path: str = None) -> None:
+    path = path or REQUIREMENTS_CACHE
+    cached = {}
+    if os.path.exists(path):
+        with open(path) as f:
+            cached = json.load(f)
+    cached[_requirements_key(library)] = requirements
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(cached, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+class RunLogger:
+    """Queue of finished runs for one MLflow experiment (see module docstring)."""
+
+    def __init__(self, experiment: str, mode: str = TRACKING_MODE, log_models: str = LOG_MODELS,
+                 offline_dir: str = None):
+        if mode not in ("async", "sync", "offline"):
+            raise ValueError(f"tracking mode must be 'async', 'sync' or 'offline', got {mode!r}")
+        if log_models not in ("deferred", "none"):
+            raise ValueError(f"log_models must be 'deferred' or 'none', got {log_models!r}")
+        self.experiment = experiment
+        self.mode = mode
+        self.log_models = log_models
+        self.offline_dir = offline_dir or OFFLINE_DIR
+        self.runs_logged = 0
+        self.models_logged = 0
+        self.failures = 0
+        self.logging_seconds = 0.0
+        self._client = None
+        self._experiment_id = None
+        self._deferred = []
+        self._queue = None
+        self._thread = None
+        self._closed = False
+        if mode == "async":
+            self._queue = queue.Queue()
+            self._thread = threading.Thread(target=self._worker, name="mlflow-logger", daemon=True)
+            self._thread.start()
+            # Pending runs are still written if the caller exits (or fails) without close()
+            atexit.register(self.close)
+
+    def __enter__(self) -> "RunLogger":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    # -- public API ----------------------------------------------------------
+    def log_run(self, run_name: str, params: dict = None, metrics: dict = None, model=None,
+                dicts: dict = None) -> None:
+        """Record one run: params, metrics, an optional sklearn-compatible model and JSON artifacts."""
+        if self._closed:
+            raise RuntimeError("RunLogger is closed")
+        record = {
+            "experiment": self.experiment,
+            "run_name": run_name,
+            "params": {k: str(v) for k, v in (params or {}).items()},
+            "metrics": {k: float(v) for k, v in (metrics or {}).items()},
+            "dicts": dicts or {},
+            "timestamp": int(time.time() * 1000),
+        }
+        if model is not None and self.log_models == "none":
+            model = None
+        if self.mode == "offline":
+            self._write_offline(record, model)
+        elif self.mode == "sync":
+            self._guarded(self._log_record, record, model)
+            self._flush_models()
+        else:
+            self._queue.put((record, model))
+
+    def close(self) -> dict:
+        """Wait until every queued run (and deferred model) is logged. Returns a summary."""
+        start = time.perf_counter()
+        if not self._closed:
+            self._closed = True
+            if self._thread is not None:
+                self._queue.put(_STOP)
+                self._thread.join()
+                atexit.unregister(self.close)
+        return {
+            "mode": self.mode,
+            "runs": self.runs_logged,
+            "models": self.models_logged,
+            "failures": self.failures,
+            "logging_seconds": round(self.logging_seconds, 3),
+            "close_wait_seconds": round(time.perf_counter() - start, 3),
+        }
+
+    # -- MLflow --------------------------------------------------------------
+    def _experiment(self) -> str:
+        if self._experiment_id is None:
+            from mlflow.tracking import MlflowClient
+
+            self._client = MlflowClient()
+            experiment = self._client.get_experiment_by_name(self.experiment)
+            self._experiment_id = (
+                experiment.experiment_id if experiment is not None
+                else self._client.create_experiment(self.experiment)
+            )
+        return self._experiment_id
+
+    def _log_record(self, record: dict, model) -> None:
+        from mlflow.entities import Metric, Param
+
+        experiment_id = self._experiment()
+        run = self._client.create_run(experiment_id, start_time=record["timestamp"], run_name=record["run_name"])
+        run_id = run.info.run_id
+        params = [Param(k, v) for k, v in record["params"].items()]
+        metrics = [Metric(k, v, record["timestamp"], 0) for k, v in record["metrics"].items()]
+        for i in range(0, len(params), MAX_PARAMS_PER_BATCH):
+            self._client.log_batch(run_id, params=params[i:i + MAX_PARAMS_PER_BATCH])
+        for i in range(0, len(metrics), MAX_METRICS_PER_BATCH):
+            self._client.log_batch(run_id, metrics=metrics[i:i + MAX_METRICS_PER_BATCH])
+        for artifact_file, dictionary in record["dicts"].items():
+            self._client.log_dict(run_id, dictionary, artifact_file)
+        self.runs_logged += 1
+        if model is None:
+            self._client.set_terminated(run_id)
+        else:
+            # The run stays open until its model is logged, after every queued run's metrics
+            self._deferred.append((run_id, model))
+
+    def _log_model(self, run_id: str, model) -> None:
+        import mlflow
+        import mlflow.sklearn
+        import mlflow.pyfunc
+
+        # The active-run stack is per thread, so this does not touch the caller's runs
+        library = type(model).__module__.split(".")[0]
+        known = model_requirements(library)
+        with mlflow.start_run(run_id=run_id):
+            info = mlflow.sklearn.log_model(model, "model", pip_requirements=known)
+        if known is None:
+            with open(mlflow.pyfunc.get_model_dependencies(info.model_uri)) as f:
+                save_model_requirements(library, [line.strip() for line in f if line.strip()])
+        self.models_logged += 1
+
+    def _flush_models(self) -> None:
+        while self._deferred:
+            run_id, model = self._deferred.pop(0)
+            self._guarded(self._log_model, run_id, model)
+
+    def _guarded(self, fn, *args) -> None:
+        start = time.perf_counter()
+        try:
+            fn(*args)
+        except Exception as exc:  # tracking must never fail training
+            self.failures += 1
+            warnings.warn(f"MLflow logging failed ({fn.__name__}): {exc!r}")
+        self.logging_seconds += time.perf_counter() - start
+
+    def _worker(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                break
+            self._guarded(self._log_record, *item)
+            if self._queue.empty():
+                # Idle: upload models of runs whose metrics are all in
+                self._flush_models()
+        self._flush_models()
+
+    # -- offline -------------------------------------------------------------
+    def _write_offline(self, record: dict, model) -> None:
+        os.makedirs(self.offline_dir, exist_ok=True)
+        if model is not None:
+            model_file = os.path.join("models", f"{uuid.uuid4().hex}.joblib")
+            os.makedirs(os.path.join(self.offline_dir, "models"), exist_ok=True)
+            joblib.dump(model, os.path.join(self.offline_dir, model_file))
+            record = {**record, "model_file": model_file}
+        with open(os.path.join(self.offline_dir, OFFLINE_RUNS_FILE), "a") as f:
+            f.write(json.dumps(record) + "\n")
+        self.runs_logged += 1
+        self.models_logged += model is not None
+
+
+def sync_offline(offline_dir: str = None, log_models: str = LOG_MODELS) -> dict:
+    """
+    Replay runs written in offline mode into the current MLflow tracking store.
+    Replayed runs move to runs.synced.jsonl; runs that fail stay for the next sync.
+    """
+    offline_dir = offline_dir or OFFLINE_DIR
+    path = os.path.join(offline_dir, OFFLINE_RUNS_FILE)
+    if not os.path.exists(path):
+        return {"synced": 0, "failed": 0}
+    with open(path) as f:
+        records = [json.loads(line) for line in f if line.strip()]
+    synced, failed = [], []
+    for record in records:
+        model_file = record.get("model_file")
+        logger = RunLogger(record["experiment"], mode="sync", log_models=log_models)
+        model = joblib.load(os.path.join(offline_dir, model_file)) if model_file else None
+        logger.log_run(record["run_name"], record["params"], record["metrics"], model, record["dicts"])
+        (failed if logger.failures else synced).append(record)
+    with open(os.path.join(offline_dir, SYNCED_RUNS_FILE), "a") as f:
+        for record in synced:
+            f.write(json.dumps(record) + "\n")
+            if record.get("model_file"):
+                # Now an MLflow artifact
+                os.remove(os.path.join(offline_dir, record["model_file"]))
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        for record in failed:
+            f.write(json.dumps(record) + "\n")
+    os.replace(tmp_path, path)
+    return {"synced": len(synced), "failed": len(failed)}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay offline MLflow runs into the tracking store.")
+    parser.add_argument("--sync", action="store_true", help="Log the runs in data/tracking/ to MLflow")
+    parser.add_argument("--offline-dir", default=None)
+    args = parser.parse_args()
+    if args.sync:
+        print(json.dumps(sync_offline(args.offline_dir), indent=2))
+    else:
+        parser.print_help()
@@ -2,10 +2,11 @@
 Customer Churn Prediction - Model Training
 ==========================================
 Step 3: SMOTE on training data only (handle class imbalance)
-Step 4: Train Logistic Regression, Random Forest, XGBoost; compare metrics
-Step 5: Hyperparameter tuning (RandomizedSearchCV) on XGBoost
+Step 4: Train Logistic Regression, Random Forest, XGBoost (concurrently); compare metrics
+Step 5: Hyperparameter tuning on XGBoost (successive halving, random search or TPE, resumable;
+        every XGBoost fit stops early on a validation split of the resampled training set)
 Step 6: MLflow experiment tracking for all runs
-Step 8: Save best model, scaler, and feature_columns.json for the API
+Step 8: Save best model, feature pipeline, and feature_columns.json for the API
 
 Run from project root: python src/train.py
 """
@@ -13,10 +14,13 @@ Run from project root: python src/train.py
 import os
 import sys
 import json
+import time
+from contextlib import nullcontext
+from typing import Tuple
 import joblib
 import numpy as np
 import pandas as pd
-from sklearn.model_selection import train_test_split, RandomizedSearchCV
+from sklearn.model_selection import train_test_split
 from sklearn.linear_model import LogisticRegression
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.metrics import (
@@ -28,14 +32,17 @@ from sklearn.metrics import (
 )
 from xgboost import XGBClassifier
 from imblearn.over_sampling import SMOTE
-import mlflow
-import mlflow.sklearn
 
 # Ensure project root is on path so "from src.preprocessing" works when running python src/train.py
 _PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 if _PROJECT_ROOT not in sys.path:
     sys.path.insert(0, _PROJECT_ROOT)
-from src.preprocessing import preprocess, get_feature_matrix_and_target, MODELS_DIR
+from src.preprocessing import preprocess, get_feature_matrix_and_target, as_model_matrix, MODELS_DIR
+from src.cache import cached_preprocess
+from src.feature_store import fit_resample_cached, open_matrix
+from src.instrumentation import StageProfiler
+from src.search import run_search, take_rows, SEARCH_DIR
+from src.tracking import RunLogger, TRACKING_MODE
 
 # ---------------------------------------------------------------------------
 # Paths and config
@@ -44,6 +51,55 @@ PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 RANDOM_STATE = 42
 TEST_SIZE = 0.2
 MLFLOW_EXPERIMENT = "churn-prediction"
+# uint8/float32 feature matrix instead of float64 (models then train on float32)
+COMPACT_FEATURES = False
+# scipy.sparse CSR feature matrix instead of a dense DataFrame (LR, RF, XGBoost and SMOTE accept CSR)
+SPARSE_FEATURES = False
+# Name of the memory-mapped SMOTE training matrix in data/feature_store/ (shared by all fits and search
+# workers, and reused by later runs while the split and SMOTE parameters are unchanged)
+TRAIN_MATRIX = "train_resampled"
+# Record per-stage preprocessing timings/memory and log them to MLflow (run "preprocessing_profile")
+PROFILE_PREPROCESSING = False
+# Cores for training the three baseline models side by side (-1: all; 1: one after another)
+BASELINE_N_JOBS = -1
+# Below this many training rows the fits are shorter than starting the worker processes
+# (~4-5 s to import this module in each), so the models are trained one after another
+BASELINE_PARALLEL_MIN_ROWS = 50_000
+# XGBoost: histogram tree method, threads per fit (None: all cores) and early stopping on a
+# validation split of the real training rows, held out before SMOTE (see validation_split).
+# n_estimators is the cap.
+XGB_TREE_METHOD = "hist"
+XGB_N_JOBS = None
+EARLY_STOPPING_ROUNDS = 20
+VALIDATION_SIZE = 0.1
+# Feature store name of the XGBoost fit rows (the training rows minus the validation split, resampled)
+XGB_FIT_MATRIX = "train_resampled_fit"
+# XGBoost tuning (src/search.py, trials checkpointed to data/search/): "halving" (successive
+# halving over training rows), "random" (the same 20 x 5 candidates as RandomizedSearchCV)
+# or "tpe" (Bayesian optimization over TPE_SPACE)
+SEARCH_MODE = "halving"
+SEARCH_CV = 5
+RANDOM_SEARCH_ITER = 20
+# Halving budget in full-data CV fits (a fit on 1/3 of the rows counts 1/3); the random search costs 100
+SEARCH_BUDGET_FITS = 20
+HALVING_FACTOR = 3
+# Most halving rounds; fewer are used when the budget cannot pay for factor^(rounds-1) candidates
+HALVING_ROUNDS = 4
+# TPE: continuous ranges ("log": sampled on a log scale), trials of SEARCH_CV fits each, the
+# first TPE_STARTUP uniform. n_estimators is a cap, early stopping picks the tree count.
+TPE_SPACE = {
+    "n_estimators": ("int", 50, 400),
+    "max_depth": ("int", 3, 10),
+    "learning_rate": ("log", 0.01, 0.3),
+    "subsample": ("float", 0.5, 1.0),
+    "colsample_bytree": ("float", 0.5, 1.0),
+}
+TPE_TRIALS = 12
+TPE_STARTUP = 6
+# Warm-start retraining (src/retrain.py) continues the best XGBoost model of the last full
+# training; the retrain state records that training and the updates applied since
+XGB_MODEL_PATH = os.path.join(MODELS_DIR, "xgb_model.joblib")
+RETRAIN_STATE_PATH = os.path.join(MODELS_DIR, "retrain_state.json")
 
 
 def get_metrics(y_true, y_pred, y_proba=None):
@@ -64,49 +120,244 @@ def get_metrics(y_true, y_pred, y_proba=None):
     return metrics
 
 
-def train_and_log_model(name, model, X_train, y_train, X_test, y_test, run_name=None):
+def fit_and_evaluate(model, X_train, y_train, X_test, y_test, n_jobs: int = None, fit_params: dict = None):
+    """
+    Train a model and evaluate it on the test set (no MLflow; safe to run in a worker process).
+    n_jobs, if given, is the thread count for this fit; the model's own setting is restored afterwards.
+    fit_params are passed to model.fit (e.g. the XGBoost eval_set for early stopping).
+    Returns (trained_model, metrics_dict, fit_seconds).
+    """
+    own_n_jobs = model.get_params().get("n_jobs")
+    if n_jobs is not None and "n_jobs" in model.get_params():
+        model.set_params(n_jobs=n_jobs)
+    start = time.perf_counter()
+    model.fit(X_train, y_train, **(fit_params or {}))
+    fit_seconds = time.perf_counter() - start
+    if n_jobs is not None and "n_jobs" in model.get_params():
+        model.set_params(n_jobs=own_n_jobs)
+    y_pred = model.predict(X_test)
+    y_proba = model.predict_proba(X_test)[:, 1] if hasattr(model, "predict_proba") else None
+    return model, get_metrics(y_test, y_pred, y_proba), fit_seconds
+
+
+def log_model_run(name, model, metrics, fit_seconds=None, run_name=None, tracker: RunLogger = None):
+    """
+    Record one trained model as its own MLflow run (params, test metrics, model artifact).
+    With a tracker the run is queued (see src/tracking.py); without one it is logged inline.
+    """
+    params = {"model_name": name}
+    metrics = dict(metrics)
+    if fit_seconds is not None:
+        metrics["fit_seconds"] = fit_seconds
+    if stopped_trees(model) is not None:
+        metrics["n_trees"] = stopped_trees(model)
+        params["early_stopping_rounds"] = model.get_params()["early_stopping_rounds"]
+    # The model artifact works for sklearn-compatible estimators including XGBoost
+    (tracker or RunLogger(MLFLOW_EXPERIMENT, mode="sync")).log_run(run_name or name, params, metrics, model)
+
+
+def stopped_trees(model):
+    """Trees up to the best validation round of an early-stopped XGBoost model (None otherwise)."""
+    try:
+        return model.best_iteration + 1
+    except AttributeError:
+        return None
+
+
+def make_xgb(**params) -> XGBClassifier:
+    """
+    XGBClassifier with the configured tree method and threads that stops once ROC-AUC
+    on the eval_set (the model selection metric) has not improved for EARLY_STOPPING_ROUNDS.
+    """
+    return XGBClassifier(
+        tree_method=XGB_TREE_METHOD,
+        n_jobs=XGB_N_JOBS,
+        early_stopping_rounds=EARLY_STOPPING_ROUNDS,
+        eval_metric="auc",
+        random_state=RANDOM_STATE,
+        **params,
+    )
+
+
+def validation_split(y, size: float = VALIDATION_SIZE):
+    """
+    (fit_rows, val_rows) positions in the real training rows: a stratified share `size`
+    for early stopping and the rest, which is then SMOTE-resampled for fitting. The split
+    comes before SMOTE so that no synthetic point interpolated from a validation row is
+    fitted on; a validation score on rows the model has (nearly) seen stops far too late.
+    """
+    labels = np.asarray(y)
+    fit_rows, val_rows = train_test_split(
+        np.arange(len(labels)), test_size=size, random_state=RANDOM_STATE, stratify=labels
+    )
+    return np.sort(fit_rows), np.sort(val_rows)
+
+
+def train_and_log_model(name, model, X_train, y_train, X_test, y_test, run_name=None, tracker=None):
     """
     Train a model, evaluate on test set, and log to MLflow.
     Returns (trained_model, metrics_dict).
     """
-    with mlflow.start_run(run_name=run_name or name):
-        mlflow.log_param("model_name", name)
-        model.fit(X_train, y_train)
-        y_pred = model.predict(X_test)
-        y_proba = model.predict_proba(X_test)[:, 1] if hasattr(model, "predict_proba") else None
-        metrics = get_metrics(y_test, y_pred, y_proba)
-        for k, v in metrics.items():
-            mlflow.log_metric(k, v)
-        # Log the model artifact (works for sklearn-compatible estimators including XGBoost)
-        mlflow.sklearn.log_model(model, "model")
-        return model, metrics
+    model, metrics, fit_seconds = fit_and_evaluate(model, X_train, y_train, X_test, y_test)
+    log_model_run(name, model, metrics, fit_seconds, run_name, tracker)
+    return model, metrics
+
+
+def split_cores(n_cores: int, threaded: list, serial: list) -> dict:
+    """
+    Threads per model when they train side by side: 1 for each serial model
+    (e.g. lbfgs LogisticRegression), the remaining cores shared evenly by the
+    multi-threaded ones (at least 1 each).
+    """
+    cores = {name: 1 for name in serial}
+    if not threaded:
+        return cores
+    spare = max(n_cores - len(serial), len(threaded))
+    cores.update({name: spare // len(threaded) for name in threaded})
+    for name in threaded[: spare % len(threaded)]:
+        cores[name] += 1
+    return cores
 
 
-def main():
+def train_baselines(
+    jobs: dict,
+    X_test,
+    y_test,
+    n_jobs: int = BASELINE_N_JOBS,
+    serial=(),
+    min_rows: int = BASELINE_PARALLEL_MIN_ROWS,
+    tracker: RunLogger = None,
+) -> dict:
+    """
+    Train and evaluate the baseline models concurrently and log each to its own MLflow run.
+    jobs maps name -> (model, X_train, y_train, fit_params or None). With n_jobs cores (-1: all available) and
+    more than one core, each model runs in its own loky worker process with its share of
+    the cores (split_cores); memory-mapped training matrices are mapped, not copied, by
+    the workers. With one core, or fewer than min_rows training rows, the models train
+    one after another in this process.
+    MLflow runs are recorded here (queued on tracker when given), in the order of jobs,
+    once all models are done.
+    Returns name -> (trained_model, metrics_dict).
+    """
+    n_cores = joblib.cpu_count() if n_jobs is None or n_jobs < 0 else n_jobs
+    names = list(jobs)
+    start = time.perf_counter()
+    n_rows = max(X_tr.shape[0] for _, X_tr, _, _ in jobs.values())
+    if n_cores < 2 or len(names) < 2 or n_rows < min_rows:
+        fitted = [
+            fit_and_evaluate(model, X_tr, y_tr, X_test, y_test, fit_params=params)
+            for model, X_tr, y_tr, params in jobs.values()
+        ]
+    else:
+        cores = split_cores(n_cores, [n for n in names if n not in serial], [n for n in names if n in serial])
+        print(f"  Training {len(names)} models in parallel on {n_cores} cores: {cores}")
+        fitted = joblib.Parallel(n_jobs=len(names), backend="loky")(
+            joblib.delayed(fit_and_evaluate)(
+                model, X_tr, y_tr, X_test, y_test, None if name in serial else cores[name], params
+            )
+            for name, (model, X_tr, y_tr, params) in jobs.items()
+        )
+    print(f"  Trained {len(names)} models in {time.perf_counter() - start:.1f}s "
+          f"(fit times: {', '.join(f'{n} {f[2]:.1f}s' for n, f in zip(names, fitted))})")
+    results = {}
+    for name, (model, metrics, fit_seconds) in zip(names, fitted):
+        log_model_run(name, model, metrics, fit_seconds, tracker=tracker)
+        results[name] = (model, metrics)
+    return results
+
+
+def halving_plan(budget_fits: float, cv: int = SEARCH_CV, factor: int = HALVING_FACTOR,
+                 max_rounds: int = HALVING_ROUNDS) -> Tuple[int, int]:
+    """
+    (candidates, rounds) for successive halving so that all CV fits, weighted by
+    the share of training rows each uses, add up to at most about budget_fits full-data fits.
+    Round i keeps n / factor^i candidates on rows / factor^(rounds-1-i), so every
+    round costs n * cv / factor^(rounds-1) full fits. Rounds are dropped (down to a
+    plain search on all rows) until at least factor^(rounds-1) candidates fit the budget.
+    Raises ValueError if the budget is below one candidate's cv full fits.
+    """
+    if budget_fits < cv:
+        raise ValueError(f"Search budget of {budget_fits} fits is below one candidate's {cv} CV fits")
+    for rounds in range(max_rounds, 0, -1):
+        n_candidates = int(budget_fits * factor ** (rounds - 1) / (rounds * cv))
+        if n_candidates >= factor ** (rounds - 1):
+            return n_candidates, rounds
+
+
+def main(
+    compact: bool = COMPACT_FEATURES,
+    sparse_features: bool = SPARSE_FEATURES,
+    profile_preprocessing: bool = PROFILE_PREPROCESSING,
+    n_jobs: int = BASELINE_N_JOBS,
+    search_mode: str = SEARCH_MODE,
+    search_budget: float = SEARCH_BUDGET_FITS,
+    tracking_mode: str = TRACKING_MODE,
+    data_path: str = None,
+):
     # -----------------------------------------------------------------------
     # Load preprocessed data and split
     # -----------------------------------------------------------------------
     print("Loading and preprocessing data...")
-    df_clean, scaler = preprocess(save_scaler=True)  # Ensures scaler is saved
-    X, y = get_feature_matrix_and_target(df_clean)
-    feature_columns = list(X.columns)
+    profiler = StageProfiler()
+    with profiler if profile_preprocessing else nullcontext():
+        if sparse_features:
+            df_clean, pipeline = preprocess(data_path, save_pipeline=True, compact=compact, sparse_output=True)
+        else:
+            # Reuses the cached feature matrix when churn.csv and the preprocessing are unchanged
+            df_clean, pipeline = cached_preprocess(data_path, save_pipeline=True)  # Ensures feature pipeline is saved
+    X, y = get_feature_matrix_and_target(df_clean, compact=compact)
+    feature_columns = list(pipeline.feature_columns_)
 
     X_train, X_test, y_train, y_test = train_test_split(
         X, y, test_size=TEST_SIZE, random_state=RANDOM_STATE, stratify=y
     )
+    if compact and not sparse_features:
+        # One float32 cast of the uint8/float32 split; SMOTE and all models keep float32
+        X_train, X_test = as_model_matrix(X_train), as_model_matrix(X_test)
 
     # -----------------------------------------------------------------------
     # Step 3: SMOTE on training data only (never on test)
     # -----------------------------------------------------------------------
     print("Applying SMOTE to training set (minority oversampling)...")
     smote = SMOTE(random_state=RANDOM_STATE, k_neighbors=5)
-    X_train_resampled, y_train_resampled = smote.fit_resample(X_train, y_train)
+    # The resampled matrix is written once and reopened memory-mapped: search workers map
+    # the file instead of receiving pickled copies. RF and XGBoost train on float32
+    # internally, so they get the stored float32 copy (same models, no per-fit conversion).
+    # It is keyed by the training split, labels and SMOTE parameters, so reruns that only
+    # change model settings skip the k-NN search entirely.
+    if sparse_features:
+        X_train_resampled, y_train_resampled = smote.fit_resample(X_train, y_train)
+        X_train_trees = X_train_resampled
+    else:
+        X_train_resampled, y_train_resampled = fit_resample_cached(smote, X_train, y_train, TRAIN_MATRIX)
+        X_train_trees, _ = open_matrix(TRAIN_MATRIX, dtype=np.float32)
     print(f"  Train after SMOTE: {X_train_resampled.shape[0]} samples (was {X_train.shape[0]})")
 
+    # XGBoost fits stop early on real training rows held out before SMOTE; the rest is
+    # resampled on its own (cached and memory-mapped from the feature store like the full matrix)
+    fit_rows, val_rows = validation_split(y_train)
+    X_val, y_val = take_rows(X_train, val_rows), take_rows(y_train, val_rows)
+    X_fit, y_fit = take_rows(X_train, fit_rows), take_rows(y_train, fit_rows)
+    if sparse_features:
+        X_xgb, y_xgb = smote.fit_resample(X_fit, y_fit)
+    else:
+        _, y_xgb = fit_resample_cached(smote, X_fit, y_fit, XGB_FIT_MATRIX)
+        X_xgb, _ = open_matrix(XGB_FIT_MATRIX, dtype=np.float32)
+        X_val = as_model_matrix(X_val)
+    xgb_fit_params = {"eval_set": [(X_val, y_val)], "verbose": False}
+
     # -----------------------------------------------------------------------
     # Step 6: MLflow experiment
     # -----------------------------------------------------------------------
-    mlflow.set_experiment(MLFLOW_EXPERIMENT)
+    # Runs are queued and written by a background thread in batches; training only waits
+    # for what is still pending at the end ("offline": written locally, see src/tracking.py)
+    tracker = RunLogger(MLFLOW_EXPERIMENT, mode=tracking_mode)
+    if profile_preprocessing:
+        tracker.log_run(
+            "preprocessing_profile",
+            metrics=profiler.mlflow_metrics(),
+            dicts={"preprocessing_profile.json": profiler.report()},
+        )
 
     # -----------------------------------------------------------------------
     # Step 4: Train and compare three models (each in its own MLflow run)
@@ -114,28 +365,26 @@ def main():
     print("\nTraining models and logging to MLflow...")
     results = {}
 
-    # 1. Logistic Regression
+    # 1. Logistic Regression, 2. Random Forest, 3. XGBoost (baseline for tuning)
     lr = LogisticRegression(max_iter=1000, random_state=RANDOM_STATE)
-    lr_model, results["Logistic Regression"] = train_and_log_model(
-        "Logistic Regression", lr, X_train_resampled, y_train_resampled, X_test, y_test
-    )
-
-    # 2. Random Forest
     rf = RandomForestClassifier(n_estimators=100, random_state=RANDOM_STATE)
-    rf_model, results["Random Forest"] = train_and_log_model(
-        "Random Forest", rf, X_train_resampled, y_train_resampled, X_test, y_test
-    )
-
-    # 3. XGBoost (baseline for tuning)
-    xgb = XGBClassifier(
-        n_estimators=100,
-        max_depth=6,
-        learning_rate=0.1,
-        random_state=RANDOM_STATE,
-    )
-    xgb_model, results["XGBoost"] = train_and_log_model(
-        "XGBoost", xgb, X_train_resampled, y_train_resampled, X_test, y_test
+    xgb = make_xgb(n_estimators=100, max_depth=6, learning_rate=0.1)
+    # Trained concurrently (each in its own process and MLflow run); lbfgs LR is single-threaded
+    trained = train_baselines(
+        {
+            "Logistic Regression": (lr, X_train_resampled, y_train_resampled, None),
+            "Random Forest": (rf, X_train_trees, y_train_resampled, None),
+            "XGBoost": (xgb, X_xgb, y_xgb, xgb_fit_params),
+        },
+        X_test,
+        y_test,
+        n_jobs=n_jobs,
+        serial=["Logistic Regression"],
+        tracker=tracker,
     )
+    lr_model, results["Logistic Regression"] = trained["Logistic Regression"]
+    rf_model, results["Random Forest"] = trained["Random Forest"]
+    xgb_model, results["XGBoost"] = trained["XGBoost"]
 
     # -----------------------------------------------------------------------
     # Print comparison table
@@ -157,42 +406,73 @@ def main():
     # -----------------------------------------------------------------------
     # Step 5: Hyperparameter tuning for XGBoost
     # -----------------------------------------------------------------------
-    print("\nRunning RandomizedSearchCV for XGBoost...")
     param_dist = {
         "n_estimators": [50, 100, 200, 300],
         "max_depth": [3, 4, 5, 6, 8],
         "learning_rate": [0.01, 0.05, 0.1, 0.2],
         "subsample": [0.6, 0.8, 1.0],
     }
-    xgb_tune = XGBClassifier(random_state=RANDOM_STATE)
-    search = RandomizedSearchCV(
+    xgb_tune = make_xgb()
+    print(f"\nRunning {search_mode} search for XGBoost (trials checkpointed to {SEARCH_DIR})...")
+    n_candidates, rounds = None, HALVING_ROUNDS
+    if search_mode == "halving":
+        n_candidates, rounds = halving_plan(search_budget)
+        print(f"  {n_candidates} candidates over {rounds} round(s) within {search_budget} full-data fits")
+    search_start = time.perf_counter()
+    # Every candidate and CV fold (and the refit) stops early on the same validation split.
+    # Finished trials are on disk, so a rerun after a crash resumes instead of starting over.
+    search = run_search(
         xgb_tune,
-        param_distributions=param_dist,
-        n_iter=20,
-        cv=5,
+        param_dist,
+        X_xgb,
+        y_xgb,
+        mode=search_mode,
+        n_candidates=n_candidates,
+        n_iter=RANDOM_SEARCH_ITER,
+        cv=SEARCH_CV,
+        factor=HALVING_FACTOR,
+        rounds=rounds,
         scoring="roc_auc",
         random_state=RANDOM_STATE,
-        n_jobs=-1,
+        fit_params=xgb_fit_params,
+        space=TPE_SPACE,
+        n_trials=TPE_TRIALS,
+        n_startup=TPE_STARTUP,
     )
-    search.fit(X_train_resampled, y_train_resampled)
+    search_seconds = time.perf_counter() - search_start
+    n_fits = search.n_fits_
+    print(f"  {n_fits} CV fits in {search_seconds:.1f}s, {search.n_reused_} trial(s) reused "
+          f"(best CV ROC-AUC {search.best_score_:.4f}, "
+          f"{stopped_trees(search.best_estimator_)} trees after early stopping)")
     best_xgb = search.best_estimator_
     y_pred_best = best_xgb.predict(X_test)
     y_proba_best = best_xgb.predict_proba(X_test)[:, 1]
     tune_metrics = get_metrics(y_test, y_pred_best, y_proba_best)
 
-    # Log tuned XGBoost run to MLflow
-    with mlflow.start_run(run_name="XGBoost_tuned"):
-        mlflow.log_param("model_name", "XGBoost_tuned")
-        for k, v in search.best_params_.items():
-            mlflow.log_param(f"best_{k}", v)
-        for k, v in tune_metrics.items():
-            mlflow.log_metric(k, v)
-        mlflow.sklearn.log_model(best_xgb, "model")
+    # Log tuned XGBoost run to MLflow (one batch of params and one of metrics)
+    tracker.log_run(
+        "XGBoost_tuned",
+        params={
+            "model_name": "XGBoost_tuned",
+            "search_mode": search_mode,
+            "early_stopping_rounds": EARLY_STOPPING_ROUNDS,
+            **{f"best_{k}": v for k, v in search.best_params_.items()},
+        },
+        metrics={
+            "search_seconds": search_seconds,
+            "search_fits": n_fits,
+            "search_trials_reused": search.n_reused_,
+            "n_trees": stopped_trees(best_xgb),
+            **tune_metrics,
+        },
+        model=best_xgb,
+    )
 
     # Overall best: compare baseline best vs tuned XGBoost
     if tune_metrics["roc_auc"] > best_roc:
         final_model = best_xgb
         best_name = "XGBoost_tuned"
+        best_roc = tune_metrics["roc_auc"]
         print(f"  Using tuned XGBoost (ROC-AUC: {tune_metrics['roc_auc']:.4f})")
     else:
         print(f"  Keeping {best_name} as best (tuned XGBoost did not improve)")
@@ -204,12 +484,39 @@ def main():
     model_path = os.path.join(MODELS_DIR, "churn_model.joblib")
     joblib.dump(final_model, model_path)
     print(f"\nSaved best model to {model_path}")
+    # The API's serving statistics are only replaced together with the model they encode for
+    manifest_path = pipeline.save_manifest()
+    print(f"Saved training manifest to {manifest_path}")
+
+    # The better XGBoost (tuned or baseline) is kept for warm-start retraining even when
+    # another model is served
+    if tune_metrics["roc_auc"] >= results["XGBoost"]["roc_auc"]:
+        retrain_xgb, retrain_roc = best_xgb, tune_metrics["roc_auc"]
+    else:
+        retrain_xgb, retrain_roc = xgb_model, results["XGBoost"]["roc_auc"]
+    joblib.dump(retrain_xgb, XGB_MODEL_PATH)
+    retrain_state = {
+        "trained_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "served_model": best_name,
+        "served_roc_auc": float(best_roc),
+        "xgb_roc_auc": float(retrain_roc),
+        "train_rows": int(X_train.shape[0]),
+        "warm_updates": [],
+    }
+    with open(RETRAIN_STATE_PATH, "w") as f:
+        json.dump(retrain_state, f, indent=2)
+    print(f"Saved XGBoost for warm-start retraining to {XGB_MODEL_PATH}")
 
     feature_columns_path = os.path.join(MODELS_DIR, "feature_columns.json")
     with open(feature_columns_path, "w") as f:
         json.dump(feature_columns, f, indent=2)
     print(f"Saved feature columns to {feature_columns_path}")
 
+    summary = tracker.close()
+    print(f"MLflow ({summary['mode']}): {summary['runs']} runs, {summary['models']} models, "
+          f"{summary['logging_seconds']:.1f}s of logging, {summary['close_wait_seconds']:.1f}s waited at the end"
+          + (f", {summary['failures']} failed (see warnings)" if summary["failures"] else ""))
+
     print("\nDone. Next: run src/evaluate.py for SHAP explainability, then api/main.py for the API.")
 
 
@@ -0,0 +1,26 @@
+"""Put the project root on sys.path so tests can "from src.<module> import ..." (python -m pytest tests/)."""
+
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+_PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, _PROJECT_ROOT)
+
+from src.preprocessing import DATA_PATH
+
+
+@pytest.fixture
+def churn_csv(tmp_path) -> str:
+    """A 600-row sample of data/churn.csv that keeps every row with a blank TotalCharges."""
+    if not os.path.exists(DATA_PATH):
+        pytest.skip("data/churn.csv not available")
+    df = pd.read_csv(DATA_PATH, dtype=str, keep_default_na=False)
+    blank = df["TotalCharges"].str.strip() == ""
+    sample = pd.concat([df[blank], df[~blank].sample(600 - int(blank.sum()), random_state=0)]).sort_index()
+    path = str(tmp_path / "churn_sample.csv")
+    sample.to_csv(path, index=False)
+    return path
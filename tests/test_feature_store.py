@@ -0,0 +1,36 @@
+"""Memory-mapped feature store: stored matrices must reach joblib/loky workers unchanged."""
+
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import LogisticRegression
+from sklearn.model_selection import cross_val_score
+
+from src.feature_store import write_matrix, open_matrix
+
+
+def _matrix(n_rows: int = 600, n_features: int = 5, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    X = pd.DataFrame(rng.normal(size=(n_rows, n_features)), columns=[f"f{i}" for i in range(n_features)])
+    y = pd.Series((X["f0"] - 0.5 * X["f3"] + rng.normal(scale=0.5, size=n_rows) > 0).astype(int))
+    return X, y
+
+
+def test_open_matrix_round_trip(tmp_path):
+    X, y = _matrix()
+    write_matrix("m", X, y, store_dir=str(tmp_path))
+    X_mm, y_mm = open_matrix("m", store_dir=str(tmp_path))
+    assert list(X_mm.columns) == list(X.columns)
+    np.testing.assert_array_equal(X_mm.to_numpy(), X.to_numpy())
+    np.testing.assert_array_equal(y_mm.to_numpy(), y.to_numpy())
+    X32, _ = open_matrix("m", store_dir=str(tmp_path), dtype=np.float32)
+    np.testing.assert_array_equal(X32.to_numpy(), X.to_numpy().astype(np.float32))
+
+
+def test_multi_worker_fit_matches_in_memory(tmp_path):
+    X, y = _matrix()
+    write_matrix("m", X, y, store_dir=str(tmp_path))
+    X_mm, y_mm = open_matrix("m", store_dir=str(tmp_path))
+    model = LogisticRegression(max_iter=1000)
+    in_memory = cross_val_score(model, X, y, cv=3, scoring="roc_auc", n_jobs=1)
+    mapped = cross_val_score(model, X_mm, y_mm, cv=3, scoring="roc_auc", n_jobs=2)
+    np.testing.assert_allclose(mapped, in_memory)
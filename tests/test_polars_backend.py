@@ -0,0 +1,19 @@
+"""Polars backend: preprocess(backend="polars") must be bit-identical to the pandas backend."""
+
+import os
+
+import pytest
+
+from src.polars_backend import parity_check
+from src.preprocessing import DATA_PATH
+
+pytest.importorskip("polars")
+
+
+def test_parity_on_sample(churn_csv):
+    assert parity_check(churn_csv) == {"rows": 600, "columns": 38, "identical": True}
+
+
+@pytest.mark.skipif(not os.path.exists(DATA_PATH), reason="data/churn.csv not available")
+def test_parity_on_full_data():
+    assert parity_check(DATA_PATH)["identical"]
@@ -0,0 +1,70 @@
+"""ChurnFeaturePipeline parity with the step-by-step reference functions and with the API manifest."""
+
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.preprocessing import (
+    ChurnFeaturePipeline, DATA_PATH, MANIFEST_NAME, TARGET_COLUMN,
+    load_and_clean_data, encode_target, add_engineered_features, encode_binary_columns,
+    one_hot_encode_categorical, scale_numerical_features, preprocess,
+)
+
+pytestmark = pytest.mark.skipif(not os.path.exists(DATA_PATH), reason="data/churn.csv not available")
+
+
+def _reference_matrix() -> pd.DataFrame:
+    df = encode_target(load_and_clean_data(DATA_PATH))
+    df = one_hot_encode_categorical(encode_binary_columns(add_engineered_features(df)))
+    df, _ = scale_numerical_features(df)
+    return df
+
+
+def test_pipeline_matches_step_functions():
+    expected = _reference_matrix()
+    out, pipeline = preprocess(DATA_PATH, save_pipeline=False)
+    assert list(pipeline.feature_columns_) == [c for c in expected.columns if c != TARGET_COLUMN]
+    assert sorted(out.columns) == sorted(expected.columns)
+    np.testing.assert_array_equal(
+        out.to_numpy(dtype=np.float64), expected[out.columns].to_numpy(dtype=np.float64)
+    )
+
+
+def test_manifest_pipeline_transforms_identically(tmp_path):
+    _, pipeline = preprocess(DATA_PATH, save_pipeline=False)
+    manifest_path = pipeline.save_manifest(str(tmp_path / MANIFEST_NAME))
+    served = ChurnFeaturePipeline.from_manifest(manifest_path)
+    assert served.fingerprint() == pipeline.fingerprint()
+    df = encode_target(load_and_clean_data(DATA_PATH))
+    pd.testing.assert_frame_equal(served.transform(df), pipeline.transform(df))
+
+
+def test_save_leaves_manifest_alone(tmp_path):
+    _, pipeline = preprocess(DATA_PATH, save_pipeline=False)
+    path = pipeline.save(str(tmp_path / "feature_pipeline.joblib"))
+    assert os.path.exists(path)
+    # The manifest is the API's serving copy, written only by train.py with the model
+    assert not os.path.exists(tmp_path / MANIFEST_NAME)
+    assert ChurnFeaturePipeline.load(path).fingerprint() == pipeline.fingerprint()
+
+
+def test_column_pruned_preprocess_matches_full():
+    full, _ = preprocess(DATA_PATH, save_pipeline=False)
+    columns = ["tenure", "total_spend", "Contract_Two year", "monthly_charges_bucket_high", "TechSupport"]
+    pruned, pipeline = preprocess(DATA_PATH, columns=columns)
+    assert list(pipeline.feature_columns_) == columns
+    pd.testing.assert_frame_equal(pruned, full[columns + [TARGET_COLUMN]])
+
+
+def test_pruned_pipeline_is_never_saved(tmp_path):
+    _, pipeline = preprocess(DATA_PATH, save_pipeline=False)
+    pruned = pipeline.select_features(["tenure", "TechSupport"])
+    with pytest.raises(ValueError):
+        pruned.save(str(tmp_path / "feature_pipeline.joblib"))
+    with pytest.raises(ValueError):
+        pruned.save_manifest(str(tmp_path / MANIFEST_NAME))
+    with pytest.raises(ValueError):
+        preprocess(DATA_PATH, columns=["tenure"], save_pipeline=True)
+    assert not any(tmp_path.iterdir())
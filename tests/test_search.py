@@ -0,0 +1,68 @@
+"""Hyperparameter search: halving budget plan and the resumable trial store."""
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.tree import DecisionTreeClassifier
+
+from src.search import run_search
+from src.train import halving_plan
+
+
+def _weighted_fits(n_candidates: int, rounds: int, cv: int = 5, factor: int = 3) -> float:
+    fits, n = 0.0, n_candidates
+    for i in range(rounds):
+        fits += n * cv / factor ** (rounds - 1 - i)
+        n = max(1, -(-n // factor))
+    return fits
+
+
+@pytest.mark.parametrize("budget", [5, 8, 10, 15, 20, 100])
+def test_halving_plan_stays_within_budget(budget):
+    n_candidates, rounds = halving_plan(budget, cv=5, factor=3, max_rounds=4)
+    assert n_candidates >= 3 ** (rounds - 1)
+    assert _weighted_fits(n_candidates, rounds) <= budget
+
+
+def test_halving_plan_default_budget_unchanged():
+    assert halving_plan(20, cv=5, factor=3, max_rounds=4) == (27, 4)
+
+
+def test_halving_plan_rejects_budget_below_one_candidate():
+    with pytest.raises(ValueError):
+        halving_plan(4, cv=5)
+
+
+def _problem(n_rows: int = 540, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    X = pd.DataFrame(rng.normal(size=(n_rows, 4)), columns=["a", "b", "c", "d"])
+    y = pd.Series((X["a"] + X["b"] * X["c"] + rng.normal(scale=0.7, size=n_rows) > 0).astype(int))
+    return X, y
+
+
+def _halving(X, y, store_dir, random_state):
+    return run_search(
+        DecisionTreeClassifier(random_state=0), {"max_depth": [1, 2, 3, 4, 5, 6], "min_samples_leaf": [1, 5, 20]},
+        X, y, mode="halving", n_candidates=9, cv=3, factor=3, rounds=3,
+        random_state=random_state, n_jobs=1, store_dir=store_dir,
+    )
+
+
+def test_resumed_search_reuses_every_trial(tmp_path):
+    X, y = _problem()
+    first = _halving(X, y, str(tmp_path), random_state=1)
+    again = _halving(X, y, str(tmp_path), random_state=1)
+    assert again.n_fits_ == 0
+    assert again.n_reused_ == len(first.trials_)
+    assert again.best_params_ == first.best_params_
+
+
+def test_other_seed_does_not_reuse_subset_trials(tmp_path):
+    X, y = _problem()
+    _halving(X, y, str(tmp_path), random_state=1)
+    fresh = _halving(X, y, str(tmp_path / "fresh"), random_state=2)
+    shared = _halving(X, y, str(tmp_path), random_state=2)
+    # Trials scored on another seed's row subsets must not leak into this search
+    assert shared.n_reused_ == 0
+    assert shared.best_params_ == fresh.best_params_
+    assert [t["mean_score"] for t in shared.trials_] == [t["mean_score"] for t in fresh.trials_]
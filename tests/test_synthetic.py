@@ -0,0 +1,28 @@
+"""Synthetic generator: missing source values stay missing; the fidelity report reads only the sample."""
+
+import pandas as pd
+import pytest
+
+from src.synthetic import SyntheticChurnGenerator, fidelity_report, read_parquet_head
+
+
+def test_missing_categories_stay_missing(churn_csv, tmp_path):
+    df = pd.read_csv(churn_csv)
+    df.loc[df.index[::2], "PaymentMethod"] = None
+    source = str(tmp_path / "source.csv")
+    df.to_csv(source, index=False)
+
+    block = SyntheticChurnGenerator(seed=0).fit(source).generate_block(0, 20_000)
+    last = pd.Categorical(df["PaymentMethod"]).categories[-1]
+    assert block["PaymentMethod"].isna().mean() == pytest.approx(df["PaymentMethod"].isna().mean(), abs=0.02)
+    assert (block["PaymentMethod"] == last).mean() == pytest.approx((df["PaymentMethod"] == last).mean(), abs=0.02)
+
+
+def test_fidelity_report_on_parquet_sample(churn_csv, tmp_path):
+    pytest.importorskip("pyarrow")
+    path = SyntheticChurnGenerator(seed=0).fit(churn_csv).write(150_000, str(tmp_path / "synthetic.parquet"))
+    head = read_parquet_head(path, 120_000)
+    pd.testing.assert_frame_equal(head, pd.read_parquet(path).head(120_000))
+    report = fidelity_report(path, churn_csv, sample_rows=1_000)
+    assert report["synthetic"]["rows"] == 1_000
+    assert report["source"]["rows"] == 600
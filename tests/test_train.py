@@ -0,0 +1,45 @@
+"""Baseline training: the process-pool path must give the same models as training one after another."""
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+from xgboost import XGBClassifier
+
+from src.feature_store import write_matrix, open_matrix
+from src.tracking import RunLogger
+from src.train import train_baselines
+
+
+def _matrix(n_rows: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    X = pd.DataFrame(rng.normal(size=(n_rows, 5)), columns=[f"f{i}" for i in range(5)])
+    y = pd.Series((X["f0"] - 0.5 * X["f3"] + rng.normal(scale=0.5, size=n_rows) > 0).astype(int))
+    return X, y
+
+
+def _jobs(X, y):
+    return {
+        "LogisticRegression": (LogisticRegression(max_iter=1000, random_state=42), X, y, None),
+        "RandomForest": (RandomForestClassifier(n_estimators=30, random_state=42, n_jobs=-1), X, y, None),
+        "XGBoost": (XGBClassifier(n_estimators=30, max_depth=3, random_state=42, n_jobs=-1), X, y, None),
+    }
+
+
+def test_parallel_baselines_match_sequential(tmp_path):
+    X, y = _matrix(n_rows=800)
+    X_test, y_test = _matrix(n_rows=200, seed=1)
+    write_matrix("train", X, y, store_dir=str(tmp_path))
+    X_mm, y_mm = open_matrix("train", store_dir=str(tmp_path))
+
+    runs = {}
+    for mode, n_jobs in (("sequential", 1), ("parallel", 3)):
+        tracker = RunLogger("test", mode="offline", log_models="none", offline_dir=str(tmp_path / mode))
+        runs[mode] = train_baselines(_jobs(X_mm, y_mm), X_test, y_test, n_jobs=n_jobs, min_rows=0, tracker=tracker)
+        tracker.close()
+
+    for name, (model, metrics) in runs["sequential"].items():
+        parallel_model, parallel_metrics = runs["parallel"][name]
+        assert parallel_metrics == metrics
+        np.testing.assert_array_equal(parallel_model.predict_proba(X_test), model.predict_proba(X_test))
+        assert parallel_model.get_params().get("n_jobs") == model.get_params().get("n_jobs")